@@ -5,12 +5,24 @@ import pandas as pd
 import streamlit as st
 
 from auth import admin_login_ui, is_admin
+import timing
+from config import (
+    DEFAULT_ALPHA,
+    DEFAULT_K,
+    DEFAULT_MATCH_WEIGHT,
+    DEFAULT_ME_NAME,
+    DEFAULT_OPP_NAME,
+    MODEL_MAX_K,
+    TIMING,
+)
 from storage import (
-    load_db,
     clear_db,
     delete_match,
     delete_last_n,
-    export_csv_bytes,
+    deferred_export_csv,
+    deferred_export_summary_csv,
+    load_match,
+    match_summaries,
 )
 from ui_record import record_page
 from ui_live import live_page
@@ -18,73 +30,125 @@ from ui_live import live_page
 st.set_page_config(page_title="点球大战 Penalty AI", layout="wide")
 
 
-def _match_summary(df_match: pd.DataFrame) -> dict:
-    df_match = df_match.sort_values("kick_index")
-    me_goals = int(df_match.loc[df_match["who_kicked"] == "ME", "is_goal"].sum())
-    opp_goals = int(df_match.loc[df_match["who_kicked"] == "OPP", "is_goal"].sum())
-    me_k = int((df_match["who_kicked"] == "ME").sum())
-    opp_k = int((df_match["who_kicked"] == "OPP").sum())
-    order_mode = df_match["order_mode"].iloc[0] if len(df_match) else ""
-    return {
-        "match_id": df_match["match_id"].iloc[0] if len(df_match) else "",
-        "score": f"{me_goals}-{opp_goals}",
-        "kicks": f"{me_k}/{opp_k}",
-        "order_mode": order_mode,
-        "rows": len(df_match),
-    }
+DB_PAGE_SIZES = [20, 50, 100]
+
+VIEWS = {"live": "实时模式", "record": "录入数据（按整场）", "db": "数据库（按比赛）"}
+
+# widget keys of each view. Only the selected view runs, and Streamlit forgets a
+# widget's value after a run that does not render it, so main() carries these over
+# for the views that are hidden. (live_mid is restored from live_match_id instead.)
+VIEW_WIDGET_KEYS = {
+    "live": [],
+    "record": ["rec_order_mode"],
+    "db": [
+        "db_export_from",
+        "db_export_to",
+        "db_search",
+        "db_opp",
+        "db_page_size",
+        "db_page",
+        "db_detail",
+        "db_last_n",
+    ],
+}
+
+
+def _order_label(order_mode: str) -> str:
+    return "我先发" if order_mode == "ME_FIRST" else "我后发"
 
 
 def db_page(me_name: str, opp_name: str):
-    st.subheader("数据库（按比赛汇总展示，可展开查看每脚）")
+    st.subheader("数据库（按比赛汇总展示，选中一场查看每脚）")
 
-    df = load_db()
+    # counts come from the summary table; the full DB is never loaded on a render
+    summaries = match_summaries()
 
     m1, m2, m3 = st.columns([1.2, 1.2, 2.6])
-    m1.metric("累计记录（脚）", int(len(df)))
-    m2.metric("累计比赛（场）", int(df["match_id"].nunique()) if len(df) else 0)
+    m1.metric("累计记录（脚）", int(summaries["rows"].sum()))
+    m2.metric("累计比赛（场）", int(len(summaries)))
     m3.metric("权限", "管理员 ✅" if is_admin() else "普通用户")
 
-    # Admin-only download full DB
+    # Admin-only download full DB; the CSV is only built when the button is clicked
     if is_admin():
+        c_from, c_to = st.columns(2)
+        match_from = c_from.text_input("导出 match_id 从（含，留空不限）", value="", key="db_export_from").strip()
+        match_to = c_to.text_input("导出 match_id 到（含，留空不限）", value="", key="db_export_to").strip()
         st.download_button(
-            "下载全库 CSV（管理员）",
-            data=export_csv_bytes(admin_only=True),
+            "下载全库 CSV（管理员）" if not (match_from or match_to) else "下载所选范围 CSV（管理员）",
+            data=deferred_export_csv(match_from, match_to, admin_only=True),
             file_name="penalties.csv",
             mime="text/csv",
             key="db_download_admin",
         )
+        st.download_button(
+            "下载比赛汇总 CSV（管理员）",
+            data=deferred_export_summary_csv(admin_only=True),
+            file_name="matches.csv",
+            mime="text/csv",
+            key="db_download_summary",
+        )
     else:
         st.info("普通用户可以查看与使用功能，但不能下载/删除/清空数据库。")
 
     st.divider()
 
-    if len(df) == 0:
+    if len(summaries) == 0:
         st.info("数据库为空。")
         return
 
-    # match list
-    st.write("比赛列表（点击展开查看每脚明细）：")
-    for mid, g in df.groupby("match_id"):
-        info = _match_summary(g)
-        title = (
-            f"match_id={info['match_id']} | 比分({me_name}-{opp_name})={info['score']} | "
-            f"脚数(我/对手)={info['kicks']} | 先后手={('我先发' if info['order_mode']=='ME_FIRST' else '我后发')} | 记录行={info['rows']}"
-        )
-        with st.expander(title, expanded=False):
-            gg = g.sort_values("kick_index").copy()
-            st.dataframe(gg, use_container_width=True)
-
-            if is_admin():
-                c1, c2 = st.columns([1, 3])
-                with c1:
-                    if st.button(f"删除该场 {mid}", type="primary", key=f"db_del_{mid}"):
-                        delete_match(mid)
-                        st.success(f"已删除 match_id={mid}")
-                        st.rerun()
-                with c2:
-                    st.caption("删除后不可恢复。")
-            else:
-                st.caption("普通用户无删除权限。")
+    # match list: search + opponent filter + pagination over the summary table, only one page is rendered
+    c_search, c_opp, c_size, c_page = st.columns([1.6, 1, 1, 1])
+    query = c_search.text_input("按 match_id 搜索", value="", key="db_search").strip()
+    opponents = sorted({str(x) for x in summaries["opp_name"].dropna()} - {""})
+    opp_filter = c_opp.selectbox("对手", ["全部", *opponents], key="db_opp")
+    page_size = c_size.selectbox("每页", DB_PAGE_SIZES, key="db_page_size")
+
+    view = summaries
+    if opp_filter != "全部":
+        view = view[view["opp_name"].astype(str) == opp_filter]
+    if query:
+        view = view[view["match_id"].astype(str).str.contains(query, case=False, regex=False)]
+    n_pages = max(1, -(-len(view) // page_size))
+    if st.session_state.get("db_page", 1) > n_pages:
+        # a narrower search can leave the remembered page out of range
+        st.session_state["db_page"] = n_pages
+    page = int(c_page.number_input(f"页（共 {n_pages} 页）", min_value=1, max_value=n_pages, step=1, key="db_page"))
+    page_rows = view.iloc[(page - 1) * page_size:page * page_size]
+
+    st.write(f"比赛列表（{len(view)} 场）：")
+    st.dataframe(
+        pd.DataFrame(
+            {
+                "match_id": page_rows["match_id"],
+                f"比分({me_name}-{opp_name})": page_rows["score"],
+                "脚数(我/对手)": page_rows["kicks"],
+                "先后手": page_rows["order_mode"].map(_order_label),
+                "对手": page_rows["opp_name"].fillna(""),
+                "记录行": page_rows["rows"],
+            }
+        ),
+        width="stretch",
+        hide_index=True,
+    )
+
+    if len(page_rows) == 0:
+        st.info("没有匹配的比赛。")
+    else:
+        # per-kick detail only for the selected match
+        mid = st.selectbox("查看每脚明细", page_rows["match_id"].tolist(), key="db_detail")
+        st.dataframe(load_match(mid), width="stretch")
+
+        if is_admin():
+            c1, c2 = st.columns([1, 3])
+            with c1:
+                if st.button(f"删除该场 {mid}", type="primary", key="db_del_match"):
+                    delete_match(mid)
+                    st.success(f"已删除 match_id={mid}")
+                    st.rerun()
+            with c2:
+                st.caption("删除后不可恢复。")
+        else:
+            st.caption("普通用户无删除权限。")
 
     st.divider()
 
@@ -105,13 +169,41 @@ def db_page(me_name: str, opp_name: str):
             st.rerun()
 
 
+def timing_panel():
+    """
+    Admin-only sidebar expander: rolling p50/p95 per timed section, plus the
+    raw trace as JSON lines. Shown only when config.TIMING is on.
+    """
+    with st.sidebar.expander("⏱️ 重跑耗时", expanded=False):
+        rows = timing.stats()
+        if not rows:
+            st.caption("还没有计时数据。")
+        else:
+            st.dataframe(
+                pd.DataFrame(rows).rename(columns={"section": "环节", "calls": "次数"}).round(3),
+                width="stretch",
+                hide_index=True,
+            )
+            st.caption(f"p50/p95 取每个环节最近 {timing.WINDOW} 次。")
+        st.download_button(
+            "下载计时记录（JSON lines）",
+            data=timing.trace_jsonl,
+            file_name="timing.jsonl",
+            mime="application/jsonl",
+            key="timing_download",
+        )
+        if st.button("清空计时", key="timing_reset"):
+            timing.reset()
+            st.rerun()
+
+
 def main():
     st.title("⚽ 点球大战 Penalty AI（在线版：管理员权限控制）")
 
     # --- Sidebar config ---
     st.sidebar.header("配置")
-    me_name = st.sidebar.text_input("我方名称", value="ME", key="sb_me")
-    opp_name = st.sidebar.text_input("对手名称", value="OPP", key="sb_opp")
+    me_name = st.sidebar.text_input("我方名称", value=DEFAULT_ME_NAME, key="sb_me")
+    opp_name = st.sidebar.text_input("对手名称", value=DEFAULT_OPP_NAME, key="sb_opp")
 
     order_mode = st.sidebar.radio(
         "先后手",
@@ -120,34 +212,48 @@ def main():
         key="sb_order",
     )
 
-    alpha = st.sidebar.slider("平滑 alpha", 0.0, 5.0, 1.0, 0.1, key="sb_alpha")
-    k = st.sidebar.slider("序列阶数 K", 0, 4, 2, 1, key="sb_k")
-    match_weight = st.sidebar.slider("本场权重", 0.0, 10.0, 2.0, 0.5, key="sb_mw")
+    alpha = st.sidebar.slider("平滑 alpha", 0.0, 5.0, float(DEFAULT_ALPHA), 0.1, key="sb_alpha")
+    k = st.sidebar.slider("序列阶数 K", 0, MODEL_MAX_K, int(DEFAULT_K), 1, key="sb_k")
+    match_weight = st.sidebar.slider("本场权重", 0.0, 10.0, float(DEFAULT_MATCH_WEIGHT), 0.5, key="sb_mw")
 
     # --- Admin gate (sidebar) ---
     admin_login_ui()
+    if TIMING and is_admin():
+        timing_panel()
 
     # quick stats
-    df = load_db()
-    st.sidebar.caption(f"数据库：{len(df)} 脚 / {df['match_id'].nunique() if len(df) else 0} 场")
-
-    tab_live, tab_record, tab_db = st.tabs(["实时模式", "录入数据（按整场）", "数据库（按比赛）"])
-
-    with tab_live:
-        live_page(
-            me_name=me_name,
-            opp_name=opp_name,
-            alpha=alpha,
-            k=k,
-            match_weight=match_weight,
-            order_mode=order_mode,
-        )
+    summaries = match_summaries()
+    st.sidebar.caption(f"数据库：{int(summaries['rows'].sum())} 脚 / {len(summaries)} 场")
 
-    with tab_record:
-        record_page(me_name=me_name, opp_name=opp_name)
+    # only the selected view runs (st.tabs would run all three on every rerun)
+    view = st.radio(
+        "视图",
+        list(VIEWS),
+        format_func=VIEWS.get,
+        horizontal=True,
+        label_visibility="collapsed",
+        key="nav_view",
+    )
+    for other, keys in VIEW_WIDGET_KEYS.items():
+        if other != view:
+            for key in keys:
+                if key in st.session_state:
+                    st.session_state[key] = st.session_state[key]
 
-    with tab_db:
-        db_page(me_name=me_name, opp_name=opp_name)
+    with timing.section(f"view.{view}"):
+        if view == "live":
+            live_page(
+                me_name=me_name,
+                opp_name=opp_name,
+                alpha=alpha,
+                k=k,
+                match_weight=match_weight,
+                order_mode=order_mode,
+            )
+        elif view == "record":
+            record_page(me_name=me_name, opp_name=opp_name)
+        else:
+            db_page(me_name=me_name, opp_name=opp_name)
 
 
 if __name__ == "__main__":
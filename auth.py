@@ -1,7 +1,11 @@
 # auth.py
 from __future__ import annotations
 import hmac
-import streamlit as st
+
+try:
+    import streamlit as st
+except ImportError:  # headless (service.py, backtest, benchmarks): nobody is admin
+    st = None
 
 
 def _consteq(a: str, b: str) -> bool:
@@ -11,6 +15,8 @@ def _consteq(a: str, b: str) -> bool:
 
 
 def is_admin() -> bool:
+    if st is None:
+        return False
     return bool(st.session_state.get("is_admin", False))
 
 
@@ -0,0 +1,223 @@
+# backtest.py
+"""
+Walk-forward backtest of the live predictor.
+
+Every stored match is replayed kick by kick the way ui_live.live_page predicts:
+p_hist from NgramStageModel (trained only on earlier matches, with the same
+k -> 0 backoff), p_match from match_only_probs (earlier kicks of the same
+match), blended with blend_probs. Matches are ordered as they were saved.
+
+p_hist is always the whole-archive prediction: live_page's blend of a named
+opponent's own profile (NgramStageModel.predict_opponent_dir) is not
+replayed, so the scores are those of a live page with no opponent name set.
+
+Nothing is rebuilt per step. For each kick and each context length kk, the
+history and match-only counts that live_page would see are computed for the
+whole archive at once with sorted-key lookups (collect_evidence). Any
+(k, alpha, match_weight) is then scored with array arithmetic (score).
+
+    python backtest.py --k 2 --alpha 1.0 --match-weight 2.0 --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from config import DIRS, MODEL_MAX_K
+from model import STAGES, WHOS, _ctx_codes, _encode_kicks
+
+
+def _live_stage(position: np.ndarray) -> np.ndarray:
+    # utils.round_stage_from_kick_index: EARLY 1-4, MID 5-8, LATE 9+
+    return np.where(position <= 4, 0, np.where(position <= 8, 1, 2)).astype(np.int64)
+
+
+def _prepare(df: pd.DataFrame, max_k: int) -> dict:
+    """
+    Encode the archive in replay order: matches in save order, kicks by kick_index.
+    """
+    order = pd.unique(df["match_id"].dropna())
+    rank = pd.Series(np.arange(len(order)), index=order)
+    d = df[df["match_id"].notna()].copy()
+    d["_match"] = rank.reindex(d["match_id"]).to_numpy()
+    d = d.sort_values(["_match", "kick_index"], kind="stable")
+    # _encode_kicks sorts by match_id; feed it the replay rank instead so rows stay in order
+    d["match_id"] = d["_match"]
+    match, who, stage, dir_, lags = _encode_kicks(d, max_k)
+    match = match.astype(np.int64)
+    position = pd.Series(match).groupby(match).cumcount().to_numpy() + 1
+    return {
+        "match": match,
+        "who": who,
+        "stage": stage,            # stored round_stage: what the model was trained on
+        "live_stage": _live_stage(position),  # what live_page derives from the kick number
+        "position": position,
+        "dir": dir_,
+        "lags": lags,
+        "max_k": max_k,
+    }
+
+
+def _count_before(event_keys: np.ndarray, query_lo: np.ndarray, query_hi: np.ndarray) -> np.ndarray:
+    # number of events with query_lo <= key < query_hi
+    event_keys = np.sort(event_keys)
+    return np.searchsorted(event_keys, query_hi, "left") - np.searchsorted(event_keys, query_lo, "left")
+
+
+def _level_counts(enc: dict, kk: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    For context length kk, return (hist, match) counts, each (n, 3):
+      hist:  kicks of earlier matches with this kick's (who, stage, ctx)
+      match: earlier kicks of this match with this kick's (who, live stage, ctx)
+    """
+    n = len(enc["dir"])
+    n_ctx = 4 ** kk
+    ctx = _ctx_codes(enc["lags"], kk)
+    match = enc["match"]
+    n_match = int(match.max()) + 2 if n else 1
+    n_pos = int(enc["position"].max()) + 2 if n else 1
+
+    train_key = (enc["who"] * 3 + enc["stage"]) * n_ctx + ctx
+    query_key = (enc["who"] * 3 + enc["live_stage"]) * n_ctx + ctx
+
+    hist = np.zeros((n, len(DIRS)), dtype=np.uint32)
+    same = np.zeros((n, len(DIRS)), dtype=np.uint32)
+    for d in range(len(DIRS)):
+        is_d = enc["dir"] == d
+        # history: (key, match) < (query key, this match)
+        ev = train_key[is_d] * n_match + match[is_d]
+        hist[:, d] = _count_before(ev, query_key * n_match, query_key * n_match + match)
+        # this match: (match, key, position) < (this match, query key, this position)
+        ev = (match[is_d] * (2 * 3 * n_ctx) + query_key[is_d]) * n_pos + enc["position"][is_d]
+        base = (match * (2 * 3 * n_ctx) + query_key) * n_pos
+        same[:, d] = _count_before(ev, base, base + enc["position"])
+    return hist, same
+
+
+def collect_evidence(df: pd.DataFrame, max_k: int = MODEL_MAX_K, workers: int = 1) -> dict:
+    """
+    Per-kick evidence for the whole archive: hist/match counts for every kk <= max_k,
+    shaped (max_k + 1, n, 3). Context lengths are independent and are spread over
+    a process pool when workers > 1.
+    """
+    enc = _prepare(df, max_k)
+    levels = range(max_k + 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            results = list(ex.map(_level_counts, [enc] * len(levels), levels))
+    else:
+        results = [_level_counts(enc, kk) for kk in levels]
+
+    enc["hist"] = np.stack([r[0] for r in results])
+    enc["same"] = np.stack([r[1] for r in results])
+    return enc
+
+
+def _smooth(c: np.ndarray, alpha: float) -> np.ndarray:
+    # same summation order as model._dirichlet_smooth, so results match bit for bit
+    c = c.astype(np.float64) + alpha
+    total = (c[:, 0] + c[:, 1]) + c[:, 2]
+    out = np.full_like(c, 1 / len(DIRS))
+    ok = total > 0
+    out[ok] = c[ok] / total[ok, None]
+    return out
+
+
+def components(ev: dict, k: int, alpha: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (p_hist, p_match), each (n, 3), for one (k, alpha); match_weight only enters in blend().
+    """
+    n = len(ev["dir"])
+    k = min(max(0, int(k)), ev["max_k"])
+
+    # p_hist: highest kk <= k with any history, as predict_next_dir backs off
+    p_hist = np.full((n, len(DIRS)), 1 / len(DIRS))
+    done = np.zeros(n, dtype=bool)
+    for kk in range(k, -1, -1):
+        take = ~done & (ev["hist"][kk].sum(axis=1) > 0)
+        p_hist[take] = _smooth(ev["hist"][kk][take], alpha)
+        done |= take
+
+    p_match = _smooth(ev["same"][k], alpha)
+    return p_hist, p_match
+
+
+def blend(p_hist: np.ndarray, p_match: np.ndarray, match_weight: float) -> np.ndarray:
+    # blend_probs, row-wise
+    w = float(match_weight)
+    out = (p_hist + w * p_match) / (1.0 + w)
+    s = (out[:, 0] + out[:, 1]) + out[:, 2]
+    ok = s > 0
+    out[ok] = out[ok] / s[ok, None]
+    out[~ok] = 1 / len(DIRS)
+    return out
+
+
+def score(ev: dict, k: int, alpha: float, match_weight: float) -> np.ndarray:
+    """
+    Probabilities (n, 3) that live_page would show before each kick.
+    """
+    return blend(*components(ev, k, alpha), match_weight)
+
+
+def _per_kick(ev: dict, probs: np.ndarray) -> dict:
+    n = len(ev["dir"])
+    truth = ev["dir"]
+    p_true = probs[np.arange(n), truth]
+    return {
+        "log_loss": -np.log(np.clip(p_true, 1e-15, 1.0)),
+        # sum_d (p_d - 1[d == truth])^2
+        "brier": np.einsum("ij,ij->i", probs, probs) - 2 * p_true + 1,
+        "top1": (probs.argmax(axis=1) == truth).astype(float),
+    }
+
+
+def summary(ev: dict, probs: np.ndarray) -> dict:
+    """
+    Overall log_loss / brier / top1 means.
+    """
+    return {name: float(v.mean()) if len(v) else float("nan") for name, v in _per_kick(ev, probs).items()}
+
+
+def metrics(ev: dict, probs: np.ndarray) -> pd.DataFrame:
+    """
+    log-loss, Brier score and top-1 hit rate per who / round_stage, plus an overall row.
+    """
+    per_kick = pd.DataFrame(
+        {
+            "who": np.array(WHOS)[ev["who"]],
+            "round_stage": np.array(STAGES)[ev["live_stage"]],
+            **_per_kick(ev, probs),
+        }
+    )
+    agg = {"kicks": ("log_loss", "size"), "log_loss": ("log_loss", "mean"), "brier": ("brier", "mean"), "top1": ("top1", "mean")}
+    table = per_kick.groupby(["who", "round_stage"]).agg(**agg).reset_index()
+    total = pd.DataFrame([{"who": "ALL", "round_stage": "ALL", "kicks": len(per_kick), **summary(ev, probs)}])
+    return pd.concat([table, total], ignore_index=True)
+
+
+def run(df: pd.DataFrame, k: int = 2, alpha: float = 1.0, match_weight: float = 2.0, workers: int = 1) -> pd.DataFrame:
+    ev = collect_evidence(df, max_k=max(0, int(k)), workers=workers)
+    return metrics(ev, score(ev, k, alpha, match_weight))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Walk-forward backtest of the live predictor.")
+    ap.add_argument("--k", type=int, default=2)
+    ap.add_argument("--alpha", type=float, default=1.0)
+    ap.add_argument("--match-weight", type=float, default=2.0)
+    ap.add_argument("--workers", type=int, default=1)
+    args = ap.parse_args()
+
+    from storage import load_db
+
+    table = run(load_db(), k=args.k, alpha=args.alpha, match_weight=args.match_weight, workers=args.workers)
+    print(table.to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+    print("(whole-archive p_hist only: opponent-profile blending is not replayed)")
+
+
+if __name__ == "__main__":
+    main()
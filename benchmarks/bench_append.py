@@ -0,0 +1,73 @@
+# benchmarks/bench_append.py
+"""
+Save latency of storage.append_rows against archives of growing size.
+
+    python benchmarks/bench_append.py
+"""
+from __future__ import annotations
+
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import storage  # noqa: E402
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+REPEATS = 20
+
+
+def _synthetic_kicks(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    kick_index = np.arange(n) % 10 + 1
+    match_no = np.arange(n) // 10
+    dirs = np.array(["L", "C", "R"])
+    kdir = dirs[rng.integers(0, 3, n)]
+    gdir = dirs[rng.integers(0, 3, n)]
+    return pd.DataFrame(
+        {
+            "match_id": [f"m{i:07d}" for i in match_no],
+            "kick_index": kick_index,
+            "who_kicked": np.where(kick_index % 2 == 1, "ME", "OPP"),
+            "kicker_dir": kdir,
+            "keeper_dir": gdir,
+            "is_goal": (kdir != gdir).astype(int),
+            "order_mode": "ME_FIRST",
+            "phase": "REG",
+            "round_stage": np.where(kick_index <= 4, "EARLY", np.where(kick_index <= 8, "MID", "LATE")),
+            "me_name": "ME",
+            "opp_name": np.char.add("team", (match_no % 20).astype(str)),
+        }
+    )
+
+
+def main():
+    match = _synthetic_kicks(10, seed=1)
+    match["match_id"] = "bench"
+
+    print(f"{'stored kicks':>12}  {'median ms':>10}  {'p95 ms':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in SIZES:
+            path = Path(tmp) / f"penalties_{n}.csv"
+            _synthetic_kicks(n).to_csv(path, index=False, encoding="utf-8-sig")
+            storage.DB_PATH = path
+
+            times = []
+            for _ in range(REPEATS):
+                t0 = time.perf_counter()
+                storage.append_rows(match)
+                times.append((time.perf_counter() - t0) * 1000)
+
+            times.sort()
+            p95 = times[int(0.95 * (len(times) - 1))]
+            print(f"{n:>12,}  {statistics.median(times):>10.2f}  {p95:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/bench_backtest.py
+"""
+Walk-forward backtest: checks backtest.score against a literal kick-by-kick
+replay (NgramStageModel.update + match_only_probs + blend_probs, as live_page
+does), then times the full archive at 100k matches.
+
+    python benchmarks/bench_backtest.py [--workers 4]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import backtest  # noqa: E402
+from config import DIRS  # noqa: E402
+from model import NgramStageModel, blend_probs, match_only_probs  # noqa: E402
+from kicks import round_stage_from_kick_index  # noqa: E402
+from bench_append import _synthetic_kicks  # noqa: E402
+
+MATCHES = 100_000
+SETTINGS = [(0, 1.0, 2.0), (2, 0.5, 0.0), (4, 0.0, 3.0), (3, 2.0, 10.0)]
+
+
+def replay_reference(df, k, alpha, match_weight, max_k=4):
+    model = NgramStageModel(df.iloc[:0])
+    model.build(max_k=max_k)
+    out = []
+    for mid in pd.unique(df["match_id"]):
+        g = df[df["match_id"] == mid].sort_values("kick_index")
+        seq = []
+        for r in g.to_dict("records"):
+            who = r["who_kicked"]
+            rstage = round_stage_from_kick_index(len(seq) + 1)
+            recent = [x["kicker_dir"] for x in seq if x["who_kicked"] == who]
+            p_hist = model.predict_next_dir(who, rstage, recent, k, alpha)
+            p_match = match_only_probs(seq, who, rstage, k, alpha)
+            p = blend_probs(p_hist, p_match, match_weight)
+            out.append([p[d] for d in DIRS])
+            seq.append(r)
+        model.update(g)
+    return np.array(out)
+
+
+def _skewed(n, seed):
+    # lean towards L so contexts carry signal
+    df = _synthetic_kicks(n, seed=seed)
+    rng = np.random.default_rng(seed)
+    df["kicker_dir"] = np.where(rng.random(n) < 0.4, "L", df["kicker_dir"])
+    return df
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, default=1)
+    args = ap.parse_args()
+
+    small = _skewed(3_000, seed=11)
+    ev = backtest.collect_evidence(small, max_k=4)
+    for k, alpha, w in SETTINGS:
+        assert np.array_equal(backtest.score(ev, k, alpha, w), replay_reference(small, k, alpha, w)), (k, alpha, w)
+    print(f"backtest.score == literal replay for {len(SETTINGS)} settings")
+
+    df = _skewed(MATCHES * 10, seed=1)
+    t0 = time.perf_counter()
+    ev = backtest.collect_evidence(df, max_k=4, workers=args.workers)
+    t1 = time.perf_counter()
+    table = backtest.metrics(ev, backtest.score(ev, 2, 1.0, 2.0))
+    t2 = time.perf_counter()
+
+    print(f"{MATCHES:,} matches / {len(df):,} kicks, workers={args.workers}")
+    print(f"  evidence (all K<=4): {t1 - t0:.2f} s   score + metrics: {(t2 - t1) * 1000:.0f} ms")
+    print(table.to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+
+
+if __name__ == "__main__":
+    main()
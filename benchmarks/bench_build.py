@@ -0,0 +1,65 @@
+# benchmarks/bench_build.py
+"""
+NgramStageModel.build: vectorised counts vs. the original iterrows loop
+(build_loop, which tests/test_model.py checks the counts against).
+
+    python benchmarks/bench_build.py
+"""
+from __future__ import annotations
+
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import DIRS  # noqa: E402
+from model import NgramStageModel, _ctx_tuple  # noqa: E402
+from bench_append import _synthetic_kicks  # noqa: E402
+
+SIZES = [10_000, 100_000, 300_000]
+MAX_K = 4
+
+
+def build_loop(df, max_k):
+    """The pre-vectorisation NgramStageModel.build, kept as the reference."""
+    counts = defaultdict(Counter)
+    for mid, g in df.groupby("match_id"):
+        g = g.sort_values("kick_index")
+        hist = {"ME": [], "OPP": []}
+        for _, r in g.iterrows():
+            who = str(r.get("who_kicked", ""))
+            if who not in ("ME", "OPP"):
+                continue
+            stage = str(r.get("round_stage", ""))
+            if stage not in ("EARLY", "MID", "LATE"):
+                stage = "MID"
+            next_dir = str(r.get("kicker_dir", ""))
+            if next_dir not in DIRS:
+                continue
+            for k in range(max_k, -1, -1):
+                ctx = _ctx_tuple(hist[who], k)
+                counts[(who, stage, k, ctx)][next_dir] += 1
+            hist[who].append(next_dir)
+    return counts
+
+
+def main():
+    print(f"{'kicks':>9}  {'loop s':>8}  {'vectorised s':>12}  {'speedup':>7}")
+    for n in SIZES:
+        df = _synthetic_kicks(n)
+
+        t0 = time.perf_counter()
+        build_loop(df, MAX_K)
+        loop_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        NgramStageModel(df).build(max_k=MAX_K)
+        vec_s = time.perf_counter() - t0
+
+        print(f"{n:>9,}  {loop_s:>8.2f}  {vec_s:>12.3f}  {loop_s / vec_s:>6.0f}x")
+
+
+if __name__ == "__main__":
+    main()
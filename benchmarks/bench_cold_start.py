@@ -0,0 +1,55 @@
+# benchmarks/bench_cold_start.py
+"""
+Cold-start time-to-first-prediction in a fresh process, with and without a
+model snapshot next to the data file.
+
+    python benchmarks/bench_cold_start.py
+"""
+from __future__ import annotations
+
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_append import _synthetic_kicks  # noqa: E402
+
+ROOT = Path(__file__).resolve().parent.parent
+SIZES = [100_000, 1_000_000]
+
+CHILD = """
+import sys, time
+from pathlib import Path
+sys.path.insert(0, {root!r})
+import storage
+storage.DB_PATH = Path({db!r})
+t0 = time.perf_counter()
+m = storage.get_model(max_k=4)
+m.predict_next_dir("OPP", "MID", ["L", "R"], 2, 1.0)
+print(f"{{(time.perf_counter() - t0) * 1000:.1f}}")
+"""
+
+
+def _first_prediction_ms(db: Path) -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD.format(root=str(ROOT), db=str(db))],
+        check=True, capture_output=True, text=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    print(f"{'stored kicks':>12}  {'no snapshot ms':>14}  {'snapshot ms':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in SIZES:
+            db = Path(tmp) / f"penalties_{n}.csv"
+            _synthetic_kicks(n).to_csv(db, index=False, encoding="utf-8-sig")
+            cold = _first_prediction_ms(db)  # builds and writes the snapshot
+            warm = _first_prediction_ms(db)  # loads it
+            print(f"{n:>12,}  {cold:>14.1f}  {warm:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/bench_concurrent_writes.py
+"""
+Stress test for concurrent saves: N processes each save M matches through
+storage.append_rows into one CSV database at the same time (each with a warm
+shared model, as a Streamlit server would have). Checks that no kick is lost
+or torn and that the on-disk model snapshot matches a fresh build, and
+reports how throughput scales with N.
+
+    python benchmarks/bench_concurrent_writes.py --procs 1 2 4 8 --matches 40
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import storage  # noqa: E402
+from model import NgramStageModel  # noqa: E402
+from bench_append import _synthetic_kicks  # noqa: E402
+
+KICKS_PER_MATCH = 10
+BASE_KICKS = 10_000
+
+
+def _worker(db: str, proc: int, matches: int, start, done):
+    storage.DB_PATH = Path(db)
+    storage.get_model()
+    kicks = _synthetic_kicks(matches * KICKS_PER_MATCH, seed=proc + 1)
+    start.wait()
+    for i in range(matches):
+        rows = kicks.iloc[i * KICKS_PER_MATCH:(i + 1) * KICKS_PER_MATCH]
+        storage.append_rows(rows.assign(match_id=f"p{proc}_{i}"))
+    done.put(proc)
+
+
+def _run(n_procs: int, matches: int, tmp: Path) -> float:
+    db = tmp / f"penalties_{n_procs}.csv"
+    _synthetic_kicks(BASE_KICKS).to_csv(db, index=False, encoding="utf-8-sig")
+
+    ctx = mp.get_context("spawn")
+    start = ctx.Barrier(n_procs + 1)
+    done = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(str(db), p, matches, start, done)) for p in range(n_procs)]
+    for p in procs:
+        p.start()
+    start.wait()
+    t0 = time.perf_counter()
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - t0
+    assert all(p.exitcode == 0 for p in procs)
+
+    storage.DB_PATH = db
+    df = storage.load_db()
+    saved = df[df["match_id"].str.startswith("p")]
+    sizes = saved.groupby("match_id").size()
+    assert len(df) == BASE_KICKS + n_procs * matches * KICKS_PER_MATCH, len(df)
+    assert len(sizes) == n_procs * matches and (sizes == KICKS_PER_MATCH).all()
+    # torn lines would leave trailing cells empty; me_name is '' by design (the synthetic rows use the placeholder)
+    assert not df.drop(columns=["me_name"]).isna().any().any()
+
+    # the shared model (from the last snapshot, or rebuilt if it is stale) equals a fresh build
+    storage._model["model"] = None
+    snap = storage.get_model()
+    fresh = NgramStageModel(df)
+    fresh.build(max_k=snap.max_k)
+    assert np.array_equal(snap._counts, fresh._counts)
+    assert np.array_equal(snap._pair_counts, fresh._pair_counts)
+    return elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Concurrent append_rows stress test.")
+    ap.add_argument("--procs", type=int, nargs="+", default=[1, 2, 4, 8])
+    ap.add_argument("--matches", type=int, default=40, help="matches saved by each process")
+    args = ap.parse_args()
+
+    print(f"{'procs':>5}  {'matches':>7}  {'seconds':>7}  {'matches/s':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.procs:
+            elapsed = _run(n, args.matches, Path(tmp))
+            total = n * args.matches
+            print(f"{n:>5}  {total:>7}  {elapsed:>7.2f}  {total / elapsed:>9.1f}")
+    print("no kicks lost")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/bench_db_page.py
+"""
+Rerun time of app.db_page against archives with more and more matches
+(AppTest, warm process caches), next to the old one-expander-per-match loop.
+Also checks that the incrementally maintained summary table equals a fresh
+summary after a save, an extending save, delete_match and delete_last_n.
+
+    python benchmarks/bench_db_page.py
+"""
+from __future__ import annotations
+
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import streamlit as st  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import storage  # noqa: E402
+from summary import summarize  # noqa: E402
+from bench_append import _synthetic_kicks  # noqa: E402
+
+MATCHES = [1_000, 10_000, 100_000]
+OLD_MAX_MATCHES = 1_000
+RERUNS = 5
+
+
+def new_page(db: str):
+    import pathlib
+    import storage
+    storage.DB_PATH = pathlib.Path(db)
+    from app import db_page
+    db_page("ME", "OPP")
+
+
+def old_page(db: str):
+    # the pre-pagination match list: an expander with a dataframe for every match
+    import pathlib
+    import streamlit as st
+    import storage
+    from summary import match_summary
+    storage.DB_PATH = pathlib.Path(db)
+    df = storage.load_db()
+    for mid, g in df.groupby("match_id"):
+        info = match_summary(g)
+        with st.expander(f"match_id={info['match_id']} | 比分={info['score']}", expanded=False):
+            st.dataframe(g.sort_values("kick_index").copy())
+
+
+def _rerun_ms(page, db: Path) -> float:
+    at = AppTest.from_function(page, args=(str(db),), default_timeout=600)
+    at.run()
+    times = []
+    for _ in range(RERUNS):
+        t0 = time.perf_counter()
+        at.run()
+        times.append((time.perf_counter() - t0) * 1000)
+    assert not at.exception, at.exception
+    return statistics.median(times)
+
+
+def check_incremental(tmp: Path):
+    st.session_state["is_admin"] = True
+    storage.DB_PATH = tmp / "incremental.csv"
+    _synthetic_kicks(5_000).to_csv(storage.DB_PATH, index=False, encoding="utf-8-sig")
+    storage.match_summaries()
+    storage.append_rows(_synthetic_kicks(10, seed=1).assign(match_id="new"))
+    storage.append_rows(_synthetic_kicks(4, seed=2).assign(match_id="m0000003"))
+    storage.delete_match("m0000007")
+    storage.delete_last_n(13)
+    fresh = summarize(storage.load_db())
+    assert storage.match_summaries().equals(fresh)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        check_incremental(tmp)
+        print("incremental summary == fresh summary")
+
+        print(f"{'matches':>8}  {'paged ms':>8}  {'old ms':>8}")
+        for n in MATCHES:
+            db = tmp / f"penalties_{n}.csv"
+            _synthetic_kicks(n * 10).to_csv(db, index=False, encoding="utf-8-sig")
+            new_ms = _rerun_ms(new_page, db)
+            old = f"{_rerun_ms(old_page, db):>8.0f}" if n <= OLD_MAX_MATCHES else f"{'-':>8}"
+            print(f"{n:>8,}  {new_ms:>8.0f}  {old}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/bench_export.py
+"""
+Full-database CSV export: the old one-shot export (load_db, then one
+to_csv / encode of the whole frame) against storage.iter_csv_chunks
+streamed to a file. Reports time and peak traced memory (tracemalloc) for
+each, and checks that both produce the same bytes. Starts with a cold
+load_db cache.
+
+    python benchmarks/bench_export.py
+"""
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import storage  # noqa: E402
+from bench_append import _synthetic_kicks  # noqa: E402
+
+SIZES = [100_000, 1_000_000]
+
+
+def _measure(fn):
+    # timed untraced (tracemalloc slows pandas several-fold), then run again for the peak
+    storage._invalidate_cache()
+    t0 = time.perf_counter()
+    out = fn()
+    ms = (time.perf_counter() - t0) * 1000
+
+    storage._invalidate_cache()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return ms, peak, out
+
+
+def one_shot() -> bytes:
+    return storage.load_db().to_csv(index=False).encode("utf-8-sig")
+
+
+def streamed(dest: Path) -> Path:
+    with open(dest, "wb") as f:
+        for chunk in storage.iter_csv_chunks(admin_only=False):
+            f.write(chunk)
+    return dest
+
+
+def main():
+    print(f"{'kicks':>9}  {'export':<9}  {'ms':>8}  {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in SIZES:
+            storage.DB_PATH = Path(tmp) / f"penalties_{n}.csv"
+            _synthetic_kicks(n).to_csv(storage.DB_PATH, index=False, encoding="utf-8-sig")
+
+            t_old, m_old, data = _measure(one_shot)
+            t_new, m_new, path = _measure(lambda: streamed(Path(tmp) / "export.csv"))
+            assert path.read_bytes() == data
+            del data
+
+            print(f"{n:>9}  {'one-shot':<9}  {t_old:>8.0f}  {m_old:>8.1f}")
+            print(f"{n:>9}  {'streamed':<9}  {t_new:>8.0f}  {m_new:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_game.py
+"""
+game.py: batch solve of every (who, stage, context) game per K and the cached
+per-kick lookup. fictitious_play is the slow reference whose value bounds
+tests/test_game.py checks the exact solutions against.
+
+    python benchmarks/bench_game.py
+"""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from game import game_table, solve_kick  # noqa: E402
+from model import NgramStageModel  # noqa: E402
+from bench_append import _synthetic_kicks  # noqa: E402
+
+ALPHA = 1.0
+FP_ITERS = 20_000
+
+
+def _noisy_kicks(n, seed=0):
+    # stored is_goal is not always shot != dive (misses, saves on the wrong side)
+    df = _synthetic_kicks(n, seed)
+    rng = np.random.default_rng(seed)
+    flip = rng.random(len(df)) < 0.15
+    df.loc[flip, "is_goal"] = 1 - df.loc[flip, "is_goal"]
+    return df
+
+
+def fictitious_play(S, iters=FP_ITERS):
+    # (lower, upper) bounds on each game's value from the empirical mixes
+    b = np.arange(len(S))
+    kick_pay = np.zeros((len(S), 3))
+    dive_pay = np.zeros((len(S), 3))
+    shot = np.zeros(len(S), dtype=np.int64)
+    dive = np.zeros(len(S), dtype=np.int64)
+    for _ in range(iters):
+        kick_pay += S[b, :, dive]
+        dive_pay += S[b, shot, :]
+        shot = kick_pay.argmax(axis=1)
+        dive = dive_pay.argmin(axis=1)
+    return dive_pay.min(axis=1) / iters, kick_pay.max(axis=1) / iters
+
+
+def main():
+    model = NgramStageModel(_noisy_kicks(100_000))
+    model.build(max_k=4)
+
+    print(f"{'K':>2}  {'games':>6}  {'solve ms':>8}  {'max gap':>8}  {'lookup us':>9}")
+    for k in range(model.max_k + 1):
+        t0 = time.perf_counter()
+        table = game_table(model, k, ALPHA)
+        solve_ms = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        for _ in range(1000):
+            solve_kick(model, "OPP", "MID", ["L", "R", "C", "L"], k, ALPHA)
+        lookup_us = (time.perf_counter() - t0) * 1000
+
+        games = table["value"].size
+        print(f"{k:>2}  {games:>6}  {solve_ms:>8.1f}  {table['gap'].max():>8.1e}  {lookup_us:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# benchmarks/bench_kicklog.py
+"""
+Startup of the kicklog backend (model + match summaries straight from the
+memory-mapped records) against the CSV path (load_db, then the same two
+built from the frame), each in a fresh process with no model snapshot:
+wall time and peak RSS above the post-import baseline (VmHWM, Linux only).
+The kicklog model, summaries and load_db frame are first checked against
+the CSV ones.
+
+    python benchmarks/bench_kicklog.py
+"""
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import storage  # noqa: E402
+import storage_kicklog  # noqa: E402
+from bench_append import _synthetic_kicks  # noqa: E402
+from model import NgramStageModel  # noqa: E402
+from summary import summarize  # noqa: E402
+
+ROOT = Path(__file__).resolve().parent.parent
+SIZES = [100_000, 1_000_000]
+
+CHILD = """
+import json, sys, time
+from pathlib import Path
+sys.path.insert(0, {root!r})
+
+def peak_kb():
+    # VmHWM, not ru_maxrss: the latter starts from the parent's peak after fork
+    for line in open("/proc/self/status"):
+        if line.startswith("VmHWM:"):
+            return int(line.split()[1])
+
+import storage
+import storage_kicklog
+storage.STORAGE_BACKEND = {backend!r}
+storage.DB_PATH = storage.KICKLOG_PATH = storage_kicklog.KICKLOG_PATH = Path({db!r})
+storage._save_snapshot = lambda m, key: None  # every run starts cold
+base = peak_kb()
+t0 = time.perf_counter()
+storage.get_model(max_k=4)
+storage.match_summaries()
+ms = (time.perf_counter() - t0) * 1000
+peak = peak_kb()
+print(json.dumps({{"ms": ms, "rss_mb": (peak - base) / 1024}}))
+"""
+
+
+def _startup(backend: str, db: Path) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD.format(root=str(ROOT), backend=backend, db=str(db))],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _check(csv_path: Path, log_path: Path):
+    df = storage._read_csv(csv_path)
+    pd.testing.assert_frame_equal(storage_kicklog.load_db(log_path).astype(df.dtypes.to_dict()), df)
+
+    ref = NgramStageModel(df)
+    ref.build(max_k=4)
+    m = storage_kicklog.build_model(4, log_path)
+    for name in ("_counts", "_totals", "_pair_counts", "_pair_goals"):
+        assert np.array_equal(getattr(m, name), getattr(ref, name)), name
+    assert m.match_ids == ref.match_ids
+    assert m._opp_counts == ref._opp_counts
+
+    pd.testing.assert_frame_equal(storage_kicklog.summaries(log_path), summarize(df), check_dtype=False)
+
+
+def main():
+    print(f"{'kicks':>9}  {'backend':<8}  {'startup ms':>10}  {'peak RSS MB':>11}  {'file MB':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in SIZES:
+            csv_path = Path(tmp) / f"penalties_{n}.csv"
+            log_path = Path(tmp) / f"penalties_{n}.kicks"
+            _synthetic_kicks(n).to_csv(csv_path, index=False, encoding="utf-8-sig")
+            storage_kicklog.convert(csv_path, log_path)
+            _check(csv_path, log_path)
+
+            for backend, path in (("csv", csv_path), ("kicklog", log_path)):
+                r = _startup(backend, path)
+                size = path.stat().st_size / 2**20
+                print(f"{n:>9}  {backend:<8}  {r['ms']:>10.1f}  {r['rss_mb']:>11.1f}  {size:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# benchmarks/bench_live_predict.py
+"""
+Per-click prediction cost in live_page: fresh NgramStageModel build (old path)
+vs. the shared model from storage.get_model, after a match has been saved.
+
+    python benchmarks/bench_live_predict.py
+"""
+from __future__ import annotations
+
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import storage  # noqa: E402
+from model import NgramStageModel  # noqa: E402
+from bench_append import _synthetic_kicks  # noqa: E402
+
+SIZES = [1_000, 10_000, 100_000]
+K = 2
+
+
+def _click(model):
+    return model.predict_next_dir(who="OPP", stage="MID", recent_dirs_for_who=["L", "R"], k=K, alpha=1.0)
+
+
+def _median_ms(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    print(f"{'stored kicks':>12}  {'rebuild ms':>10}  {'shared ms':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in SIZES:
+            storage.DB_PATH = Path(tmp) / f"penalties_{n}.csv"
+            _synthetic_kicks(n).to_csv(storage.DB_PATH, index=False, encoding="utf-8-sig")
+
+            def rebuild():
+                m = NgramStageModel(storage.load_db())
+                m.build(max_k=K)
+                _click(m)
+
+            rebuild_ms = _median_ms(rebuild, 3)
+
+            storage.get_model(max_k=K)
+            storage.append_rows(_synthetic_kicks(10, seed=1).assign(match_id="bench"))
+            shared_ms = _median_ms(lambda: _click(storage.get_model(max_k=K)), 200)
+
+            print(f"{n:>12,}  {rebuild_ms:>10.2f}  {shared_ms:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/bench_live_state.py
+"""
+live_state.LiveMatchState against the per-rerun rescans it replaced: the
+scoreboard and end check (copied below as ui_live had them),
+service._recent_dirs and model.match_only_probs. Per-rerun cost of both at
+a few match lengths; tests/test_live_state.py checks they agree.
+
+    python benchmarks/bench_live_state.py
+"""
+from __future__ import annotations
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from live_state import LiveMatchState  # noqa: E402
+from model import match_only_probs  # noqa: E402
+from service import _recent_dirs  # noqa: E402
+from kicks import kicker_for_kick_index  # noqa: E402
+
+DIRS = ["L", "C", "R"]
+MATCH_LENGTHS = [10, 30, 60]
+REPEATS = 2000
+
+
+# ---- as in ui_live before LiveMatchState ----
+def _score_and_counts(seq):
+    score_me = 0
+    score_opp = 0
+    kicks_me = 0
+    kicks_opp = 0
+
+    for x in seq:
+        who = x.get("who_kicked")
+        ig = int(x.get("is_goal", 0))
+        if who == "ME":
+            kicks_me += 1
+            score_me += ig
+        elif who == "OPP":
+            kicks_opp += 1
+            score_opp += ig
+
+    return score_me, score_opp, kicks_me, kicks_opp
+
+
+def _shootout_result(seq):
+    score_me, score_opp, kicks_me, kicks_opp = _score_and_counts(seq)
+
+    if kicks_me <= 5 and kicks_opp <= 5:
+        rem_me = 5 - kicks_me
+        rem_opp = 5 - kicks_opp
+        if score_me > score_opp + rem_opp:
+            return True, "ME"
+        if score_opp > score_me + rem_me:
+            return True, "OPP"
+
+        if kicks_me == 5 and kicks_opp == 5 and (score_me != score_opp):
+            return True, "ME" if score_me > score_opp else "OPP"
+
+    if kicks_me == kicks_opp and kicks_me > 5 and score_me != score_opp:
+        return True, "ME" if score_me > score_opp else "OPP"
+
+    return False, None
+
+
+def _kick(rng, order_mode, i, odd):
+    shot, dive = rng.choice(DIRS), rng.choice(DIRS)
+    who = kicker_for_kick_index(order_mode, i)
+    if odd and rng.random() < 0.1:
+        shot = rng.choice([None, "", "X"])
+    return {"kick_index": i, "who_kicked": who, "kicker_dir": shot, "keeper_dir": dive, "is_goal": int(shot != dive)}
+
+
+def _per_rerun_old(seq, who, rstage, k, alpha):
+    _score_and_counts(seq)
+    _shootout_result(seq)
+    _recent_dirs(seq, who)
+    match_only_probs(seq, who, rstage, k, alpha)
+
+
+def _per_rerun_new(state, who, rstage, k, alpha):
+    state.score_and_counts()
+    state.result()
+    state.recent_dirs(who)
+    state.match_only_probs(who, rstage, k, alpha)
+
+
+def main():
+    rng = random.Random(1)
+    print(f"{'kicks':>6}  {'rescan us':>9}  {'state us':>8}")
+    for n in MATCH_LENGTHS:
+        seq = [_kick(rng, "ME_FIRST", i, False) for i in range(1, n + 1)]
+        state = LiveMatchState.from_kicks(seq)
+        who = kicker_for_kick_index("ME_FIRST", n + 1)
+
+        t0 = time.perf_counter()
+        for _ in range(REPEATS):
+            _per_rerun_old(seq, who, "LATE", 2, 1.0)
+        old = (time.perf_counter() - t0) / REPEATS * 1e6
+
+        t0 = time.perf_counter()
+        for _ in range(REPEATS):
+            _per_rerun_new(state, who, "LATE", 2, 1.0)
+        new = (time.perf_counter() - t0) / REPEATS * 1e6
+        print(f"{n:>6}  {old:>9.1f}  {new:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
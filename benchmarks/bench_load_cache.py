@@ -0,0 +1,54 @@
+# benchmarks/bench_load_cache.py
+"""
+Many sessions calling load_db at once: one parse, everything else cache hits.
+
+    python benchmarks/bench_load_cache.py
+"""
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import storage  # noqa: E402
+from bench_append import _synthetic_kicks  # noqa: E402
+
+KICKS = 200_000
+SESSIONS = 64
+RERUNS_PER_SESSION = 20
+
+
+def _session():
+    # roughly what one arrow click costs: sidebar stats + live page + db page
+    for _ in range(RERUNS_PER_SESSION):
+        for _ in range(3):
+            storage.load_db()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        storage.DB_PATH = Path(tmp) / "penalties.csv"
+        _synthetic_kicks(KICKS).to_csv(storage.DB_PATH, index=False, encoding="utf-8-sig")
+
+        t0 = time.perf_counter()
+        storage._read_csv(storage.DB_PATH)
+        parse_ms = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=SESSIONS) as ex:
+            for _ in range(SESSIONS):
+                ex.submit(_session)
+        total_ms = (time.perf_counter() - t0) * 1000
+
+    calls = SESSIONS * RERUNS_PER_SESSION * 3
+    print(f"uncached parse of {KICKS:,} kicks: {parse_ms:.1f} ms")
+    print(f"{calls:,} load_db calls from {SESSIONS} sessions: {total_ms:.1f} ms total")
+    print(f"cache: {storage.cache_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# benchmarks/bench_nav.py
+"""
+Rerun time of a click on the live view, with every view under st.tabs (as
+app.main had it, copied below) and with the radio navigation that only runs
+the selected view. AppTest, admin session, warm process caches, a
+10k-match archive from synthetic.synthetic_shootouts.
+
+    python benchmarks/bench_nav.py
+"""
+from __future__ import annotations
+
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import storage  # noqa: E402
+from synthetic import synthetic_shootouts  # noqa: E402
+
+MATCHES = 10_000
+CLICKS = 20
+
+
+def tabs_main():
+    # app.main before the radio navigation: all three tab bodies run on every rerun
+    import streamlit as st
+    from app import db_page, load_db, match_summaries
+    from auth import admin_login_ui
+    from config import DEFAULT_ALPHA, DEFAULT_K, DEFAULT_MATCH_WEIGHT, MODEL_MAX_K
+    from ui_live import live_page
+    from ui_record import record_page
+
+    st.session_state["is_admin"] = True
+    st.title("⚽ 点球大战 Penalty AI（在线版：管理员权限控制）")
+    st.sidebar.header("配置")
+    me_name = st.sidebar.text_input("我方名称", value="ME", key="sb_me")
+    opp_name = st.sidebar.text_input("对手名称", value="OPP", key="sb_opp")
+    order_mode = st.sidebar.radio(
+        "先后手",
+        ["ME_FIRST", "OPP_FIRST"],
+        format_func=lambda x: "我先发" if x == "ME_FIRST" else "我后发",
+        key="sb_order",
+    )
+    alpha = st.sidebar.slider("平滑 alpha", 0.0, 5.0, float(DEFAULT_ALPHA), 0.1, key="sb_alpha")
+    k = st.sidebar.slider("序列阶数 K", 0, MODEL_MAX_K, int(DEFAULT_K), 1, key="sb_k")
+    match_weight = st.sidebar.slider("本场权重", 0.0, 10.0, float(DEFAULT_MATCH_WEIGHT), 0.5, key="sb_mw")
+    admin_login_ui()
+    df = load_db()
+    st.sidebar.caption(f"数据库：{len(df)} 脚 / {len(match_summaries())} 场")
+
+    tab_live, tab_record, tab_db = st.tabs(["实时模式", "录入数据（按整场）", "数据库（按比赛）"])
+    with tab_live:
+        live_page(me_name=me_name, opp_name=opp_name, alpha=alpha, k=k, match_weight=match_weight, order_mode=order_mode)
+    with tab_record:
+        record_page(me_name=me_name, opp_name=opp_name)
+    with tab_db:
+        db_page(me_name=me_name, opp_name=opp_name)
+
+
+def radio_main():
+    import streamlit as st
+    import app
+    st.session_state["is_admin"] = True
+    app.main()
+
+
+def _click_ms(script) -> list[float]:
+    # a live-view click: pick a shot direction (alternating, so every click changes state)
+    at = AppTest.from_function(script, default_timeout=600)
+    at.run()
+    times = []
+    for i in range(CLICKS):
+        button = at.button(key="live_shot_L" if i % 2 == 0 else "live_shot_R")
+        t0 = time.perf_counter()
+        button.click().run()
+        times.append((time.perf_counter() - t0) * 1000)
+        assert not at.exception, at.exception
+    return times
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        df = synthetic_shootouts(MATCHES * 11)
+        df = df[df["match_id"].isin(df["match_id"].unique()[:MATCHES])]
+        path = Path(tmp) / "penalties.csv"
+        df.to_csv(path, index=False, encoding="utf-8-sig")
+        storage.DB_PATH = path
+        print(f"archive: {df['match_id'].nunique()} matches, {len(df)} kicks")
+
+        print(f"{'navigation':<12}{'median ms':>10}{'p95 ms':>9}")
+        for name, script in (("st.tabs", tabs_main), ("radio", radio_main)):
+            times = _click_ms(script)
+            p95 = statistics.quantiles(times, n=20)[-1]
+            print(f"{name:<12}{statistics.median(times):>10.1f}{p95:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
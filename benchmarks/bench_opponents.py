@@ -0,0 +1,128 @@
+# benchmarks/bench_opponents.py
+"""
+Per-opponent profiles in NgramStageModel. Checks, on a synthetic archive
+with 20 opponents (plus matches with no opponent recorded):
+
+  - update / remove keep the per-opponent tables equal to a full rebuild
+  - predict_opponent_dir equals the backoff written out by hand on a model
+    built from that opponent's rows alone, shrunk to the global prediction
+
+then times one opponent prediction through the index against the rescan it
+avoids (filter the archive to the opponent, build a model on it), and the
+cost of the extra tables in build().
+
+    python benchmarks/bench_opponents.py
+"""
+from __future__ import annotations
+
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_append import _synthetic_kicks  # noqa: E402
+from config import DIRS, MODEL_MAX_K, OPPONENT_PRIOR_WEIGHT  # noqa: E402
+from model import NgramStageModel, STAGES, WHOS  # noqa: E402
+
+SIZES = [100_000, 1_000_000]
+REPEATS = 200
+K, ALPHA = 2, 1.0
+
+
+def _archive(n: int, seed: int = 0):
+    df = _synthetic_kicks(n, seed=seed)
+    # a few matches without an opponent, and one with stray whitespace
+    df.loc[df["match_id"].str.endswith("7"), "opp_name"] = ""
+    df.loc[df["match_id"] == "m0000001", "opp_name"] = " team1 "
+    return df
+
+
+def _reference(df, opp, who, stage, recent, k, alpha, prior_weight):
+    # what predict_opponent_dir should return, from a model of opp's matches only
+    g = NgramStageModel(df)
+    g.build(max_k=MODEL_MAX_K)
+    p_global = g.predict_next_dir(who, stage, recent, k, alpha)
+    sub = df[df["opp_name"].str.strip() == opp]
+    if len(sub) == 0:
+        return p_global
+    m = NgramStageModel(sub)
+    m.build(max_k=MODEL_MAX_K)
+    counts = m.counts_dict()
+    for kk in range(min(k, MODEL_MAX_K), -1, -1):
+        ctx = tuple(recent[-kk:]) if kk > 0 else ()
+        c = counts.get((who, stage, kk, ctx))
+        if c:
+            total = sum(c.values()) + prior_weight
+            return {d: (c.get(d, 0) + prior_weight * p_global[d]) / total for d in DIRS}
+    return p_global
+
+
+def check():
+    df = _archive(20_000, seed=1)
+    full = NgramStageModel(df)
+    full.build(max_k=MODEL_MAX_K)
+
+    inc = NgramStageModel(df.iloc[:10_000])
+    inc.build(max_k=MODEL_MAX_K)
+    inc.update(df.iloc[10_000:])
+    gone = df[df["match_id"].isin(["m0000003", "m0001500", "m0001997"])]
+    inc.remove(gone)
+    ref = NgramStageModel(df.drop(gone.index))
+    ref.build(max_k=MODEL_MAX_K)
+    assert inc._opp_counts == ref._opp_counts
+    inc.update(gone)
+    assert inc._opp_counts == full._opp_counts
+    assert "" not in full.opponents() and "team1" in full.opponents()
+
+    rng = np.random.default_rng(2)
+    n = 0
+    for opp in ["team1", "team5", "nobody"]:
+        for who in WHOS:
+            for stage in STAGES:
+                for _ in range(4):
+                    recent = [DIRS[i] for i in rng.integers(0, 3, rng.integers(0, 4))]
+                    for k in (0, 2, MODEL_MAX_K):
+                        got = full.predict_opponent_dir(opp, who, stage, recent, k, ALPHA, OPPONENT_PRIOR_WEIGHT)
+                        want = _reference(df, opp, who, stage, recent, k, ALPHA, OPPONENT_PRIOR_WEIGHT)
+                        assert all(abs(got[d] - want[d]) < 1e-12 for d in DIRS), (opp, who, stage, recent, k, got, want)
+                        n += 1
+    print(f"equivalence: {n} predictions match the reference")
+
+
+def _ms(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    check()
+    print(f"{'kicks':>9}  {'build ms':>9}  {'w/o opp ms':>10}  {'indexed us':>10}  {'rescan ms':>9}")
+    for n in SIZES:
+        df = _archive(n)
+        m = NgramStageModel(df)
+        build = _ms(lambda: m.build(max_k=MODEL_MAX_K), 3)
+        plain = NgramStageModel(df.drop(columns=["opp_name"]))
+        build_plain = _ms(lambda: plain.build(max_k=MODEL_MAX_K), 3)
+
+        recent = ["L", "R", "C"]
+        indexed = _ms(lambda: m.predict_opponent_dir("team5", "OPP", "MID", recent, K, ALPHA, OPPONENT_PRIOR_WEIGHT), REPEATS)
+
+        def rescan():
+            sub = NgramStageModel(df[df["opp_name"] == "team5"])
+            sub.build(max_k=MODEL_MAX_K)
+            sub.predict_next_dir("OPP", "MID", recent, K, ALPHA)
+
+        print(f"{n:>9}  {build:>9.0f}  {build_plain:>10.0f}  {indexed * 1000:>10.1f}  {_ms(rescan, 5):>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# benchmarks/bench_parquet.py
+"""
+Load time and memory of the parquet backend (storage_parquet.load_db, compact
+dtypes) against the CSV path (storage._read_csv, dtype=str), plus a projected
+read of only the columns the n-gram model needs. The parquet frame is checked
+to equal the CSV frame once cast back to the CSV dtypes.
+
+    python benchmarks/bench_parquet.py
+"""
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import storage  # noqa: E402
+import storage_parquet  # noqa: E402
+from bench_append import _synthetic_kicks  # noqa: E402
+
+SIZES = [100_000, 1_000_000]
+REPEATS = 3
+MODEL_COLS = ["match_id", "kick_index", "who_kicked", "kicker_dir", "keeper_dir", "is_goal", "round_stage"]
+
+
+def _best(fn):
+    best, out = float("inf"), None
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000, out
+
+
+def _mb(df) -> float:
+    return df.memory_usage(deep=True).sum() / 2**20
+
+
+def main():
+    print(f"{'kicks':>9}  {'reader':<16}  {'load ms':>8}  {'memory MB':>9}  {'file MB':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in SIZES:
+            csv_path = Path(tmp) / f"penalties_{n}.csv"
+            pq_path = Path(tmp) / f"penalties_{n}.parquet"
+            _synthetic_kicks(n).to_csv(csv_path, index=False, encoding="utf-8-sig")
+            storage_parquet.convert(csv_path, pq_path)
+            pq_bytes = sum(p.stat().st_size for p in pq_path.iterdir())
+
+            t_csv, csv = _best(lambda: storage._read_csv(csv_path))
+            t_pq, pq = _best(lambda: storage_parquet.load_db(path=pq_path))
+            t_proj, proj = _best(lambda: storage_parquet.load_db(MODEL_COLS, path=pq_path))
+
+            assert pq.astype(csv.dtypes.to_dict()).equals(csv)
+            assert proj.astype(csv[MODEL_COLS].dtypes.to_dict()).equals(csv[MODEL_COLS])
+
+            print(f"{n:>9}  {'csv':<16}  {t_csv:>8.1f}  {_mb(csv):>9.1f}  {csv_path.stat().st_size / 2**20:>7.1f}")
+            print(f"{n:>9}  {'parquet':<16}  {t_pq:>8.1f}  {_mb(pq):>9.1f}  {pq_bytes / 2**20:>7.1f}")
+            print(f"{n:>9}  {'parquet (model)':<16}  {t_proj:>8.1f}  {_mb(proj):>9.1f}  {'':>7}")
+
+
+if __name__ == "__main__":
+    main()
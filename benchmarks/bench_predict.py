@@ -0,0 +1,102 @@
+# benchmarks/bench_predict.py
+"""
+Memory and predict_next_dir latency: dense uint32 count tensor vs. the old
+defaultdict(Counter) table (rebuilt here from counts_dict() as the reference).
+"tensor" is what predict_next_dir reads: counts, totals and the smoothed rows
+it caches for one alpha; "+pairs" adds the (shot, dive) tensors game.py uses,
+which the dict never held.
+
+    python benchmarks/bench_predict.py
+"""
+from __future__ import annotations
+
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import DIRS  # noqa: E402
+from model import NgramStageModel, _ctx_tuple  # noqa: E402
+from bench_append import _synthetic_kicks  # noqa: E402
+
+KICKS = 200_000
+MAX_K = 4
+QUERIES = 20_000
+
+
+def _smooth_counter(counts, alpha):
+    total = 0.0
+    out = {}
+    for d in DIRS:
+        c = float(counts.get(d, 0))
+        out[d] = c + alpha
+        total += out[d]
+    return {d: out[d] / total for d in DIRS}
+
+
+def predict_dict(counts, who, stage, recent, k, alpha):
+    """The pre-tensor predict_next_dir lookup."""
+    for kk in range(k, -1, -1):
+        key = (who, stage, kk, _ctx_tuple(recent, kk))
+        if key in counts and sum(counts[key].values()) > 0:
+            return _smooth_counter(counts[key], alpha)
+    return {d: 1 / len(DIRS) for d in DIRS}
+
+
+def _queries(n, seed=0):
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(n):
+        recent = [DIRS[i] for i in rng.integers(0, 3, rng.integers(0, 6))]
+        out.append(("ME" if rng.random() < 0.5 else "OPP", ["EARLY", "MID", "LATE"][rng.integers(0, 3)], recent))
+    return out
+
+
+def main():
+    model = NgramStageModel(_synthetic_kicks(KICKS))
+    model.build(max_k=MAX_K)
+
+    tracemalloc.start()
+    table = defaultdict(Counter)
+    for key, c in model.counts_dict().items():
+        table[key] = Counter(c)
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    tracemalloc.start()
+    model._smoothed_rows(1.0)
+    rows_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    tensor_bytes = model._counts.nbytes + model._totals.nbytes + rows_bytes
+    pair_bytes = model._pair_counts.nbytes + model._pair_goals.nbytes
+
+    queries = _queries(QUERIES)
+    for who, stage, recent in queries[:2000]:
+        assert model.predict_next_dir(who, stage, recent, MAX_K, 1.0) == predict_dict(table, who, stage, recent, MAX_K, 1.0)
+
+    def per_call_us(fn):
+        runs = []
+        for _ in range(5):
+            t0 = time.perf_counter()
+            for who, stage, recent in queries:
+                fn(who, stage, recent)
+            runs.append((time.perf_counter() - t0) / len(queries) * 1e6)
+        return statistics.median(runs)
+
+    dict_us = per_call_us(lambda w, s, r: predict_dict(table, w, s, r, MAX_K, 1.0))
+    tensor_us = per_call_us(lambda w, s, r: model.predict_next_dir(w, s, r, MAX_K, 1.0))
+
+    print(f"{KICKS:,} kicks, max_k={MAX_K}, {len(table):,} non-empty contexts")
+    print(f"{'':>8}  {'memory KiB':>10}  {'predict us':>10}")
+    print(f"{'dict':>8}  {dict_bytes / 1024:>10.1f}  {dict_us:>10.2f}")
+    print(f"{'tensor':>8}  {tensor_bytes / 1024:>10.1f}  {tensor_us:>10.2f}")
+    print(f"{'+pairs':>8}  {(tensor_bytes + pair_bytes) / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
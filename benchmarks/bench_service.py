@@ -0,0 +1,123 @@
+# benchmarks/bench_service.py
+"""
+Load test of service.py: p50 / p99 latency of /predict at a given number of
+concurrent clients against a local instance, plus a smaller /append round.
+The service runs in its own process on a synthetic database.
+
+    python benchmarks/bench_service.py --concurrency 500 --requests 5000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bench_append import _synthetic_kicks  # noqa: E402
+
+SERVER = """
+import sys, pathlib
+sys.path.insert(0, {root!r})
+import storage
+storage.DB_PATH = pathlib.Path({db!r})
+import service
+server = service.make_server("127.0.0.1", {port})
+print("ready", flush=True)
+server.serve_forever()
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _payload(rng: random.Random) -> dict:
+    n = rng.randint(0, 9)
+    order_mode = rng.choice(["ME_FIRST", "OPP_FIRST"])
+    seq = []
+    for i in range(1, n + 1):
+        shot, dive = rng.choice("LCR"), rng.choice("LCR")
+        who = ("ME" if i % 2 else "OPP") if order_mode == "ME_FIRST" else ("OPP" if i % 2 else "ME")
+        seq.append({"kick_index": i, "who_kicked": who, "kicker_dir": shot, "keeper_dir": dive, "is_goal": int(shot != dive)})
+    return {"seq": seq, "order_mode": order_mode, "k": 2, "alpha": 1.0, "match_weight": 2.0}
+
+
+def _timed_post(url: str, body: dict) -> float:
+    req = urllib.request.Request(url, data=json.dumps(body).encode(), headers={"Content-Type": "application/json"}, method="POST")
+    t0 = time.perf_counter()
+    with urllib.request.urlopen(req, timeout=60) as resp:
+        resp.read()
+    return (time.perf_counter() - t0) * 1000
+
+
+def _report(name: str, latencies: list, wall: float):
+    lat = np.array(latencies)
+    print(
+        f"{name:>8}: {len(lat)} requests  p50 {np.percentile(lat, 50):.1f} ms  "
+        f"p99 {np.percentile(lat, 99):.1f} ms  max {lat.max():.1f} ms  {len(lat) / wall:.0f} req/s"
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Load test the prediction service.")
+    ap.add_argument("--concurrency", type=int, default=500)
+    ap.add_argument("--requests", type=int, default=5000)
+    ap.add_argument("--appends", type=int, default=200)
+    ap.add_argument("--kicks", type=int, default=100_000, help="size of the synthetic database")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp) / "penalties.csv"
+        _synthetic_kicks(args.kicks).to_csv(db, index=False, encoding="utf-8-sig")
+        port = _free_port()
+        proc = subprocess.Popen(
+            [sys.executable, "-c", SERVER.format(root=str(ROOT), db=str(db), port=port)],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        try:
+            assert proc.stdout.readline().strip() == "ready"
+            base = f"http://127.0.0.1:{port}"
+            rng = random.Random(0)
+
+            bodies = [_payload(rng) for _ in range(args.requests)]
+            with ThreadPoolExecutor(max_workers=args.concurrency) as ex:
+                t0 = time.perf_counter()
+                latencies = list(ex.map(lambda b: _timed_post(base + "/predict", b), bodies))
+                _report("predict", latencies, time.perf_counter() - t0)
+
+            matches = [
+                {"rows": [dict(r, match_id=f"load{i}") for r in _synthetic_kicks(10, seed=i).drop(columns="match_id").to_dict("records")]}
+                for i in range(args.appends)
+            ]
+            with ThreadPoolExecutor(max_workers=min(args.concurrency, args.appends)) as ex:
+                t0 = time.perf_counter()
+                latencies = list(ex.map(lambda b: _timed_post(base + "/append", b), matches))
+                _report("append", latencies, time.perf_counter() - t0)
+
+            with urllib.request.urlopen(base + "/health") as resp:
+                kicks = json.loads(resp.read())["kicks"]
+            expected = len(_synthetic_kicks(args.kicks)) + sum(len(m["rows"]) for m in matches)
+            assert kicks == expected, (kicks, expected)
+            print(f"database: {kicks} kicks after the append round (none lost)")
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+# benchmarks/bench_suite.py
+"""
+One run over the per-click hot paths, at several archive sizes, written as
+JSON so two runs can be diffed:
+
+  load_db           cold read of the whole archive (process cache dropped)
+  append_rows       save one match, with the shared model and summary warm
+  delete_match      delete one of those matches again (admin)
+  build             NgramStageModel.build(max_k=MODEL_MAX_K)
+  predict_next_dir  one call, random shooter / stage / history
+  blend_probs       one call
+  live_page         warm AppTest rerun of ui_live.live_page
+  db_page           warm AppTest rerun of app.db_page
+
+The archives come from synthetic.synthetic_shootouts (matches that end
+where the shootout rules say), stored through the chosen backend in a
+temporary directory.
+
+    python benchmarks/bench_suite.py --out base.json
+    python benchmarks/bench_suite.py --sizes 1000 100000 --backend parquet --out new.json
+    python benchmarks/bench_suite.py --compare base.json new.json --threshold 0.2
+
+--compare prints old / new medians side by side and exits with status 1 if
+any timing got slower by more than the threshold (a fraction: 0.2 = 20%)
+and also past the base run's own p95, so one noisy repeat is not flagged.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import streamlit as st  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import storage  # noqa: E402
+from config import DEFAULT_ALPHA, DEFAULT_K, DEFAULT_MATCH_WEIGHT, DIRS, MODEL_MAX_K  # noqa: E402
+from model import STAGES, WHOS, NgramStageModel, blend_probs  # noqa: E402
+from synthetic import synthetic_shootouts  # noqa: E402
+
+SIZES = [1_000, 100_000, 1_000_000]
+BACKENDS = ["csv", "sqlite", "parquet", "kicklog"]
+THRESHOLD = 0.2
+
+# repeats per timing; the slow ones get fewer at 1M kicks
+REPEATS = {"load_db": 5, "append_rows": 10, "delete_match": 10, "build": 3, "page": 5}
+CALLS = 2_000
+
+
+def live_page_script():
+    from config import DEFAULT_ALPHA, DEFAULT_K, DEFAULT_MATCH_WEIGHT
+    from ui_live import live_page
+    live_page("ME", "team05", DEFAULT_ALPHA, DEFAULT_K, DEFAULT_MATCH_WEIGHT, "ME_FIRST")
+
+
+def db_page_script():
+    import streamlit as st
+    from app import db_page
+    st.session_state["is_admin"] = True
+    db_page("ME", "OPP")
+
+
+def _stats(times_ms: list[float]) -> dict:
+    a = np.asarray(times_ms)
+    return {
+        "median_ms": float(np.median(a)),
+        "p95_ms": float(np.percentile(a, 95)),
+        "n": len(a),
+    }
+
+
+def _timed(fn, repeats: int) -> dict:
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return _stats(times)
+
+
+def _per_call(fn, args: list, rounds: int = 5) -> dict:
+    # calls too quick to time one by one: time CALLS of them, report per call
+    times = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        for a in args:
+            fn(*a)
+        times.append((time.perf_counter() - t0) * 1000 / len(args))
+    return _stats(times)
+
+
+def _use_backend(backend: str, tmp: Path, df: pd.DataFrame):
+    # point storage at fresh files under tmp and fill them with df
+    csv = tmp / "penalties.csv"
+    df.to_csv(csv, index=False, encoding="utf-8-sig")
+    storage.DB_PATH = csv
+    storage.STORAGE_BACKEND = backend
+    if backend == "sqlite":
+        import storage_sqlite
+        storage_sqlite.SQLITE_PATH = tmp / "penalties.sqlite3"
+        storage_sqlite.migrate(csv, tmp / "no_legacy.sqlite3")
+    elif backend == "parquet":
+        import storage_parquet
+        storage.PARQUET_PATH = storage_parquet.PARQUET_PATH = tmp / "penalties.parquet"
+        storage_parquet.convert(csv)
+    elif backend == "kicklog":
+        import storage_kicklog
+        storage.KICKLOG_PATH = storage_kicklog.KICKLOG_PATH = tmp / "penalties.kicks"
+        storage_kicklog.convert(csv)
+    storage._invalidate_cache()
+    storage._model.update(key=None, model=None)
+    storage._summary.update(key=None, table=None)
+
+
+def run_size(n: int, backend: str) -> dict:
+    big = n >= 1_000_000
+    reps = {k: (min(v, 3) if big else v) for k, v in REPEATS.items()}
+    df = synthetic_shootouts(n)
+    out = {"kicks": len(df), "matches": int(df["match_id"].nunique())}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _use_backend(backend, Path(tmp), df)
+
+        def cold_load():
+            storage._invalidate_cache()
+            storage.load_db()
+
+        out["load_db"] = _timed(cold_load, reps["load_db"])
+
+        # saves and deletes as the app does them: model and summary already warm
+        storage.get_model()
+        storage.match_summaries()
+        extra = synthetic_shootouts(20 * reps["append_rows"], seed=1)
+        groups = [g.assign(match_id="bench" + g["match_id"]) for _, g in extra.groupby("match_id", sort=False)]
+        groups = groups[:reps["append_rows"]]
+        it = iter(groups)
+        out["append_rows"] = _timed(lambda: storage.append_rows(next(it)), len(groups))
+        st.session_state["is_admin"] = True
+        it = iter(groups)
+        out["delete_match"] = _timed(lambda: storage.delete_match(next(it)["match_id"].iloc[0]), len(groups))
+
+        m = NgramStageModel(df)
+        out["build"] = _timed(lambda: m.build(max_k=MODEL_MAX_K), reps["build"])
+
+        rng = np.random.default_rng(0)
+        calls = [
+            (WHOS[rng.integers(2)], STAGES[rng.integers(3)], [DIRS[i] for i in rng.integers(0, 3, rng.integers(0, 6))],
+             DEFAULT_K, DEFAULT_ALPHA)
+            for _ in range(CALLS)
+        ]
+        out["predict_next_dir"] = _per_call(m.predict_next_dir, calls)
+        probs = [m.predict_next_dir(*c) for c in calls[:50]]
+        pairs = [(probs[i % 50], probs[(i + 1) % 50], DEFAULT_MATCH_WEIGHT) for i in range(CALLS)]
+        out["blend_probs"] = _per_call(blend_probs, pairs)
+
+        for name, script in (("live_page", live_page_script), ("db_page", db_page_script)):
+            at = AppTest.from_function(script, default_timeout=600)
+            at.run()
+            if at.exception:
+                raise RuntimeError(f"{name}: {at.exception}")
+            out[name] = _timed(at.run, reps["page"])
+    return out
+
+
+def run(sizes: list[int], backend: str) -> dict:
+    results = {}
+    for n in sizes:
+        t0 = time.perf_counter()
+        results[str(n)] = run_size(n, backend)
+        print(f"{n:>9} kicks: done in {time.perf_counter() - t0:.0f} s", file=sys.stderr)
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "backend": backend,
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "streamlit": st.__version__,
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+
+
+def compare(base: dict, new: dict, threshold: float) -> list[tuple]:
+    """
+    (size, timing, old median ms, new median ms, ratio, regressed) for every
+    timing present in both runs.
+    """
+    rows = []
+    for size, old_t in base["results"].items():
+        new_t = new["results"].get(size, {})
+        for name, old in old_t.items():
+            if not isinstance(old, dict) or not isinstance(new_t.get(name), dict):
+                continue
+            a, b = old["median_ms"], new_t[name]["median_ms"]
+            ratio = b / a if a > 0 else float("inf")
+            rows.append((size, name, a, b, ratio, ratio > 1 + threshold and b > old["p95_ms"]))
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Time load/save/delete, model build, prediction and page reruns.")
+    ap.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="archive sizes in kicks")
+    ap.add_argument("--backend", choices=BACKENDS, default="csv")
+    ap.add_argument("--out", type=Path, help="write the results here (default: stdout)")
+    ap.add_argument("--compare", type=Path, nargs=2, metavar=("BASE", "NEW"), help="compare two result files instead")
+    ap.add_argument("--threshold", type=float, default=THRESHOLD, help="slowdown that counts as a regression (0.2 = 20%%)")
+    args = ap.parse_args()
+
+    if args.compare:
+        base, new = (json.loads(p.read_text(encoding="utf-8")) for p in args.compare)
+        rows = compare(base, new, args.threshold)
+        print(f"{'kicks':>9}  {'timing':<17}{'base ms':>11}{'new ms':>11}{'ratio':>8}")
+        for size, name, a, b, ratio, bad in rows:
+            print(f"{size:>9}  {name:<17}{a:>11.3f}{b:>11.3f}{ratio:>7.2f}x{'  REGRESSION' if bad else ''}")
+        bad = sum(r[-1] for r in rows)
+        print(f"{bad} regression(s) over {args.threshold:.0%}" if bad else f"no regressions over {args.threshold:.0%}")
+        sys.exit(1 if bad else 0)
+
+    report = json.dumps(run(args.sizes, args.backend), indent=2)
+    if args.out:
+        args.out.write_text(report + "\n", encoding="utf-8")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# benchmarks/bench_summary.py
+"""
+summary.summarize (one vectorized pass) against the per-match loop it
+replaced ([match_summary(g) for g in df.groupby("match_id")]): time at
+10k / 100k matches. tests/test_summary.py checks the two agree, odd rows
+included.
+
+    python benchmarks/bench_summary.py
+"""
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import storage  # noqa: E402
+from summary import SUMMARY_COLS, match_summary, summarize  # noqa: E402
+from bench_append import _synthetic_kicks  # noqa: E402
+
+MATCHES = [10_000, 100_000]
+
+
+def per_match(df: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame([match_summary(g) for _, g in df.groupby("match_id")], columns=SUMMARY_COLS)
+
+
+def _odd_rows(n: int) -> pd.DataFrame:
+    # extended matches (repeated kick_index), missing ids / order_mode, unknown kicker
+    df = _synthetic_kicks(n, seed=3)
+    rng = np.random.default_rng(3)
+    df.loc[rng.random(n) < 0.02, "match_id"] = ""
+    df.loc[rng.random(n) < 0.02, "order_mode"] = ""
+    df.loc[rng.random(n) < 0.02, "who_kicked"] = "??"
+    extra = _synthetic_kicks(n // 10, seed=4).assign(order_mode="OPP_FIRST")
+    return pd.concat([df, extra], ignore_index=True).sample(frac=1.0, random_state=0)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'matches':>8}  {'loop ms':>8}  {'vector ms':>9}  {'speedup':>7}")
+        for n in MATCHES:
+            storage.DB_PATH = Path(tmp) / f"penalties_{n}.csv"
+            _synthetic_kicks(n * 10).to_csv(storage.DB_PATH, index=False, encoding="utf-8-sig")
+            df = storage.load_db()
+
+            t0 = time.perf_counter()
+            per_match(df)
+            loop_ms = (time.perf_counter() - t0) * 1000
+            t0 = time.perf_counter()
+            summarize(df)
+            vec_ms = (time.perf_counter() - t0) * 1000
+            print(f"{n:>8,}  {loop_ms:>8.0f}  {vec_ms:>9.1f}  {loop_ms / vec_ms:>6.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# benchmarks/bench_timing.py
+"""
+Cost of the timing layer (timing.py) on the hottest timed call,
+NgramStageModel.predict_next_dir, with config.TIMING off and on. The flag
+is read when the decorators run, so each setting gets its own interpreter.
+Off must leave the method undecorated.
+
+    python benchmarks/bench_timing.py
+"""
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CHILD = r"""
+import json, sys, time
+sys.path.insert(0, {root!r}); sys.path.insert(0, {bench!r})
+import config
+config.TIMING = {on}
+from model import NgramStageModel
+from synthetic import synthetic_shootouts
+
+m = NgramStageModel(synthetic_shootouts(100_000))
+m.build(max_k=4)
+assert hasattr(NgramStageModel.predict_next_dir, "__wrapped__") == {on}
+calls = [("ME", "MID", ["L", "R"], 2, 1.0), ("OPP", "LATE", ["C"], 4, 0.5)] * 10_000
+best = float("inf")
+for _ in range(5):
+    t0 = time.perf_counter()
+    for c in calls:
+        m.predict_next_dir(*c)
+    best = min(best, (time.perf_counter() - t0) / len(calls) * 1e6)
+print(json.dumps({{"us": best}}))
+"""
+
+
+def _per_call_us(on: bool) -> float:
+    code = CHILD.format(root=str(ROOT), bench=str(ROOT / "benchmarks"), on=on)
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])["us"]
+
+
+def main():
+    off, on = _per_call_us(False), _per_call_us(True)
+    print(f"predict_next_dir  TIMING off {off:.2f} us  on {on:.2f} us  (+{on - off:.2f} us per timed call)")
+
+
+if __name__ == "__main__":
+    main()
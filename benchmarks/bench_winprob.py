@@ -0,0 +1,139 @@
+# benchmarks/bench_winprob.py
+"""
+winprob.simulate_win_prob: time for 100k rollouts from a few live states.
+
+winprob.exact_win_prob: table build time and lookup time for each keeper
+combination. reference and brute_force are the per-rollout and enumerated
+references tests/test_winprob.py checks both against.
+
+    python benchmarks/bench_winprob.py
+"""
+from __future__ import annotations
+
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from model import NgramStageModel  # noqa: E402
+from service import _recent_dirs  # noqa: E402
+from live_state import LiveMatchState  # noqa: E402
+from kicks import kicker_for_kick_index, round_stage_from_kick_index  # noqa: E402
+from winprob import MAX_KICKS, exact_win_prob, simulate_win_prob, win_table  # noqa: E402
+from bench_append import _synthetic_kicks  # noqa: E402
+
+DIRS = ["L", "C", "R"]
+K, ALPHA = 2, 1.0
+ROLLOUTS = 100_000
+
+
+def _kick(seq, order_mode, shot, dive):
+    i = len(seq) + 1
+    return seq + [{
+        "kick_index": i,
+        "who_kicked": kicker_for_kick_index(order_mode, i),
+        "kicker_dir": shot,
+        "keeper_dir": dive,
+        "is_goal": int(shot != dive),
+    }]
+
+
+def _states():
+    # (shot, dive) pairs in kick order, ME_FIRST
+    s = []
+    yield "start", s
+    for shot, dive in [("L", "R"), ("C", "C"), ("R", "L"), ("L", "C"), ("R", "R"), ("C", "L")]:
+        s = _kick(s, "ME_FIRST", shot, dive)
+    yield "3 rounds", s
+    for shot, dive in [("L", "L"), ("R", "C"), ("C", "R"), ("L", "R"), ("R", "L"), ("C", "C")]:
+        s = _kick(s, "ME_FIRST", shot, dive)
+    yield "sudden death", s
+
+
+def _shootout_result(seq):
+    return LiveMatchState.from_kicks(seq, max_k=0).result()
+
+
+def reference(model, seq, order_mode, n, seed=0):
+    # one rollout at a time, same rules and default strategies (both keepers "model")
+    rng = random.Random(seed)
+    wins = 0.0
+    for _ in range(n):
+        s = list(seq)
+        while True:
+            over, winner = _shootout_result(s)
+            if over:
+                wins += winner == "ME"
+                break
+            i = len(s) + 1
+            if i > MAX_KICKS:
+                wins += 0.5
+                break
+            who = kicker_for_kick_index(order_mode, i)
+            p = model.predict_next_dir(who, round_stage_from_kick_index(i), _recent_dirs(s, who), K, ALPHA)
+            shot = rng.choices(DIRS, weights=[p[d] for d in DIRS])[0]
+            dive = max(p, key=lambda d: p[d])
+            s = _kick(s, order_mode, shot, dive)
+    return wins / n
+
+
+def _dive_probs(strategy, p):
+    if strategy == "uniform":
+        return {d: 1 / 3 for d in DIRS}
+    if strategy == "model":
+        top = max(p, key=lambda d: p[d])
+        return {d: float(d == top) for d in DIRS}
+    return p
+
+
+def brute_force(model, seq, order_mode, depth, me_keeper="model", opp_keeper="model"):
+    # every (shot, goal) branch for `depth` kicks; undecided leaves take the exact table value
+    over, winner = _shootout_result(seq)
+    if over:
+        return float(winner == "ME")
+    if depth == 0:
+        return exact_win_prob(model, seq, order_mode, K, ALPHA, me_keeper, opp_keeper)
+    i = len(seq) + 1
+    who = kicker_for_kick_index(order_mode, i)
+    p = model.predict_next_dir(who, round_stage_from_kick_index(i), _recent_dirs(seq, who), K, ALPHA)
+    q = _dive_probs(me_keeper if who == "OPP" else opp_keeper, p)
+    total = 0.0
+    for shot in DIRS:
+        for dive, weight in (("L" if shot != "L" else "C", 1 - q[shot]), (shot, q[shot])):
+            if weight > 0:
+                total += p[shot] * weight * brute_force(model, _kick(seq, order_mode, shot, dive), order_mode, depth - 1, me_keeper, opp_keeper)
+    return total
+
+
+def main():
+    model = NgramStageModel(_synthetic_kicks(100_000))
+    model.build(max_k=4)
+
+    for keepers in [("model", "model"), ("model", "uniform"), ("mirror", "model"), ("uniform", "mirror")]:
+        t0 = time.perf_counter()
+        win_table(model, "ME_FIRST", K, ALPHA, *keepers)
+        build_ms = (time.perf_counter() - t0) * 1000
+        seq = list(_states())[-1][1]
+        t0 = time.perf_counter()
+        for _ in range(1000):
+            exact_win_prob(model, seq, "ME_FIRST", K, ALPHA, *keepers)
+        lookup_us = (time.perf_counter() - t0) * 1000
+        print(f"exact {'/'.join(keepers):>15}: table {build_ms:.1f} ms, lookup {lookup_us:.1f} us")
+    print()
+
+    print(f"{'state':>13}  {'ms/100k':>8}  {'P(ME)':>6}  {'exact':>6}")
+    for name, seq in _states():
+        times = []
+        for r in range(5):
+            t0 = time.perf_counter()
+            p = simulate_win_prob(model, seq, "ME_FIRST", K, ALPHA, n=ROLLOUTS, seed=r)
+            times.append((time.perf_counter() - t0) * 1000)
+        exact = exact_win_prob(model, seq, "ME_FIRST", K, ALPHA)
+        print(f"{name:>13}  {statistics.median(times):>8.1f}  {p:>6.3f}  {exact:>6.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# benchmarks/synthetic.py
+"""
+Synthetic shootout archives that follow the real rules: every match is
+played kick by kick in order_mode order and stops exactly where
+live_state.shootout_result says it is over (early finish in the first five
+rounds, sudden death after), so match lengths, phases and round stages look
+like saved data. Kickers lean towards a per-match favourite direction,
+keepers dive uniformly, and is_goal is shot != dive as on the live page.
+
+    from synthetic import synthetic_shootouts
+    df = synthetic_shootouts(100_000)   # REQUIRED_COLS, whole matches, >= 100k kicks
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import DIRS  # noqa: E402
+from live_state import shootout_result  # noqa: E402
+from storage import REQUIRED_COLS  # noqa: E402
+from kicks import round_stage_from_kick_index, stage_from_kick_index  # noqa: E402
+
+# longer than any sudden death a batch will need; unfinished matches are dropped
+MAX_KICKS = 60
+OPPONENTS = 20
+BATCH_MATCHES = 20_000
+
+
+def _over(me_first: np.ndarray, shot: np.ndarray, dive: np.ndarray) -> np.ndarray:
+    """
+    over[m, t]: shootout_result after the first t + 1 kicks of match m,
+    for every prefix at once.
+    """
+    n, length = shot.shape
+    kick_index = np.arange(1, length + 1)
+    me_kicks_odd = (kick_index % 2 == 1)[None, :]
+    is_me = np.where(me_first[:, None], me_kicks_odd, ~me_kicks_odd)
+    goal = shot != dive
+
+    kicks_me = np.cumsum(is_me, axis=1)
+    kicks_opp = kick_index[None, :] - kicks_me
+    score_me = np.cumsum(goal & is_me, axis=1)
+    score_opp = np.cumsum(goal & ~is_me, axis=1)
+
+    first5 = (kicks_me <= 5) & (kicks_opp <= 5)
+    early = first5 & (
+        (score_me > score_opp + (5 - kicks_opp))
+        | (score_opp > score_me + (5 - kicks_me))
+        | ((kicks_me == 5) & (kicks_opp == 5) & (score_me != score_opp))
+    )
+    sudden = (kicks_me == kicks_opp) & (kicks_me > 5) & (score_me != score_opp)
+    return early | sudden
+
+
+def _play(n: int, rng: np.random.Generator):
+    # (me_first, shot, dive, length) for n finished matches
+    me_first = rng.random(n) < 0.5
+    # each side of a match has a favourite direction it takes half the time
+    fav = rng.integers(0, 3, (n, 2))
+    lean = rng.random((n, MAX_KICKS)) < 0.5
+    side = (np.arange(MAX_KICKS)[None, :] + ~me_first[:, None]) % 2
+    shot = np.where(lean, np.take_along_axis(fav, side, axis=1), rng.integers(0, 3, (n, MAX_KICKS)))
+    dive = rng.integers(0, 3, (n, MAX_KICKS))
+
+    over = _over(me_first, shot, dive)
+    done = over.any(axis=1)
+    length = over.argmax(axis=1) + 1
+    return me_first[done], shot[done], dive[done], length[done]
+
+
+def synthetic_shootouts(n_kicks: int, seed: int = 0, opponents: int = OPPONENTS) -> pd.DataFrame:
+    """
+    The fewest whole matches with at least n_kicks kicks between them, in
+    REQUIRED_COLS order. match_ids are "s0000000", "s0000001", ...; opp_name
+    cycles through `opponents` teams.
+    """
+    rng = np.random.default_rng(seed)
+    parts, total = [], 0
+    while total < n_kicks:
+        # about 11 kicks per match; a little extra so one batch is usually enough
+        part = _play(min(BATCH_MATCHES, max(16, (n_kicks - total) // 9)), rng)
+        parts.append(part)
+        total += int(part[3].sum())
+    me_first, shot, dive, length = (np.concatenate(a) for a in zip(*parts))
+    n = int(np.searchsorted(np.cumsum(length), n_kicks)) + 1
+    me_first, shot, dive, length = me_first[:n], shot[:n], dive[:n], length[:n]
+
+    match = np.repeat(np.arange(n), length)
+    kick_index = np.arange(len(match)) - np.repeat(np.cumsum(length) - length, length) + 1
+    shot = shot[match, kick_index - 1]
+    dive = dive[match, kick_index - 1]
+    me_kicks = (kick_index % 2 == 1) == me_first[match]
+
+    dirs = np.array(DIRS, dtype=object)
+    by_index = np.arange(MAX_KICKS + 1)
+    phase = np.array([stage_from_kick_index(int(i)) for i in by_index], dtype=object)
+    rstage = np.array([round_stage_from_kick_index(int(i)) for i in by_index], dtype=object)
+    teams = np.array([f"team{i:02d}" for i in range(opponents)], dtype=object)
+    df = pd.DataFrame(
+        {
+            "match_id": np.char.add("s", np.char.zfill(match.astype(str), 7)),
+            "kick_index": kick_index,
+            "who_kicked": np.where(me_kicks, "ME", "OPP"),
+            "kicker_dir": dirs[shot],
+            "keeper_dir": dirs[dive],
+            "is_goal": (shot != dive).astype(int),
+            "order_mode": np.where(me_first[match], "ME_FIRST", "OPP_FIRST"),
+            "phase": phase[kick_index],
+            "round_stage": rstage[kick_index],
+            "me_name": "ME",
+            "opp_name": teams[match % opponents],
+        }
+    )
+    return df[REQUIRED_COLS]
+
+
+def check_rules(df: pd.DataFrame, matches: int = 2000):
+    """
+    Replay the first `matches` matches through shootout_result: each must end
+    on its last kick and not before.
+    """
+    for mid, g in df.groupby("match_id", sort=False):
+        if matches <= 0:
+            break
+        matches -= 1
+        score = {"ME": 0, "OPP": 0}
+        kicks = {"ME": 0, "OPP": 0}
+        for i, row in enumerate(g.itertuples(index=False), start=1):
+            kicks[row.who_kicked] += 1
+            score[row.who_kicked] += row.is_goal
+            over, _ = shootout_result(score["ME"], score["OPP"], kicks["ME"], kicks["OPP"])
+            assert over == (i == len(g)), (mid, i, len(g))
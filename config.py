@@ -8,3 +8,44 @@ DATA_DIR = Path(__file__).parent / "data"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 DB_PATH = DATA_DIR / "penalties.csv"
+
+# 模型只按最大 K 建一次；侧栏 K（0..MODEL_MAX_K）与 alpha 只在预测时生效
+MODEL_MAX_K = 4
+
+# 侧栏默认参数（可由 python sweep.py --write-config 写回）
+DEFAULT_ALPHA = 1.0
+DEFAULT_K = 2
+DEFAULT_MATCH_WEIGHT = 2.0
+
+# 侧栏里双方名称的默认值只是占位：存盘时存为空名，也不当作对手档案
+DEFAULT_ME_NAME = "ME"
+DEFAULT_OPP_NAME = "OPP"
+
+# 对手档案：按对手的计数以全局预测为先验，先验相当于这么多脚（越大越贴近全局）
+OPPONENT_PRIOR_WEIGHT = 5.0
+
+# storage backend: "csv" (DB_PATH), "sqlite" (SQLITE_PATH), "parquet" (PARQUET_PATH, needs pyarrow)
+# or "kicklog" (KICKLOG_PATH: memory-mapped fixed-width records + KICKLOG_PATH.ids)
+STORAGE_BACKEND = "csv"
+SQLITE_PATH = DATA_DIR / "penalties.sqlite3"
+PARQUET_PATH = DATA_DIR / "penalties.parquet"
+KICKLOG_PATH = DATA_DIR / "penalties.kicks"
+
+# 全库 CSV 导出每次读写的行数（导出时的额外内存与它成正比，与库大小无关）
+EXPORT_CHUNK_ROWS = 50_000
+
+# old shootouts/kicks database, only read by the sqlite migrator
+LEGACY_SQLITE_PATH = Path(__file__).parent / "penalty_ai.sqlite3"
+
+# 实时胜率：exact = winprob.exact_win_prob（整表动态规划），mc = simulate_win_prob（蒙特卡洛）
+# 模拟次数只对 mc 生效；双方门将策略 uniform / model / mirror（默认同为 model：两边门将用同一模型，胜率才不偏向一方）
+WINPROB_METHOD = "exact"
+WINPROB_ROLLOUTS = 100_000
+WINPROB_ME_KEEPER = "model"
+WINPROB_OPP_KEEPER = "model"
+
+# 重跑耗时统计（timing.py）：打开后管理员侧栏显示各段 p50/p95，并可导出 JSON lines；关闭时不计时
+TIMING = False
+
+# 预测服务（python service.py）的地址，例如 "http://127.0.0.1:8765"；留空则在页面进程内计算
+PREDICT_SERVICE_URL = ""
@@ -0,0 +1,166 @@
+# game.py
+"""
+Keeper/kicker mixed strategies per kick.
+
+For every (who, stage, context) the history gives a 3x3 scoring matrix
+S[shot, dive] = P(goal | shot, dive): stored goals per (kicker_dir,
+keeper_dir) pair, smoothed with alpha pseudo-kicks towards "goal unless the
+keeper guessed the side", with the same k -> 0 backoff as predict_next_dir.
+The kicker maximizes and the keeper minimizes S, so each context is a small
+zero-sum game.
+
+All contexts are solved together, exactly, by batched support enumeration
+(solve_games) and the result is cached on the model (NgramStageModel.derived)
+until its counts change; a live lookup is one array index.
+"""
+from __future__ import annotations
+
+import itertools
+from typing import Dict
+
+import numpy as np
+
+from config import DIRS
+from model import STAGES, WHOS, NgramStageModel, _ctx_codes_for
+
+# scoring matrix with no data: the keeper saves exactly when he picks the shot's side
+PRIOR = 1.0 - np.eye(len(DIRS))
+
+# feasibility slack for support enumeration, and the determinant treated as singular
+_EPS = 1e-9
+_SINGULAR = 1e-12
+
+
+def score_matrices(model: NgramStageModel, k: int, alpha: float) -> np.ndarray:
+    """
+    S[who, stage, ctx_code, shot, dive] for every level-k context, shape (2, 3, 4**k, 3, 3).
+    """
+    if not model._built:
+        model.build(max_k=max(0, int(k)))
+    k = min(max(0, int(k)), model.max_k)
+    n_ctx = 4 ** k
+    codes = np.arange(n_ctx)
+
+    out = np.broadcast_to(PRIOR, (len(WHOS), len(STAGES), n_ctx, len(DIRS), len(DIRS))).copy()
+    done = np.zeros((len(WHOS), len(STAGES), n_ctx), dtype=bool)
+    for kk in range(k, -1, -1):
+        sub = codes % (4 ** kk)
+        n = model._pair_counts[:, :, kk, sub].astype(np.float64)
+        goals = model._pair_goals[:, :, kk, sub].astype(np.float64)
+        take = ~done & (n.sum(axis=(-2, -1)) > 0)
+        denom = n[take] + alpha
+        with np.errstate(invalid="ignore", divide="ignore"):
+            s = (goals[take] + alpha * PRIOR) / denom
+        # unseen (shot, dive) cells with alpha = 0 keep the prior
+        out[take] = np.where(denom > 0, s, PRIOR)
+        done |= take
+    return out
+
+
+def _supports():
+    # (rows, cols) of every square sub-game, smallest first
+    out = []
+    for m in range(1, len(DIRS) + 1):
+        for rows in itertools.combinations(range(len(DIRS)), m):
+            for cols in itertools.combinations(range(len(DIRS)), m):
+                out.append((list(rows), list(cols)))
+    return out
+
+
+def _equalize(M: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    For square sub-games M (B, m, m): the column mix y with M y = v 1, sum y = 1.
+    Returns (y, v, ok); ok is False where that bordered system is singular.
+    """
+    B, m, _ = M.shape
+    A = np.zeros((B, m + 1, m + 1))
+    A[:, :m, :m] = M
+    A[:, :m, m] = -1.0
+    A[:, m, :m] = 1.0
+    ok = np.abs(np.linalg.det(A)) > _SINGULAR
+    A[~ok] = np.eye(m + 1)
+    rhs = np.zeros((B, m + 1, 1))
+    rhs[:, m] = 1.0
+    sol = np.linalg.solve(A, rhs)[..., 0]
+    return sol[:, :m], sol[:, m], ok
+
+
+def solve_games(S: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Exact optimal mixed strategies of zero-sum games S[..., shot, dive] (kicker maximizes).
+
+    Support enumeration, batched over games: for every square sub-game, solve the
+    equalizing systems for both sides and keep the first solution that is a
+    probability vector and that neither side can beat outside the support (by
+    Shapley-Snow one always exists). This is the 3x3 LP solved at its vertices.
+    Returns kick / dive mixes (..., 3), the value and the duality gap
+    max_shot S·dive - min_dive kick·S (0 up to rounding).
+    """
+    lead = S.shape[:-2]
+    S = S.reshape(-1, len(DIRS), len(DIRS)).astype(np.float64)
+    n = len(S)
+
+    kick = np.full((n, len(DIRS)), 1 / len(DIRS))
+    dive = np.full((n, len(DIRS)), 1 / len(DIRS))
+    found = np.zeros(n, dtype=bool)
+    for rows, cols in _supports():
+        todo = ~found
+        if not todo.any():
+            break
+        M = S[todo][:, rows][:, :, cols]
+        y, v, ok_y = _equalize(M)
+        x, _, ok_x = _equalize(M.transpose(0, 2, 1))
+
+        x_full = np.zeros((len(M), len(DIRS)))
+        y_full = np.zeros((len(M), len(DIRS)))
+        x_full[:, rows] = x
+        y_full[:, cols] = y
+        St = S[todo]
+        ok = (
+            ok_x & ok_y
+            & (x >= -_EPS).all(axis=1) & (y >= -_EPS).all(axis=1)
+            # no shot beats v against y, no dive holds the kicker under v against x
+            & (np.einsum("bij,bj->bi", St, y_full).max(axis=1) <= v + _EPS)
+            & (np.einsum("bi,bij->bj", x_full, St).min(axis=1) >= v - _EPS)
+        )
+        idx = np.flatnonzero(todo)[ok]
+        kick[idx] = np.clip(x_full[ok], 0.0, None)
+        dive[idx] = np.clip(y_full[ok], 0.0, None)
+        found[idx] = True
+
+    kick /= kick.sum(axis=1, keepdims=True)
+    dive /= dive.sum(axis=1, keepdims=True)
+    upper = np.einsum("bij,bj->bi", S, dive).max(axis=1)
+    lower = np.einsum("bi,bij->bj", kick, S).min(axis=1)
+    return {
+        "kick": kick.reshape(lead + (len(DIRS),)),
+        "dive": dive.reshape(lead + (len(DIRS),)),
+        "value": ((upper + lower) / 2).reshape(lead),
+        "gap": (upper - lower).reshape(lead),
+    }
+
+
+def game_table(model: NgramStageModel, k: int, alpha: float) -> Dict[str, np.ndarray]:
+    """
+    solve_games over every (who, stage, level-k context), cached on the model.
+    """
+    if not model._built:
+        model.build(max_k=max(0, int(k)))
+    k = min(max(0, int(k)), model.max_k)
+    return model.derived(("game", k, float(alpha)), lambda: solve_games(score_matrices(model, k, float(alpha))))
+
+
+def solve_kick(model: NgramStageModel, who: str, stage: str, recent_dirs_for_who: list, k: int, alpha: float) -> dict:
+    """
+    Equilibrium for the next kick: {"kick": {dir: p}, "dive": {dir: p}, "value": P(goal)}.
+    """
+    table = game_table(model, k, alpha)
+    k = min(max(0, int(k)), model.max_k)
+    w = 0 if who == "ME" else 1
+    s_ = STAGES.index(stage) if stage in STAGES else 1
+    c = max(_ctx_codes_for(recent_dirs_for_who, k)[k], 0)
+    return {
+        "kick": dict(zip(DIRS, table["kick"][w, s_, c].tolist())),
+        "dive": dict(zip(DIRS, table["dive"][w, s_, c].tolist())),
+        "value": float(table["value"][w, s_, c]),
+    }
@@ -0,0 +1,29 @@
+# kicks.py
+# 按 kick_index 推出的阶段 / 轮次 / 射门方；不依赖 streamlit，模型、回测、服务都从这里取
+from __future__ import annotations
+
+
+def stage_from_kick_index(kick_index: int) -> str:
+    # 1-10 脚（前5轮*2）视为 REG，之后 SD
+    return "REG" if kick_index <= 10 else "SD"
+
+def round_stage_from_kick_index(kick_index: int) -> str:
+    # 压缩为 EARLY/MID/LATE（给模型用）
+    # EARLY: 前2轮(1-4脚) MID: 3-4轮(5-8脚) LATE: 第5轮及以后(9+)
+    if kick_index <= 4:
+        return "EARLY"
+    if kick_index <= 8:
+        return "MID"
+    return "LATE"
+
+def kicker_for_kick_index(order_mode: str, kick_index: int) -> str:
+    # order_mode: ME_FIRST / OPP_FIRST
+    # kick_index 从 1 开始
+    if order_mode == "ME_FIRST":
+        return "ME" if kick_index % 2 == 1 else "OPP"
+    else:
+        return "OPP" if kick_index % 2 == 1 else "ME"
+
+def round_number_from_kick_index(kick_index: int) -> int:
+    # 1-2脚为第1轮，3-4脚为第2轮...
+    return (kick_index + 1) // 2
@@ -0,0 +1,151 @@
+# live_state.py
+"""
+Running state of the match being entered on the live and record pages.
+
+LiveMatchState keeps the confirmed kicks together with everything the pages
+used to rescan them for on each rerun: goals and kicks per side, each
+shooter's direction history, and the match-only counts behind
+model.match_only_probs, one table per (who, round stage, context) for every
+context length up to MODEL_MAX_K. confirm() and undo() update all of it in
+O(MODEL_MAX_K), whatever the length of the match.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+from config import DIRS, MODEL_MAX_K
+from model import WHOS, match_only_probs
+from timing import timed
+from kicks import round_stage_from_kick_index
+
+_DIR_INDEX = {d: i for i, d in enumerate(DIRS)}
+
+
+def shootout_result(score_me: int, score_opp: int, kicks_me: int, kicks_opp: int) -> Tuple[bool, Optional[str]]:
+    """
+    Return: (is_over, winner)  winner in {'ME','OPP',None}
+    Standard rule:
+      - First 5 kicks each (max 10 total), can end early if trailing team cannot catch up
+      - Sudden death after both have taken 5: after each pair (same number of kicks taken),
+        if scores differ => match ends
+    """
+    # early termination in first 5 each
+    if kicks_me <= 5 and kicks_opp <= 5:
+        rem_me = 5 - kicks_me
+        rem_opp = 5 - kicks_opp
+        if score_me > score_opp + rem_opp:
+            return True, "ME"
+        if score_opp > score_me + rem_me:
+            return True, "OPP"
+
+        # exactly finished 5 each
+        if kicks_me == 5 and kicks_opp == 5 and (score_me != score_opp):
+            return True, "ME" if score_me > score_opp else "OPP"
+
+    # sudden death: only decide after both have taken same number and > 5
+    if kicks_me == kicks_opp and kicks_me > 5 and score_me != score_opp:
+        return True, "ME" if score_me > score_opp else "OPP"
+
+    return False, None
+
+
+class LiveMatchState:
+    """
+    The kicks of one match in entry order (the dicts the pages save), plus
+    running aggregates. Mutate it only through confirm / undo / reset.
+    """
+
+    def __init__(self, max_k: int = MODEL_MAX_K):
+        self.max_k = max(0, int(max_k))
+        self.reset()
+
+    @classmethod
+    def from_kicks(cls, kicks: List[dict], max_k: int = MODEL_MAX_K) -> "LiveMatchState":
+        state = cls(max_k)
+        for kick in kicks:
+            state.confirm(kick)
+        return state
+
+    def reset(self):
+        self.kicks: List[dict] = []
+        self.score = {w: 0 for w in WHOS}
+        self.taken = {w: 0 for w in WHOS}
+        # directions per shooter: valid ones only (the model's recent_dirs), and as entered (match-only contexts)
+        self.dirs: Dict[str, List[str]] = {w: [] for w in WHOS}
+        self.entered: Dict[str, list] = {w: [] for w in WHOS}
+        # (who, round_stage, kk, ctx) -> [n_L, n_C, n_R]
+        self.counts: Dict[tuple, List[int]] = {}
+
+    @property
+    def next_kick_index(self) -> int:
+        return len(self.kicks) + 1
+
+    def _count(self, who: str, direction, position: int, sign: int):
+        # the counts model.match_only_probs would add for this kick, for every kk
+        i = _DIR_INDEX.get(direction)
+        if i is None:
+            return
+        rstage = round_stage_from_kick_index(position)
+        hist = self.entered[who]
+        for kk in range(self.max_k + 1):
+            key = (who, rstage, kk, tuple(hist[-kk:]) if kk > 0 else ())
+            row = self.counts.setdefault(key, [0, 0, 0])
+            row[i] += sign
+            if not any(row):
+                del self.counts[key]
+
+    def confirm(self, kick: dict):
+        who = kick.get("who_kicked")
+        self.kicks.append(kick)
+        if who not in self.score:
+            return
+        self.taken[who] += 1
+        self.score[who] += int(kick.get("is_goal", 0))
+        direction = kick.get("kicker_dir")
+        self._count(who, direction, len(self.kicks), +1)
+        self.entered[who].append(direction)
+        if direction in _DIR_INDEX:
+            self.dirs[who].append(direction)
+
+    def undo(self) -> Optional[dict]:
+        """
+        Drop the last confirmed kick and return it (None if there is none).
+        """
+        if not self.kicks:
+            return None
+        position = len(self.kicks)
+        kick = self.kicks.pop()
+        who = kick.get("who_kicked")
+        if who not in self.score:
+            return kick
+        self.taken[who] -= 1
+        self.score[who] -= int(kick.get("is_goal", 0))
+        direction = self.entered[who].pop()
+        if direction in _DIR_INDEX:
+            self.dirs[who].pop()
+        self._count(who, direction, position, -1)
+        return kick
+
+    def score_and_counts(self) -> Tuple[int, int, int, int]:
+        return self.score["ME"], self.score["OPP"], self.taken["ME"], self.taken["OPP"]
+
+    def result(self) -> Tuple[bool, Optional[str]]:
+        return shootout_result(*self.score_and_counts())
+
+    def recent_dirs(self, who: str) -> List[str]:
+        return list(self.dirs.get(who, []))
+
+    @timed("live_counts")
+    def match_only_probs(self, who: str, rstage: str, k: int, alpha: float) -> Dict[str, float]:
+        """
+        model.match_only_probs(self.kicks, ...) read from the count table.
+        """
+        kk = max(0, int(k))
+        if kk > self.max_k:
+            return match_only_probs(self.kicks, who=who, rstage=rstage, k=k, alpha=alpha)
+        recent = self.dirs.get(who, [])
+        ctx = tuple(recent[-kk:]) if kk > 0 else tuple()
+        row = self.counts.get((who, rstage, kk, ctx), (0, 0, 0))
+
+        total = sum(row[i] + float(alpha) for i in range(len(DIRS)))
+        return {d: (row[i] + float(alpha)) / total for i, d in enumerate(DIRS)} if total > 0 else {d: 1 / 3 for d in DIRS}
@@ -1,10 +1,25 @@
 # model.py
 from __future__ import annotations
-from collections import Counter, defaultdict
-from typing import Dict, List, Tuple
+import os
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
 import pandas as pd
 
-from config import DIRS
+from config import DEFAULT_OPP_NAME, DIRS
+from timing import timed
+from kicks import round_stage_from_kick_index
+
+WHOS = ["ME", "OPP"]
+STAGES = ["EARLY", "MID", "LATE"]
+NO_DIR = 3  # ctx 中"还没有这一脚"的编码
+_DIR_CODE = {d: i for i, d in enumerate(DIRS)}
+_STAGE_CODE = {s: i for i, s in enumerate(STAGES)}
+_L, _C, _R = DIRS
+# derived() 最多留这么多张整表（K=4 的胜率表约 20 MB 一张），最久没用的先丢
+DERIVED_CACHE_SIZE = 4
 
 
 def _ctx_tuple(seq: List[str], k: int) -> Tuple[str, ...]:
@@ -15,16 +30,123 @@ def _ctx_tuple(seq: List[str], k: int) -> Tuple[str, ...]:
     return tuple(seq[-k:])
 
 
-def _dirichlet_smooth(counts: Counter, alpha: float) -> Dict[str, float]:
-    total = 0.0
-    out = {}
-    for d in DIRS:
-        c = float(counts.get(d, 0))
-        out[d] = c + alpha
-        total += out[d]
+def _ctx_codes_for(seq: List[str], k: int) -> List[int]:
+    """
+    [ctx 在计数张量里的下标 for kk in 0..k]（与 _ctx_codes 同一编码）；
+    含非法方向的层为 -1。
+    """
+    codes = [0]
+    code, place = 0, 1
+    n = len(seq)
+    for j in range(1, k + 1):
+        d = _DIR_CODE.get(seq[-j], -1) if j <= n else NO_DIR
+        if d < 0:
+            return codes + [-1] * (k + 1 - j)
+        code += d * place
+        place *= 4
+        codes.append(code)
+    return codes
+
+
+def _dirichlet_smooth(counts: List[int], alpha: float) -> Dict[str, float]:
+    # 展开成三个标量（predict_next_dir 每次都走这里）；加法顺序同逐项累加，结果逐位相同
+    c0, c1, c2 = counts
+    x0 = float(c0) + alpha
+    x1 = float(c1) + alpha
+    x2 = float(c2) + alpha
+    total = x0 + x1 + x2
     if total <= 0:
         return {d: 1 / len(DIRS) for d in DIRS}
-    return {d: out[d] / total for d in DIRS}
+    return {_L: x0 / total, _C: x1 / total, _R: x2 / total}
+
+
+def _label_codes(values: pd.Series, labels: List[str]) -> np.ndarray:
+    # labels 中的下标；缺失或不认识的值为 -1（同 pd.Categorical(...).codes，但不认识的值不告警）
+    return pd.Index(labels).get_indexer(np.asarray(values, dtype=object))
+
+
+def _encode_kicks(df: pd.DataFrame, max_k: int, with_keeper: bool = False):
+    """
+    把可用的射门行编码为小整数（与逐行 build 的过滤规则一致）：
+      who: ME=0/OPP=1, stage: EARLY/MID/LATE=0/1/2（其它视为 MID）, dir: L/C/R=0/1/2
+      lags[:, j-1]: 同一场、同一射门者倒数第 j 脚的方向，没有则为 NO_DIR
+    返回 (match_ids, who, stage, dir, lags)；with_keeper 时再加
+    (keeper: 扑救方向 L/C/R=0/1/2，缺失为 -1, goal: 0/1)
+    """
+    match, match_ids = pd.factorize(df["match_id"], sort=True)
+    return _encode_codes(
+        match,
+        np.asarray(match_ids),
+        df["kick_index"].to_numpy(),
+        _label_codes(df["who_kicked"], WHOS),
+        _label_codes(df["round_stage"], STAGES),
+        _label_codes(df["kicker_dir"], DIRS),
+        _label_codes(df["keeper_dir"], DIRS),
+        pd.to_numeric(df["is_goal"], errors="coerce").fillna(0).to_numpy() > 0,
+        max_k,
+        with_keeper,
+    )
+
+
+def _encode_codes(match, match_ids, kick_index, who, stage, dir_, keeper, goal, max_k: int, with_keeper: bool = False):
+    """
+    _encode_kicks 的主体，输入已是逐行编码（缺失/未知为 -1）：
+    match 是 match_ids 的下标，who/stage/dir/keeper 按 WHOS/STAGES/DIRS。
+    storage_kicklog 直接把记录数组传进来，不经过 DataFrame。
+    """
+    rows = np.flatnonzero((match >= 0) & (who >= 0) & (dir_ >= 0))
+    # 按 (match, kick_index) 稳定排序，同 sort_values(["match_id", "kick_index"], kind="stable")
+    rows = rows[np.lexsort((kick_index[rows], match[rows]))]
+    match = match[rows]
+
+    who = who[rows].astype(np.int64)
+    stage = stage[rows].astype(np.int64)
+    stage[stage < 0] = STAGES.index("MID")
+    dir_ = dir_[rows].astype(np.int64)
+
+    lags = np.full((len(rows), max(0, max_k)), NO_DIR, dtype=np.int64)
+    if max_k > 0 and len(rows):
+        g = pd.Series(dir_).groupby([match, who], sort=False)
+        for j in range(1, max_k + 1):
+            lags[:, j - 1] = g.shift(j).fillna(NO_DIR).to_numpy(dtype=np.int64)
+
+    ids = match_ids[match]
+    if not with_keeper:
+        return ids, who, stage, dir_, lags
+    keeper = keeper[rows].astype(np.int64)
+    keeper[keeper < 0] = -1
+    goal = (goal[rows] > 0).astype(np.int64)
+    return ids, who, stage, dir_, lags, keeper, goal
+
+
+def _match_opponents(df: pd.DataFrame) -> pd.Series:
+    """
+    每场的对手：match_id -> 该场第一条非空 opp_name（没记录对手的场次不在内）。
+    侧栏占位名 DEFAULT_OPP_NAME（旧数据里可能存了）也算没记录。
+    """
+    if "opp_name" not in df.columns or len(df) == 0:
+        return pd.Series(dtype=object)
+    d = df[df["match_id"].notna() & df["opp_name"].notna()]
+    name = d["opp_name"].astype(str).str.strip()
+    keep = ((name != "") & (name != DEFAULT_OPP_NAME)).to_numpy()
+    return name[keep].groupby(d["match_id"].to_numpy()[keep], sort=False).first()
+
+
+def _ctx_codes(lags: np.ndarray, k: int) -> np.ndarray:
+    # 以 4 为底：最近一脚是最低位
+    code = np.zeros(len(lags), dtype=np.int64)
+    for j in range(k, 0, -1):
+        code = code * 4 + lags[:, j - 1]
+    return code
+
+
+def _decode_ctx(code: int, k: int) -> Tuple[str, ...]:
+    digits = []
+    for _ in range(k):
+        digits.append(code % 4)
+        code //= 4
+    # digits 是从最近到最早；缺失的只会在最早一端
+    return tuple(DIRS[x] for x in reversed(digits) if x != NO_DIR)
 
 
 class NgramStageModel:
@@ -37,37 +159,285 @@ class NgramStageModel:
     def __init__(self, df: pd.DataFrame):
         self.df = df.copy()
         self._counts = None  # lazy
+        self._totals = None
+        self._pair_counts = None  # [who, stage, k, ctx, shot, dive]：有扑救方向的脚数
+        self._pair_goals = None   # 同形状：其中进球数
+        self._counts_flat = None
+        self._totals_flat = None
         self._built = False
+        self.max_k = 0
+        self._match_ids: Optional[set] = set()  # 从快照读出的模型为 None（快照不存 id）
+        self._derived = {}  # 由计数算出的整表（胜率表等），计数一变就清空；按最近使用排序
+        self._version = 0   # 计数每改一次加一；derived() 据此丢掉算到一半计数就变了的结果
+        # 服务是多线程的：_derived 的增删在这把锁下；同一 key 的 make() 由 _derived_gates 里的锁保证只算一次
+        self._derived_lock = threading.Lock()
+        self._derived_gates: Dict[tuple, threading.Lock] = {}
+        # predict_next_dir 用的平滑概率：{alpha: (_version, [每个扁平下标的 (P(L), P(C), P(R))，没数据为 None])}
+        self._smoothed: Dict[float, tuple] = {}
+        # 按对手分开的计数：{opp_name: {扁平下标: [n_L, n_C, n_R]}}，下标同 predict_next_dir 的 i；
+        # 稀疏存放，只含非零项，随 update/remove 增量维护
+        self._opp_counts: Dict[str, Dict[int, List[int]]] = {}
+
+    @property
+    def match_ids(self) -> Optional[set]:
+        """
+        已计入的 match_id；从快照 load() 出来的模型不知道，为 None。
+        """
+        return self._match_ids
+
+    def _alloc(self, max_k: int):
+        self.max_k = max(0, int(max_k))
+        shape = (len(WHOS), len(STAGES), self.max_k + 1, 4 ** self.max_k)
+        self._counts = np.zeros(shape + (len(DIRS),), dtype=np.uint32)
+        self._totals = np.zeros(shape, dtype=np.uint32)
+        self._pair_counts = np.zeros(shape + (len(DIRS), len(DIRS)), dtype=np.uint32)
+        self._pair_goals = np.zeros(shape + (len(DIRS), len(DIRS)), dtype=np.uint32)
+        self._set_views()
+        self._version += 1
+        self._clear_derived()
+
+    def _set_views(self):
+        # 扁平只读视图：标量查找比 numpy 索引快一个数量级，且随原地更新同步
+        self._counts_flat = memoryview(self._counts.reshape(-1))
+        self._totals_flat = memoryview(self._totals.reshape(-1))
+
+    def _accumulate(self, df: pd.DataFrame, sign: int):
+        self._accumulate_encoded(_encode_kicks(df, self.max_k, with_keeper=True), sign, _match_opponents(df))
 
+    def _accumulate_encoded(self, enc: tuple, sign: int, opponents: Optional[pd.Series] = None):
+        # _counts[who, stage, k, ctx_code, next_dir]，ctx_code 只用到 4**k 以内
+        # opponents: match_id -> opp_name（见 _match_opponents），有则同时记入按对手的计数
+        self._clear_derived()
+        match_ids, who, stage, dir_, lags, keeper, goal = enc
+        if sign > 0 and self._match_ids is not None:
+            self._match_ids.update(pd.unique(match_ids))
+        if opponents is not None and len(opponents):
+            self._accumulate_opponents(match_ids, who, stage, dir_, lags, opponents, sign)
+        has_keeper = keeper >= 0
+
+        for k in range(self.max_k, -1, -1):
+            n_ctx = 4 ** k
+            key = ((who * 3 + stage) * n_ctx + _ctx_codes(lags, k)) * 3 + dir_
+            hits = np.bincount(key, minlength=2 * 3 * n_ctx * 3).astype(np.uint32).reshape(2, 3, n_ctx, 3)
+            block = self._counts[:, :, k, :n_ctx, :]
+            if sign > 0:
+                block += hits
+            else:
+                block -= hits
+            self._totals[:, :, k, :n_ctx] = block.sum(axis=-1, dtype=np.uint32)
+
+            # (射门, 扑救) 对：给 game.py 的得分矩阵
+            pair_key = key[has_keeper] * 3 + keeper[has_keeper]
+            size = 2 * 3 * n_ctx * 9
+            for tensor, weights in ((self._pair_counts, None), (self._pair_goals, goal[has_keeper])):
+                hits = np.bincount(pair_key, weights=weights, minlength=size).astype(np.uint32).reshape(2, 3, n_ctx, 3, 3)
+                if sign > 0:
+                    tensor[:, :, k, :n_ctx] += hits
+                else:
+                    tensor[:, :, k, :n_ctx] -= hits
+
+        # 改完再加版本号：改动期间开始的 make() 记下的是旧版本，结果不会进缓存
+        self._version += 1
+        self._clear_derived()
+
+    def _clear_derived(self):
+        with self._derived_lock:
+            self._derived.clear()
+
+    def _accumulate_opponents(self, match_ids, who, stage, dir_, lags, opponents: pd.Series, sign: int):
+        # 与全局计数同一套下标；所有 k 层一起 np.unique，再逐个非零项更新字典
+        # 行已按场排好（_encode_codes），每场只查一次对手
+        if len(match_ids) == 0:
+            return
+        starts = np.flatnonzero(np.r_[True, match_ids[1:] != match_ids[:-1]])
+        pos = pd.Index(opponents.index).get_indexer(match_ids[starts])
+        pos = np.repeat(pos, np.diff(np.r_[starts, len(match_ids)]))
+        codes, names = pd.factorize(opponents.to_numpy())
+        opp = np.where(pos >= 0, codes[pos], -1)
+        rows = np.flatnonzero(opp >= 0)
+        if len(rows) == 0:
+            return
+
+        n_ctx = 4 ** self.max_k
+        size = len(WHOS) * len(STAGES) * (self.max_k + 1) * n_ctx
+        base = (who[rows] * len(STAGES) + stage[rows]) * (self.max_k + 1)
+        keys = [
+            (opp[rows] * size + (base + k) * n_ctx + _ctx_codes(lags[rows], k)) * 3 + dir_[rows]
+            for k in range(self.max_k + 1)
+        ]
+        uniq, hits = np.unique(np.concatenate(keys), return_counts=True)
+
+        for key, n in zip(uniq.tolist(), hits.tolist()):
+            o, rest = divmod(key, size * 3)
+            i, d = divmod(rest, 3)
+            table = self._opp_counts.setdefault(names[o], {})
+            row = table.setdefault(i, [0, 0, 0])
+            row[d] += sign * n
+            if not any(row):
+                del table[i]
+                if not table:
+                    del self._opp_counts[names[o]]
+
+    @timed("model.build")
     def build(self, max_k: int = 2):
-        # counts[(who, stage, k, ctx_tuple)] -> Counter(next_dir)
-        counts = defaultdict(Counter)
-
-        # 分 match_id 逐场构造序列
-        for mid, g in self.df.groupby("match_id"):
-            g = g.sort_values("kick_index")
-            # 为 ME/OPP 各自维护历史射门方向
-            hist = {"ME": [], "OPP": []}
-            for _, r in g.iterrows():
-                who = str(r.get("who_kicked", ""))
-                if who not in ("ME", "OPP"):
-                    continue
-                stage = str(r.get("round_stage", ""))
-                if stage not in ("EARLY", "MID", "LATE"):
-                    stage = "MID"
-                next_dir = str(r.get("kicker_dir", ""))
-                if next_dir not in DIRS:
-                    continue
-
-                for k in range(max_k, -1, -1):
-                    ctx = _ctx_tuple(hist[who], k)
-                    counts[(who, stage, k, ctx)][next_dir] += 1
-
-                hist[who].append(next_dir)
-
-        self._counts = counts
+        self._alloc(max_k)
+        self._match_ids = set()
+        self._opp_counts = {}
+        self._accumulate(self.df, +1)
         self._built = True
 
+    @classmethod
+    @timed("model.build")
+    def from_encoded(cls, enc: tuple, max_k: int, opponents: Optional[pd.Series] = None) -> "NgramStageModel":
+        """
+        与 build() 相同，但输入是 _encode_codes(..., max_k, with_keeper=True) 的结果
+        （storage_kicklog 从内存映射的记录直接建模，不解析成 DataFrame）。
+        opponents 同 _match_opponents 的结果。
+        """
+        m = cls(pd.DataFrame())
+        m._alloc(max_k)
+        m._accumulate_encoded(enc, +1, opponents)
+        m._built = True
+        return m
+
+    def update(self, df_new_rows: pd.DataFrame):
+        """
+        Add the kicks of newly saved matches to the counts. Every match in
+        df_new_rows must be complete and not already counted (remove it first).
+        self.df is left as is, so a later build() starts over from the original frame.
+        """
+        if not self._built:
+            self.build(max_k=self.max_k)
+        self._accumulate(df_new_rows, +1)
+
+    def remove(self, df_old_rows: pd.DataFrame):
+        """
+        Subtract complete matches that were counted earlier (inverse of update).
+        """
+        if not self._built:
+            self.build(max_k=self.max_k)
+        self._accumulate(df_old_rows, -1)
+        if self._match_ids is not None:
+            self._match_ids.difference_update(df_old_rows["match_id"].dropna().unique())
+
+    def save(self, path: Path, fingerprint: str):
+        """
+        写一个 .npz 快照（计数 + 按对手的计数），先写临时文件再替换。
+        fingerprint 标识快照对应的源数据版本。match_id 不存（随库增长），载入后 match_ids 为 None。
+        """
+        if not self._built:
+            self.build(max_k=self.max_k)
+        path = Path(path)
+        # 每个进程各用一个临时文件：冷启动重建时几个进程可能同时写快照
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        opp_names = list(self._opp_counts)
+        opp_of = [o for o, name in enumerate(opp_names) for _ in self._opp_counts[name]]
+        opp_keys = [i for name in opp_names for i in self._opp_counts[name]]
+        opp_rows = [row for name in opp_names for row in self._opp_counts[name].values()]
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                counts=self._counts,
+                pair_counts=self._pair_counts,
+                pair_goals=self._pair_goals,
+                max_k=np.int64(self.max_k),
+                fingerprint=np.array(fingerprint),
+                opp_names=np.array(opp_names, dtype=str),
+                opp_of=np.array(opp_of, dtype=np.int64),
+                opp_keys=np.array(opp_keys, dtype=np.int64),
+                opp_rows=np.array(opp_rows, dtype=np.uint32).reshape(-1, len(DIRS)),
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path, fingerprint: str, max_k: int = 0) -> Optional["NgramStageModel"]:
+        """
+        读快照；文件不存在、损坏、fingerprint 不符或 max_k 不够时返回 None（由调用方重建）。
+        """
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                if str(z["fingerprint"]) != fingerprint or int(z["max_k"]) < max_k:
+                    return None
+                counts = z["counts"]
+                pair_counts = z["pair_counts"]
+                pair_goals = z["pair_goals"]
+                snap_k = int(z["max_k"])
+                opp_names = z["opp_names"].tolist()
+                opp_of = z["opp_of"].tolist()
+                opp_keys = z["opp_keys"].tolist()
+                opp_rows = z["opp_rows"].tolist()
+        except (OSError, KeyError, ValueError):
+            return None
+
+        m = cls(pd.DataFrame())
+        m.max_k = snap_k
+        m._counts = np.ascontiguousarray(counts, dtype=np.uint32)
+        m._totals = m._counts.sum(axis=-1, dtype=np.uint32)
+        m._pair_counts = np.ascontiguousarray(pair_counts, dtype=np.uint32)
+        m._pair_goals = np.ascontiguousarray(pair_goals, dtype=np.uint32)
+        m._set_views()
+        m._match_ids = None
+        for o, i, row in zip(opp_of, opp_keys, opp_rows):
+            m._opp_counts.setdefault(opp_names[o], {})[i] = row
+        m._built = True
+        return m
+
+    def derived(self, key: tuple, make: Callable[[], Any]) -> Any:
+        """
+        按 key 缓存 make() 的结果（整张胜率表之类），直到下次 build/update/remove；
+        只留最近用过的 DERIVED_CACHE_SIZE 个 key（拖动 alpha 等侧栏参数不会攒下一串旧表）。
+        make() 期间计数变了（另一线程在存盘）时照常返回结果，但不缓存。
+        线程安全：几个请求同时要同一个 key 时只有一个调 make()，其余等它算完直接取缓存。
+        """
+        with self._derived_lock:
+            value = self._lookup_derived(key)
+            if value is not None:
+                return value
+            gate = self._derived_gates.setdefault(key, threading.Lock())
+        with gate:
+            with self._derived_lock:
+                # 排队期间前一个线程可能已经算好
+                value = self._lookup_derived(key)
+                if value is not None:
+                    return value
+                version = self._version
+            try:
+                value = make()
+            except BaseException:
+                with self._derived_lock:
+                    self._derived_gates.pop(key, None)
+                raise
+            with self._derived_lock:
+                # 先放进缓存再撤掉 gate，之后来的线程不会再算一遍
+                self._derived_gates.pop(key, None)
+                if self._version == version:
+                    self._derived[key] = value
+                    while len(self._derived) > DERIVED_CACHE_SIZE:
+                        self._derived.pop(next(iter(self._derived)))
+        return value
+
+    def _lookup_derived(self, key: tuple) -> Any:
+        # 调用方持有 _derived_lock；取出再放回，dict 的插入顺序就是最近使用顺序
+        value = self._derived.pop(key, None)
+        if value is not None:
+            self._derived[key] = value
+        return value
+
+    def counts_dict(self) -> Dict[tuple, Counter]:
+        """
+        稀疏视图：{(who, stage, k, ctx_tuple): Counter(next_dir)}，只含非零项。
+        """
+        out = {}
+        for w, s_, k, c in zip(*np.nonzero(self._totals)):
+            if c >= 4 ** k:
+                continue
+            row = self._counts[w, s_, k, c]
+            out[(WHOS[w], STAGES[s_], int(k), _decode_ctx(int(c), int(k)))] = Counter(
+                {DIRS[i]: int(row[i]) for i in range(len(DIRS)) if row[i]}
+            )
+        return out
+
+    @timed("predict_next_dir")
     def predict_next_dir(
         self,
         who: str,
@@ -79,20 +449,175 @@ class NgramStageModel:
         if not self._built:
             self.build(max_k=max(0, k))
 
-        who = "ME" if who == "ME" else "OPP"
-        stage = stage if stage in ("EARLY", "MID", "LATE") else "MID"
-        k = max(0, int(k))
+        max_k = self.max_k
+        k = min(max(0, int(k)), max_k)
+        n_ctx = 4 ** max_k
+        # (who, stage) 这一段在扁平张量里的起点；每层 kk 再往后 kk * n_ctx
+        base = ((0 if who == "ME" else 1) * len(STAGES) + _STAGE_CODE.get(stage, 1)) * (max_k + 1) * n_ctx
 
         # backoff: k -> k-1 -> ... -> 0
+        codes = _ctx_codes_for(recent_dirs_for_who, k)
+        rows = self._smoothed_rows(alpha)
         for kk in range(k, -1, -1):
-            ctx = _ctx_tuple(recent_dirs_for_who, kk)
-            key = (who, stage, kk, ctx)
-            if key in self._counts and sum(self._counts[key].values()) > 0:
-                return _dirichlet_smooth(self._counts[key], alpha)
+            c = codes[kk]
+            if c < 0:
+                continue
+            row = rows[base + kk * n_ctx + c]
+            if row is not None:
+                p_l, p_c, p_r = row
+                return {_L: p_l, _C: p_c, _R: p_r}
 
         # 没数据：均匀
         return {d: 1 / len(DIRS) for d in DIRS}
 
+    def _smoothed_rows(self, alpha: float) -> list:
+        """
+        每个扁平下标（同 predict_next_dir 的 i）按 alpha 平滑后的 (P(L), P(C), P(R))，
+        该 ctx 没数据为 None。整表一次算好（K=4 约 7.7k 项），计数变了才重算；
+        只留最近 DERIVED_CACHE_SIZE 个 alpha。与 _dirichlet_smooth 逐位相同。
+        """
+        version = self._version
+        hit = self._smoothed.get(alpha)
+        if hit is not None and hit[0] == version:
+            return hit[1]
+        x = self._counts.reshape(-1, len(DIRS)).astype(np.float64) + alpha
+        total = (x[:, 0] + x[:, 1]) + x[:, 2]
+        ok = total > 0
+        p = np.full(x.shape, 1 / len(DIRS))
+        p[ok] = x[ok] / total[ok][:, None]
+        rows = [tuple(r) if n else None for r, n in zip(p.tolist(), self._totals.reshape(-1).tolist())]
+        with self._derived_lock:
+            self._smoothed.pop(alpha, None)
+            self._smoothed[alpha] = (version, rows)
+            while len(self._smoothed) > DERIVED_CACHE_SIZE:
+                self._smoothed.pop(next(iter(self._smoothed)))
+        return rows
+
+    def opponents(self) -> List[str]:
+        """
+        有按对手计数的对手名（排序后）。
+        """
+        if not self._built:
+            self.build(max_k=self.max_k)
+        return sorted(self._opp_counts)
+
+    def opponent_kicks(self, opp_name: str) -> int:
+        """
+        该对手场次里计入模型的射门数（双方合计）。
+        """
+        table = self._opp_counts.get(opp_name, {})
+        n_ctx = 4 ** self.max_k
+        total = 0
+        for w in range(len(WHOS)):
+            for s_ in range(len(STAGES)):
+                total += sum(table.get((w * len(STAGES) + s_) * (self.max_k + 1) * n_ctx, (0, 0, 0)))
+        return total
+
+    def predict_opponent_dir(
+        self,
+        opp_name: str,
+        who: str,
+        stage: str,
+        recent_dirs_for_who: List[str],
+        k: int,
+        alpha: float,
+        prior_weight: float,
+    ) -> Dict[str, float]:
+        """
+        对这个对手的方向分布，分层回退到全局：
+          p = (n_opp + prior_weight * p_global) / (N_opp + prior_weight)
+        n_opp 取该对手计数里 k -> k-1 -> ... -> 0 第一层有数据的 ctx，p_global 是
+        predict_next_dir 的结果；该对手没有数据（或没记录对手名）时就是 p_global。
+        只查 opp_name 的那张表，不扫其他对手。
+        """
+        p_global = self.predict_next_dir(who, stage, recent_dirs_for_who, k, alpha)
+        table = self._opp_counts.get(opp_name) if opp_name else None
+        if not table:
+            return p_global
+
+        w = 0 if who == "ME" else 1
+        s_ = STAGES.index(stage) if stage in STAGES else 1
+        k = min(max(0, int(k)), self.max_k)
+        codes = _ctx_codes_for(recent_dirs_for_who, k)
+        n_ctx = 4 ** self.max_k
+        for kk in range(k, -1, -1):
+            c = codes[kk]
+            if c < 0:
+                continue
+            row = table.get(((w * len(STAGES) + s_) * (self.max_k + 1) + kk) * n_ctx + c)
+            if row is not None:
+                total = sum(row) + float(prior_weight)
+                return {d: (row[i] + float(prior_weight) * p_global[d]) / total for i, d in enumerate(DIRS)}
+        return p_global
+
+    def predict_grid(
+        self,
+        who: str,
+        stage: str,
+        recent_dirs_for_who: List[str],
+        ks: Optional[List[int]] = None,
+        alphas: Tuple[float, ...] = (0.5, 1.0, 2.0),
+    ) -> Dict[Tuple[int, float], Dict[str, float]]:
+        """
+        一次算出所有 (K, alpha) 组合的 predict_next_dir：{(k, alpha): {dir: p}}。
+        每层回退只查一次表，alpha 在数组上一起平滑；结果与逐个调用完全相同。
+        ks 默认 0..max_k。
+        """
+        if not self._built:
+            self.build(max_k=max(ks) if ks else self.max_k)
+        ks = list(range(self.max_k + 1)) if ks is None else [max(0, int(x)) for x in ks]
+        alphas = [float(x) for x in alphas]
+        a = np.asarray(alphas, dtype=np.float64)
+
+        w = 0 if who == "ME" else 1
+        s_ = STAGES.index(stage) if stage in STAGES else 1
+        codes = _ctx_codes_for(recent_dirs_for_who, self.max_k)
+        rows = {}
+        for kk, c in enumerate(codes):
+            if c >= 0 and self._totals[w, s_, kk, c] > 0:
+                rows[kk] = self._counts[w, s_, kk, c].astype(np.float64)
+
+        uniform = {d: 1 / len(DIRS) for d in DIRS}
+        out = {}
+        for k in ks:
+            kk = next((j for j in range(min(k, self.max_k), -1, -1) if j in rows), None)
+            if kk is None:
+                for al in alphas:
+                    out[(k, al)] = dict(uniform)
+                continue
+            # 与 _dirichlet_smooth 同样的加法顺序，保证逐位相同
+            c = rows[kk][None, :] + a[:, None]
+            total = (c[:, 0] + c[:, 1]) + c[:, 2]
+            for i, al in enumerate(alphas):
+                if total[i] <= 0:
+                    out[(k, al)] = dict(uniform)
+                else:
+                    out[(k, al)] = dict(zip(DIRS, (c[i] / total[i]).tolist()))
+        return out
+
+    def prob_table(self, k: int, alpha: float) -> np.ndarray:
+        """
+        整张预测表：out[who, stage, ctx_code] = predict_next_dir 的 [P(L), P(C), P(R)]，
+        ctx_code 为第 k 层编码（含回退，结果与逐个调用相同）。形状 (2, 3, 4**k, 3)。
+        """
+        if not self._built:
+            self.build(max_k=max(0, int(k)))
+        k = min(max(0, int(k)), self.max_k)
+        n_ctx = 4 ** k
+        codes = np.arange(n_ctx)
+
+        out = np.full((len(WHOS), len(STAGES), n_ctx, len(DIRS)), 1 / len(DIRS))
+        done = np.zeros((len(WHOS), len(STAGES), n_ctx), dtype=bool)
+        for kk in range(k, -1, -1):
+            # 第 kk 层的 ctx 就是编码的低 kk 位（最近 kk 脚）
+            sub = codes % (4 ** kk)
+            c = self._counts[:, :, kk, sub, :].astype(np.float64) + alpha
+            take = ~done & (self._totals[:, :, kk, sub] > 0)
+            total = (c[..., 0] + c[..., 1]) + c[..., 2]
+            out[take] = c[take] / total[take][:, None]
+            done |= take
+        return out
+
 
 def blend_probs(p_hist: Dict[str, float], p_match: Dict[str, float], match_weight: float) -> Dict[str, float]:
     w = float(match_weight)
@@ -103,3 +628,29 @@ def blend_probs(p_hist: Dict[str, float], p_match: Dict[str, float], match_weigh
     if s <= 0:
         return {d: 1 / len(DIRS) for d in DIRS}
     return {d: out[d] / s for d in DIRS}
+
+
+@timed("live_counts")
+def match_only_probs(seq: List[dict], who: str, rstage: str, k: int, alpha: float) -> Dict[str, float]:
+    """
+    本场内的方向分布：只数本场此前同一射门者、同一轮次阶段、同一 ctx（最近 k 脚）之后的方向，
+    再做 alpha 平滑。seq 是本场已确认的射门（按顺序，第 i 个即第 i 脚）。
+    """
+    kk = max(0, int(k))
+    recent = [x["kicker_dir"] for x in seq if x.get("who_kicked") == who and x.get("kicker_dir") in DIRS]
+    ctx = tuple(recent[-kk:]) if kk > 0 else tuple()
+    live_counts = Counter()
+
+    hist_tmp = {"ME": [], "OPP": []}
+    for idx, shot in enumerate(seq, start=1):
+        s_rstage = round_stage_from_kick_index(idx)
+        w = shot["who_kicked"]
+        cur_ctx = tuple(hist_tmp[w][-kk:]) if kk > 0 else tuple()
+        if w == who and s_rstage == rstage and cur_ctx == ctx:
+            nd = shot.get("kicker_dir")
+            if nd in DIRS:
+                live_counts[nd] += 1
+        hist_tmp[w].append(shot.get("kicker_dir"))
+
+    total = sum(live_counts.get(d, 0) + float(alpha) for d in DIRS)
+    return {d: (live_counts.get(d, 0) + float(alpha)) / total for d in DIRS} if total > 0 else {d: 1 / 3 for d in DIRS}
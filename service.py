@@ -0,0 +1,241 @@
+# service.py
+"""
+Headless prediction service.
+
+A small threaded HTTP/JSON server that keeps the shared NgramStageModel
+(storage.get_model) warm in one process and answers what live_page needs
+for the next kick, so a Streamlit rerun does not have to touch the model:
+
+    GET  /health                 {"ok": true, "kicks": n}
+    POST /predict                live_prediction(**body), body keys from PREDICT_FIELDS
+    POST /append {"rows": [...]} storage.append_rows, returns {"rows": n}
+
+    python service.py --port 8765
+
+live_page uses it when config.PREDICT_SERVICE_URL is set (request_prediction /
+request_append) and falls back to computing in process if it is unreachable.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import pandas as pd
+
+from config import (
+    DEFAULT_OPP_NAME,
+    DIRS,
+    OPPONENT_PRIOR_WEIGHT,
+    WINPROB_ME_KEEPER,
+    WINPROB_METHOD,
+    WINPROB_OPP_KEEPER,
+    WINPROB_ROLLOUTS,
+)
+from game import solve_kick
+from live_state import LiveMatchState
+from model import NgramStageModel, blend_probs, match_only_probs
+from storage import append_rows, get_model, load_db
+from kicks import kicker_for_kick_index, round_stage_from_kick_index
+from winprob import exact_win_prob, simulate_win_prob
+
+DEFAULT_PORT = 8765
+
+# the live_prediction arguments a /predict body may set (model / state are in-process only)
+PREDICT_FIELDS = frozenset(
+    {"seq", "order_mode", "k", "alpha", "match_weight", "kick_index", "grid_alphas", "opp_name"}
+)
+
+
+def _recent_dirs(seq, who: str):
+    return [x["kicker_dir"] for x in seq if x.get("who_kicked") == who and x.get("kicker_dir") in DIRS]
+
+
+def live_prediction(
+    seq: list,
+    order_mode: str,
+    k: int,
+    alpha: float,
+    match_weight: float,
+    kick_index: Optional[int] = None,
+    grid_alphas: Optional[list] = None,
+    model: Optional[NgramStageModel] = None,
+    state: Optional[LiveMatchState] = None,
+    opp_name: Optional[str] = None,
+) -> dict:
+    """
+    Everything live_page shows for the next kick, as plain JSON types:
+    who / stage, blended probs (+ p_hist, p_match), recommendation, ME win
+    probability, our side's equilibrium mix and the K / alpha comparison grid.
+    A LiveMatchState for seq, when the caller keeps one, saves rescanning it.
+    With opp_name (other than the sidebar placeholder DEFAULT_OPP_NAME), p_hist
+    comes from that opponent's profile backed off to the whole archive
+    (NgramStageModel.predict_opponent_dir).
+    """
+    model = model or get_model()
+    k, alpha = int(k), float(alpha)
+    kick_index = int(kick_index or len(seq) + 1)
+    who = kicker_for_kick_index(order_mode, kick_index)
+    rstage = round_stage_from_kick_index(kick_index)
+
+    recent = state.recent_dirs(who) if state is not None else _recent_dirs(seq, who)
+    opp_name = (opp_name or "").strip()
+    if opp_name == DEFAULT_OPP_NAME:
+        # the sidebar placeholder, not an opponent: no profile to blend in
+        opp_name = ""
+    if opp_name:
+        p_hist = model.predict_opponent_dir(opp_name, who, rstage, recent, k=k, alpha=alpha, prior_weight=OPPONENT_PRIOR_WEIGHT)
+    else:
+        p_hist = model.predict_next_dir(who=who, stage=rstage, recent_dirs_for_who=recent, k=k, alpha=alpha)
+    # match-only (same stage + same ctx) count
+    if state is not None:
+        p_match = state.match_only_probs(who, rstage, k=k, alpha=alpha)
+    else:
+        p_match = match_only_probs(seq, who=who, rstage=rstage, k=k, alpha=alpha)
+    p = blend_probs(p_hist, p_match, match_weight=float(match_weight))
+
+    keepers = dict(me_keeper=WINPROB_ME_KEEPER, opp_keeper=WINPROB_OPP_KEEPER)
+    if WINPROB_METHOD == "exact":
+        win_p = exact_win_prob(model, seq, order_mode, k=k, alpha=alpha, **keepers)
+    else:
+        # 固定种子：同一局面重跑页面时胜率不跳动
+        win_p = simulate_win_prob(model, seq, order_mode, k=k, alpha=alpha, n=WINPROB_ROLLOUTS, seed=len(seq), **keepers)
+
+    eq = solve_kick(model, who, rstage, recent, k=k, alpha=alpha)
+    grid = model.predict_grid(who, rstage, recent, alphas=sorted({alpha, *(grid_alphas or (0.5, 1.0, 2.0))}))
+
+    return {
+        "kick_index": kick_index,
+        "who": who,
+        "stage": rstage,
+        "probs": {d: float(p[d]) for d in DIRS},
+        "p_hist": {d: float(p_hist[d]) for d in DIRS},
+        "p_match": {d: float(p_match[d]) for d in DIRS},
+        "recommend": max(p, key=lambda x: p[x]),
+        "opp_kicks": model.opponent_kicks(opp_name) if opp_name else 0,
+        "win_prob": float(win_p),
+        "equilibrium": {"kick": eq["kick"], "dive": eq["dive"], "value": eq["value"]},
+        "grid": [{"K": gk, "alpha": ga, **{d: float(gp[d]) for d in DIRS}} for (gk, ga), gp in grid.items()],
+    }
+
+
+def _post(url: str, path: str, body: dict, timeout: float) -> dict:
+    req = urllib.request.Request(
+        url.rstrip("/") + path,
+        data=json.dumps(body).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read().decode("utf-8"))
+
+
+def request_prediction(url: str, timeout: float = 2.0, **kwargs) -> dict:
+    """
+    live_prediction on a running service. Raises OSError (URLError) if it is unreachable.
+    """
+    return _post(url, "/predict", kwargs, timeout)
+
+
+def request_append(url: str, df_new: pd.DataFrame, timeout: float = 10.0) -> int:
+    """
+    append_rows on a running service; returns the number of rows it stored.
+    """
+    rows = json.loads(df_new.to_json(orient="records"))
+    return int(_post(url, "/append", {"rows": rows}, timeout)["rows"])
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "PenaltyAI/1.0"
+
+    def _send(self, status: int, payload: dict):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self) -> dict:
+        n = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(n) or b"{}")
+        if not isinstance(body, dict):
+            raise ValueError("request body must be a JSON object")
+        return body
+
+    def _fail(self, e: Exception):
+        # anything the handlers below did not anticipate: still answer in JSON
+        # rather than dropping the connection
+        self._send(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def do_GET(self):
+        try:
+            if self.path == "/health":
+                self._send(200, {"ok": True, "kicks": int(len(load_db()))})
+            else:
+                self._send(404, {"error": f"unknown path {self.path}"})
+        except Exception as e:
+            self._fail(e)
+
+    def do_POST(self):
+        try:
+            if self.path == "/predict":
+                body = self._body()
+                unknown = sorted(set(body) - PREDICT_FIELDS)
+                if unknown:
+                    raise ValueError(f"unknown /predict fields: {', '.join(unknown)}")
+                seq = body.get("seq")
+                if not isinstance(seq, list) or not all(isinstance(x, dict) for x in seq):
+                    raise ValueError("seq must be a list of kick objects")
+                self._send(200, live_prediction(**body))
+            elif self.path == "/append":
+                rows = self._body().get("rows") or []
+                if rows:
+                    # append_rows takes storage's cross-process write lock itself
+                    append_rows(pd.DataFrame(rows))
+                self._send(200, {"rows": len(rows)})
+            else:
+                self._send(404, {"error": f"unknown path {self.path}"})
+        except (ValueError, TypeError, KeyError) as e:
+            self._send(400, {"error": str(e)})
+        except Exception as e:
+            self._fail(e)
+
+    def log_message(self, format, *args):
+        # one line per request on stderr is too much under load
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def make_server(host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """
+    Bound server with a warm model; call serve_forever() on it.
+    """
+    get_model()
+    return _Server((host, port), _Handler)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Headless Penalty AI prediction service.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = ap.parse_args()
+
+    server = make_server(args.host, args.port)
+    print(f"serving on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,31 @@
 # storage.py
 from __future__ import annotations
 
+import atexit
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
-from config import DB_PATH
+from config import (
+    DB_PATH,
+    DEFAULT_ME_NAME,
+    DEFAULT_OPP_NAME,
+    EXPORT_CHUNK_ROWS,
+    KICKLOG_PATH,
+    MODEL_MAX_K,
+    PARQUET_PATH,
+    STORAGE_BACKEND,
+)
+from model import NgramStageModel
+from summary import SUMMARY_COLS, summarize
+from timing import timed
 
 # IMPORTANT: only UI should call delete/clear, but we also add function-level admin guard.
 # This makes it harder to accidentally expose destructive ops later.
@@ -18,18 +41,117 @@ REQUIRED_COLS = [
     "order_mode",   # ME_FIRST / OPP_FIRST
     "phase",        # REG / SD
     "round_stage",  # EARLY / MID / LATE
+    "me_name",      # our side / kicker, as typed in the sidebar ('' if not recorded)
+    "opp_name",     # opponent, as typed in the sidebar ('' if not recorded)
 ]
 
 
-def load_db() -> pd.DataFrame:
-    if not DB_PATH.exists():
+# load_db hands out one shared cached frame. From pandas 3 copy-on-write is
+# always on and a shallow copy cannot write through to the cache; before that
+# callers get a deep copy (the option is not switched on process-wide)
+_SHALLOW_COPY_SAFE = int(pd.__version__.split(".")[0]) >= 3
+
+# process-wide load_db cache, shared by every session of this server
+_cache_lock = threading.Lock()
+_cache = {"key": None, "df": None}
+_cache_stats = {"hits": 0, "misses": 0}
+
+# shared n-gram model, kept in sync by the write ops below
+_model_lock = threading.Lock()
+_model = {"key": None, "model": None}
+
+# saves leave the on-disk snapshot behind; it is rewritten at most once per
+# SNAPSHOT_DELAY seconds (and at exit) rather than on every save
+SNAPSHOT_DELAY = 30.0
+_snapshot_lock = threading.Lock()
+_snapshot = {"timer": None}
+
+# per-match summary table for the database page, kept in sync the same way
+_summary_lock = threading.Lock()
+_summary = {"key": None, "table": None}
+_match_index = {"key": None, "groups": None}
+
+# cached CSV exports, one file per match_id range, rewritten when the data changes;
+# they live in a private directory (see _exports_dir) that is removed at exit
+_export_lock = threading.Lock()
+_exports = {}
+_export_dir = {"path": None}
+
+# writers in this process queue here before taking the cross-process file lock
+_write_lock = threading.Lock()
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _sqlite():
+    # imported lazily: storage_sqlite itself imports from this module
+    import storage_sqlite
+    return storage_sqlite
+
+
+def _use_sqlite() -> bool:
+    return STORAGE_BACKEND == "sqlite"
+
+
+def _parquet():
+    # imported lazily, like _sqlite(); pyarrow is only needed for this backend
+    import storage_parquet
+    return storage_parquet
+
+
+def _use_parquet() -> bool:
+    return STORAGE_BACKEND == "parquet"
+
+
+def _kicklog():
+    import storage_kicklog
+    return storage_kicklog
+
+
+def _use_kicklog() -> bool:
+    return STORAGE_BACKEND == "kicklog"
+
+
+def _data_path():
+    if _use_sqlite():
+        return _sqlite().SQLITE_PATH
+    if _use_parquet():
+        return PARQUET_PATH
+    if _use_kicklog():
+        return KICKLOG_PATH
+    return DB_PATH
+
+
+def _ends_with_newline(path) -> bool:
+    with open(path, "rb") as f:
+        if f.seek(0, os.SEEK_END) == 0:
+            return True
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def _read_csv(path) -> pd.DataFrame:
+    if not path.exists():
         return pd.DataFrame(columns=REQUIRED_COLS)
 
     try:
-        df = pd.read_csv(DB_PATH, dtype=str, encoding="utf-8-sig")
+        df = pd.read_csv(path, dtype=str, encoding="utf-8-sig")
     except Exception:
-        df = pd.read_csv(DB_PATH, dtype=str)
+        df = pd.read_csv(path, dtype=str)
+
+    if len(df) and not _ends_with_newline(path):
+        # every write ends with a newline, so a last line without one was cut
+        # short by an interrupted append, however many of its cells made it
+        df = df.iloc[:-1]
 
+    return _csv_frame(df)
+
+
+def _csv_frame(df: pd.DataFrame) -> pd.DataFrame:
     for c in REQUIRED_COLS:
         if c not in df.columns:
             df[c] = ""
@@ -40,49 +162,677 @@ def load_db() -> pd.DataFrame:
     return df[REQUIRED_COLS]
 
 
-def append_rows(df_new: pd.DataFrame):
-    df = load_db()
+def _iter_csv(path, chunk_rows: int):
+    """
+    _read_csv in pieces of chunk_rows rows, for exports that must not hold the
+    whole file. The torn-last-line check runs on the final piece.
+    """
+    if not path.exists():
+        return
+    try:
+        reader = pd.read_csv(path, dtype=str, encoding="utf-8-sig", chunksize=chunk_rows)
+        chunk = next(reader, None)
+    except Exception:
+        reader = pd.read_csv(path, dtype=str, chunksize=chunk_rows)
+        chunk = next(reader, None)
+
+    # one piece of lookahead, so the last one is known before it is yielded
+    for nxt in reader:
+        yield _csv_frame(chunk)
+        chunk = nxt
+    if chunk is None:
+        return
+    if len(chunk) and not _ends_with_newline(path):
+        chunk = chunk.iloc[:-1]
+    yield _csv_frame(chunk)
+
+
+def _lock_path():
+    path = _data_path()
+    return path.with_name(path.name + ".lock")
+
+
+@contextlib.contextmanager
+def _db_write_lock():
+    """
+    Exclusive lock for one mutation of the database, across threads and
+    processes (every Streamlit server / service.py on this data directory).
+    Held for the whole read-modify-write, including the in-memory model and summary.
+    """
+    with _write_lock, open(_lock_path(), "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    # LK_LOCK itself retries for ~10 s before giving up
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _data_key() -> tuple:
+    path = _data_path()
+    if _use_parquet():
+        # a directory: its mtime plus the size of the files in it
+        st = _parquet().stat_key(path)
+        return (str(path), *(st or (None, None)))
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return (str(path), None, None)
+    return (str(path), st.st_mtime_ns, st.st_size)
+
+
+def _invalidate_cache():
+    with _cache_lock:
+        _cache["key"] = None
+        _cache["df"] = None
+
+
+def cache_stats() -> dict:
+    with _cache_lock:
+        return dict(_cache_stats)
+
+
+def _load_backend() -> pd.DataFrame:
+    if _use_sqlite():
+        return _sqlite().load_db()
+    if _use_parquet():
+        return _parquet().load_db()
+    if _use_kicklog():
+        return _kicklog().load_db()
+    return _read_csv(DB_PATH)
+
+
+def _read_stable(read):
+    """
+    (key, read()) where key is the data key the result was read at: the key is
+    taken on both sides of the read, and the read repeated until they agree, so
+    a write landing mid-read is never tagged with the key from before it.
+    """
+    key = _data_key()
+    while True:
+        out = read()
+        after = _data_key()
+        if after == key:
+            return key, out
+        key = after
+
+
+def _load_db_keyed() -> tuple[tuple, pd.DataFrame]:
+    # load_db plus the data key of the frame it returns
+    with _cache_lock:
+        key = _data_key()
+        if _cache["key"] != key:
+            _cache_stats["misses"] += 1
+            # parse under the lock so concurrent reruns share one read
+            key, _cache["df"] = _read_stable(_load_backend)
+            _cache["key"] = key
+        else:
+            _cache_stats["hits"] += 1
+        return key, _cache["df"].copy(deep=not _SHALLOW_COPY_SAFE)
+
+
+@timed("load_db")
+def load_db() -> pd.DataFrame:
+    """
+    Return the whole database. The parsed frame is cached per process and
+    keyed on (path, mtime_ns, size); treat the result as read-only.
+    The parquet and kicklog backends return the same columns with compact dtypes
+    (category enums, int16 kick_index, int8 is_goal).
+    """
+    return _load_db_keyed()[1]
+
+
+def _snapshot_path():
+    # full file name, suffix included: penalties.csv / .sqlite3 / .parquet / .kicks
+    # each get their own snapshot instead of overwriting one shared by the stem
+    path = _data_path()
+    return path.with_name(path.name + ".model.npz")
+
+
+def _fingerprint(key: tuple) -> str:
+    # which backend and file the counts came from, and that file's mtime/size (its version)
+    return json.dumps([STORAGE_BACKEND, str(Path(key[0]).resolve()), key[1], key[2]])
+
+
+def _save_snapshot(m: NgramStageModel, key: tuple):
+    try:
+        m.save(_snapshot_path(), _fingerprint(key))
+    except OSError:
+        # read-only deployments just rebuild on the next cold start
+        pass
+
+
+def _flush_snapshot():
+    # write the shared model's snapshot, if it still matches the data on disk
+    with _snapshot_lock:
+        timer, _snapshot["timer"] = _snapshot["timer"], None
+    if timer is not None:
+        timer.cancel()
+    with _model_lock:
+        m, key = _model["model"], _model["key"]
+        if m is not None and key == _data_key():
+            _save_snapshot(m, key)
+
+
+def _schedule_snapshot():
+    # after a save: one snapshot write SNAPSHOT_DELAY seconds out, unless one is pending
+    with _snapshot_lock:
+        if _snapshot["timer"] is None:
+            timer = threading.Timer(SNAPSHOT_DELAY, _flush_snapshot)
+            timer.daemon = True
+            timer.start()
+            _snapshot["timer"] = timer
+
+
+def _flush_pending_snapshot():
+    if _snapshot["timer"] is not None:
+        _flush_snapshot()
+
+
+atexit.register(_flush_pending_snapshot)
+
+
+def get_model(max_k: int = MODEL_MAX_K) -> NgramStageModel:
+    """
+    Shared NgramStageModel built on the whole database. Saves and deletes made
+    through this module update it in place; anything else that changes the
+    data (another process, a manual edit) triggers a rebuild on the next call.
+    A cold process starts from the on-disk snapshot when it still matches the data;
+    the snapshot is written after a build and, SNAPSHOT_DELAY seconds behind, after saves.
+    """
+    key = _data_key()
+    with _model_lock:
+        m = _model["model"]
+        if m is None or _model["key"] != key or m.max_k < max_k:
+            m = NgramStageModel.load(_snapshot_path(), _fingerprint(key), max_k=max_k)
+            if m is None:
+                # tagged with the key of the data actually counted: a save that lands
+                # first must not be added again by its _sync_model
+                if _use_kicklog():
+                    # straight from the memory-mapped records, no DataFrame
+                    key, m = _read_stable(lambda: _kicklog().build_model(max_k))
+                else:
+                    key, df = _load_db_keyed()
+                    m = NgramStageModel(df)
+                    m.build(max_k=max_k)
+                _save_snapshot(m, key)
+            _model["key"] = key
+            _model["model"] = m
+        return m
 
+
+def _sync_written(pre_key: tuple, added: pd.DataFrame | None = None, removed: pd.DataFrame | None = None):
+    """
+    _sync_model + _sync_summary after a write that has already committed. The
+    rows are on disk by then, so a failure here must not fail the save: the
+    in-memory copy is dropped instead and rebuilt from disk on next use.
+    """
+    try:
+        _sync_model(pre_key, added=added, removed=removed)
+    except Exception:
+        with _model_lock:
+            _model["model"] = None
+    try:
+        _sync_summary(pre_key, added=added, removed=removed)
+    except Exception:
+        with _summary_lock:
+            _summary["table"] = None
+
+
+def _sync_model(pre_key: tuple, added: pd.DataFrame | None = None, removed: pd.DataFrame | None = None):
+    """
+    Apply one write to the shared model: subtract the complete matches in
+    `removed`, then add the complete matches in `added`. If the model did not
+    reflect the data as it was before the write, drop it instead.
+    """
+    with _model_lock:
+        m = _model["model"]
+        if m is None:
+            return
+        if _model["key"] != pre_key:
+            _model["model"] = None
+            return
+        if removed is not None and len(removed):
+            m.remove(removed)
+        if added is not None and len(added):
+            m.update(added)
+        _model["key"] = _data_key()
+    _schedule_snapshot()
+
+
+@timed("match_summaries")
+def match_summaries() -> pd.DataFrame:
+    """
+    One row per match (match_id, score, kicks, order_mode, opp_name, rows), sorted by
+    match_id. Saves and deletes made through this module patch it in place;
+    any other change to the data rebuilds it on the next call. Read-only.
+    """
+    key = _data_key()
+    with _summary_lock:
+        if _summary["table"] is None or _summary["key"] != key:
+            # keyed on the data actually summarized, as in get_model
+            if _use_kicklog():
+                key, table = _read_stable(_kicklog().summaries)
+            else:
+                key, df = _load_db_keyed()
+                table = summarize(df)
+            _summary["table"] = table
+            _summary["key"] = key
+        return _summary["table"]
+
+
+def _splice_sorted(t: pd.DataFrame, gone, rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    The summary table t (sorted by match_id) without the matches in `gone` and
+    with `rows` (summarize output, sorted) at their sorted positions. Positions
+    come from searchsorted, so a save costs a few slices, not a re-sort.
+    """
+    ids = t["match_id"]
+    gone = np.asarray(sorted(gone), dtype=object)
+    at = ids.searchsorted(gone)
+    found = at < len(ids)
+    drop = at[found][ids.iloc[at[found]].to_numpy() == gone[found]]
+    ins = ids.searchsorted(rows["match_id"].to_numpy(dtype=object))
+
+    # (position, 0 = insert rows[i] before it / 1 = drop it, i); inserts go first at a tie
+    events = sorted([(int(p), 0, i) for i, p in enumerate(ins)] + [(int(p), 1, -1) for p in drop])
+    pieces, prev = [], 0
+    for p, kind, i in events:
+        pieces.append(t.iloc[prev:p])
+        if kind == 0:
+            pieces.append(rows.iloc[i:i + 1])
+            prev = p
+        else:
+            prev = p + 1
+    pieces.append(t.iloc[prev:])
+    pieces = [x for x in pieces if len(x)]
+    if not pieces:
+        return t.iloc[:0]
+    return pd.concat(pieces, ignore_index=True)
+
+
+def _sync_summary(pre_key: tuple, added: pd.DataFrame | None = None, removed: pd.DataFrame | None = None):
+    # same contract as _sync_model: drop the matches in `removed`, (re)summarize those in `added`
+    with _summary_lock:
+        t = _summary["table"]
+        if t is None:
+            return
+        if _summary["key"] != pre_key:
+            _summary["table"] = None
+            return
+        gone = set()
+        for part in (removed, added):
+            if part is not None and len(part):
+                gone.update(part["match_id"].dropna().unique())
+        rows = summarize(added) if added is not None and len(added) else t.iloc[:0]
+        if gone or len(rows):
+            t = _splice_sorted(t, gone, rows[SUMMARY_COLS])
+        _summary["table"] = t[SUMMARY_COLS]
+        _summary["key"] = _data_key()
+
+
+def load_match(match_id: str) -> pd.DataFrame:
+    """
+    One match's kicks, sorted by kick_index. The match_id -> rows index is
+    built once per data version, so repeated lookups do not scan the database.
+    """
+    key, df = _load_db_keyed()
+    with _summary_lock:
+        if _match_index["key"] != key:
+            _match_index["groups"] = df.groupby("match_id").indices
+            _match_index["key"] = key
+        pos = _match_index["groups"].get(str(match_id))
+    if pos is None:
+        return df.iloc[:0]
+    return df.iloc[pos].sort_values("kick_index")
+
+
+def _match_rows(df: pd.DataFrame, match_ids) -> pd.DataFrame:
+    return df[df["match_id"].isin(list(match_ids))]
+
+
+def _blank_default_names(df: pd.DataFrame) -> pd.DataFrame:
+    # the sidebar's placeholder names are not names: stored as '', so unnamed
+    # matches do not all land in one made-up "OPP" opponent profile
+    for c, default in (("me_name", DEFAULT_ME_NAME), ("opp_name", DEFAULT_OPP_NAME)):
+        name = df[c].astype(str).str.strip()
+        df[c] = df[c].mask(name == default, "")
+    return df
+
+
+def _normalize_rows(df_new: pd.DataFrame) -> pd.DataFrame:
+    df_new = df_new.copy()
     for c in REQUIRED_COLS:
         if c not in df_new.columns:
             df_new[c] = ""
 
+    _blank_default_names(df_new)
+    # match_id is text on disk; an int id (e.g. from service /append) must compare equal to it
+    ids = df_new["match_id"]
+    df_new["match_id"] = ids.where(ids.isna(), ids.astype(str))
     df_new["kick_index"] = pd.to_numeric(df_new["kick_index"], errors="coerce").fillna(0).astype(int)
     df_new["is_goal"] = pd.to_numeric(df_new["is_goal"], errors="coerce").fillna(0).astype(int)
+    return df_new[REQUIRED_COLS]
+
+
+def _read_header() -> tuple[list[str], str]:
+    """
+    Return (columns, line_terminator) of the existing CSV header line.
+    """
+    with open(DB_PATH, "rb") as f:
+        line = f.readline()
+    term = "\r\n" if line.endswith(b"\r\n") else "\n"
+    text = line.decode("utf-8-sig", errors="replace").rstrip("\r\n")
+    return text.split(","), term
+
+
+def _atomic_write_csv(df: pd.DataFrame):
+    # write to a temp file next to DB_PATH, then rename over it (callers hold _db_write_lock)
+    tmp = DB_PATH.with_name(DB_PATH.name + ".tmp")
+    df.to_csv(tmp, index=False, encoding="utf-8-sig")
+    with open(tmp, "rb+") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, DB_PATH)
+
+
+def _append_bytes(payload: bytes):
+    """
+    Append payload to DB_PATH as one unit: a torn tail left by an earlier crash
+    is cut off first, and a failed write is truncated back to the old size.
+    """
+    with open(DB_PATH, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size > 0:
+            f.seek(size - 1)
+            if f.read(1) != b"\n":
+                # half-written last line from a crash: drop it
+                start = max(0, size - 4096)
+                f.seek(start)
+                tail = f.read()
+                size = start + tail.rfind(b"\n") + 1
+                f.truncate(size)
+                f.seek(size)
+        try:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        except BaseException:
+            f.truncate(size)
+            raise
+
+
+def _append_csv(df_new: pd.DataFrame):
+    if not DB_PATH.exists() or DB_PATH.stat().st_size == 0:
+        _atomic_write_csv(df_new)
+        return
+
+    cols, term = _read_header()
+    if cols != REQUIRED_COLS:
+        # old column layout: rewrite once so later saves can append
+        out = pd.concat([load_db(), df_new], ignore_index=True)
+        _atomic_write_csv(out)
+        return
+
+    payload = df_new.to_csv(index=False, header=False, lineterminator=term).encode("utf-8")
+    if payload and not payload.endswith(b"\n"):
+        # _read_csv drops a last line without a newline as torn
+        payload += term.encode("ascii")
+    _append_bytes(payload)
+
+
+def append_rows(df_new: pd.DataFrame):
+    """
+    Append one match's kicks. Only the new rows are normalised and written;
+    the existing file is never re-read unless its header predates REQUIRED_COLS.
+    """
+    df_new = _normalize_rows(df_new)
+
+    with _db_write_lock():
+        pre_key = _data_key()
+        # saving under an existing match_id extends that match: recount it whole
+        m = _model["model"]
+        t = _summary["table"]
+        if m is not None and m.match_ids is None:
+            # a model loaded from its snapshot does not know its match_ids: the summary does
+            t = match_summaries()
+        ids = df_new["match_id"].dropna()
+        old = None
+        if (m is not None and m.match_ids and m.match_ids.intersection(ids)) or (t is not None and t["match_id"].isin(ids).any()):
+            old = _match_rows(load_db(), df_new["match_id"].unique())
+
+        try:
+            if _use_sqlite():
+                _sqlite().append_rows(df_new)
+            elif _use_parquet():
+                _parquet().append_rows(df_new)
+            elif _use_kicklog():
+                _kicklog().append_rows(df_new)
+            else:
+                _append_csv(df_new)
+        finally:
+            _invalidate_cache()
 
-    out = pd.concat([df, df_new[REQUIRED_COLS]], ignore_index=True)
-    out.to_csv(DB_PATH, index=False, encoding="utf-8-sig")
+        if old is None:
+            _sync_written(pre_key, added=df_new)
+        else:
+            _sync_written(pre_key, added=pd.concat([old, df_new], ignore_index=True), removed=old)
 
 
 # ---- destructive ops (admin only) ----
 def clear_db():
     require_admin()
-    if DB_PATH.exists():
-        DB_PATH.unlink(missing_ok=True)
+    with _db_write_lock():
+        try:
+            if _use_sqlite():
+                _sqlite().clear_db()
+            elif _use_parquet():
+                _parquet().clear_db()
+            elif _use_kicklog():
+                _kicklog().clear_db()
+            elif DB_PATH.exists():
+                DB_PATH.unlink(missing_ok=True)
+        finally:
+            _invalidate_cache()
+        with _model_lock:
+            # rebuilding from an empty database is free
+            _model["model"] = None
+        with _summary_lock:
+            _summary["table"] = None
 
 
 def delete_match(match_id: str):
     require_admin()
-    df = load_db()
-    df = df[df["match_id"] != str(match_id)]
-    df.to_csv(DB_PATH, index=False, encoding="utf-8-sig")
+    with _db_write_lock():
+        pre_key = _data_key()
+        df = load_db()
+        removed = _match_rows(df, [str(match_id)])
+        try:
+            if _use_sqlite():
+                _sqlite().delete_match(str(match_id))
+            elif _use_parquet():
+                _parquet().delete_match(str(match_id))
+            elif _use_kicklog():
+                _kicklog().delete_match(str(match_id))
+            else:
+                _atomic_write_csv(df[df["match_id"] != str(match_id)])
+        finally:
+            _invalidate_cache()
+        _sync_written(pre_key, removed=removed)
 
 
 def delete_last_n(n: int):
     require_admin()
-    df = load_db()
     if n <= 0:
         return
-    if len(df) <= n:
-        if DB_PATH.exists():
-            DB_PATH.unlink(missing_ok=True)
-        return
-    df = df.iloc[:-n].copy()
-    df.to_csv(DB_PATH, index=False, encoding="utf-8-sig")
+    with _db_write_lock():
+        pre_key = _data_key()
+        df = load_db()
+        kept = df.iloc[:-n]
+        # matches cut by the deletion are recounted from their remaining kicks
+        touched = df.iloc[-n:]["match_id"].unique()
+        try:
+            if _use_sqlite():
+                _sqlite().delete_last_n(int(n))
+            elif _use_parquet():
+                _parquet().delete_last_n(int(n))
+            elif _use_kicklog():
+                _kicklog().delete_last_n(int(n))
+            elif len(df) <= n:
+                DB_PATH.unlink(missing_ok=True)
+            else:
+                _atomic_write_csv(kept)
+        finally:
+            _invalidate_cache()
+        _sync_written(pre_key, added=_match_rows(kept, touched), removed=_match_rows(df, touched))
+
+
+def _iter_backend(chunk_rows: int):
+    if _use_sqlite():
+        return _sqlite().iter_chunks(chunk_rows)
+    if _use_parquet():
+        return _parquet().iter_chunks(chunk_rows)
+    if _use_kicklog():
+        return _kicklog().iter_chunks(chunk_rows)
+    return _iter_csv(DB_PATH, chunk_rows)
+
+
+def _in_range(df: pd.DataFrame, match_from: str | None, match_to: str | None) -> pd.DataFrame:
+    # inclusive match_id range, compared as strings; rows without a match_id only pass an open range
+    if not match_from and not match_to:
+        return df
+    mid = df["match_id"]
+    keep = mid.notna()
+    if match_from:
+        keep &= mid.astype(str) >= match_from
+    if match_to:
+        keep &= mid.astype(str) <= match_to
+    return df[keep]
+
+
+def iter_csv_chunks(
+    match_from: str | None = None,
+    match_to: str | None = None,
+    chunk_rows: int = EXPORT_CHUNK_ROWS,
+    admin_only: bool = True,
+):
+    """
+    The database (optionally only match_ids in [match_from, match_to]) as CSV
+    bytes, chunk_rows rows at a time, read straight from the backend instead
+    of load_db. Joined, the chunks equal export_csv_bytes(). Writes that land
+    mid-iteration may or may not show up; export_csv_path re-reads until none did.
+    """
+    if admin_only:
+        require_admin()
+
+    def chunks():
+        header = True
+        for df in _iter_backend(chunk_rows):
+            df = _in_range(df, match_from, match_to)
+            if not header and len(df) == 0:
+                continue
+            text = df.to_csv(index=False, header=header)
+            # utf-8-sig: BOM once, in front of the header
+            yield text.encode("utf-8-sig" if header else "utf-8")
+            header = False
+        if header:
+            yield pd.DataFrame(columns=REQUIRED_COLS).to_csv(index=False).encode("utf-8-sig")
+
+    return chunks()
+
+
+def _exports_dir() -> Path:
+    """
+    This process's export directory: made on first use by tempfile.mkdtemp
+    (mode 0700, so other local users cannot read the copies of the database)
+    and removed with its files at exit. Callers hold _export_lock.
+    """
+    if _export_dir["path"] is None:
+        path = Path(tempfile.mkdtemp(prefix="penalty_ai_exports_"))
+        atexit.register(shutil.rmtree, path, ignore_errors=True)
+        _export_dir["path"] = path
+    return _export_dir["path"]
+
+
+def export_csv_path(match_from: str | None = None, match_to: str | None = None, admin_only: bool = True) -> Path:
+    """
+    A CSV file with the export, written chunk by chunk so memory stays bounded.
+    Cached per (data version, range): the file is only rewritten once the data
+    has changed. Read it, do not modify it.
+    """
+    if admin_only:
+        require_admin()
+    with _export_lock:
+        rng = (match_from or None, match_to or None)
+        key = _data_key()
+        hit = _exports.get(rng)
+        if hit is not None and hit[0] == key and hit[1].exists():
+            return hit[1]
+
+        tmp = _exports_dir() / "export.tmp"
+
+        def write():
+            with open(tmp, "wb") as f:
+                for chunk in iter_csv_chunks(*rng, admin_only=False):
+                    f.write(chunk)
+
+        # no write lock: saves go on while the file is written, and _read_stable
+        # writes it again if one landed, so the file is a single version of the data
+        key, _ = _read_stable(write)
+        name = hashlib.sha1(json.dumps([key, rng]).encode("utf-8")).hexdigest()[:16]
+        path = tmp.with_name(f"penalties-{name}.csv")
+        os.replace(tmp, path)
+
+        # files made from an older version of the data are dead: drop them all
+        for r, (k, p) in list(_exports.items()):
+            if k != key or r == rng:
+                if p != path:
+                    p.unlink(missing_ok=True)
+                del _exports[r]
+        _exports[rng] = (key, path)
+        return path
+
+
+def deferred_export_csv(match_from: str | None = None, match_to: str | None = None, admin_only: bool = True):
+    """
+    Check permissions now and export later: a no-argument callable returning
+    the CSV bytes, for st.download_button(data=...), which only calls it on
+    click (on another thread, where the session's admin flag is not visible).
+    Building the file is bounded by EXPORT_CHUNK_ROWS, but Streamlit keeps
+    every download in memory, so the finished CSV is held once while served.
+    """
+    if admin_only:
+        require_admin()
+    return lambda: export_csv_path(match_from, match_to, admin_only=False).read_bytes()
+
+
+def export_csv_bytes(admin_only: bool = True, match_from: str | None = None, match_to: str | None = None) -> bytes:
+    if admin_only:
+        require_admin()
+    return export_csv_path(match_from, match_to, admin_only=False).read_bytes()
+
+
+def export_summary_csv_bytes(admin_only: bool = True) -> bytes:
+    # one row per match, from the maintained summary table
+    if admin_only:
+        require_admin()
+    return match_summaries().to_csv(index=False).encode("utf-8-sig")
 
 
-def export_csv_bytes(admin_only: bool = True) -> bytes:
+def deferred_export_summary_csv(admin_only: bool = True):
+    # as deferred_export_csv, for the per-match summary
     if admin_only:
         require_admin()
-    df = load_db()
-    return df.to_csv(index=False).encode("utf-8-sig")
+    return lambda: export_summary_csv_bytes(admin_only=False)
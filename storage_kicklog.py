@@ -0,0 +1,357 @@
+# storage_kicklog.py
+"""
+Binary kick-log backend for storage.py (config.STORAGE_BACKEND = "kicklog").
+
+KICKLOG_PATH holds one fixed-width RECORD per kick in append order, and is
+read as a NumPy structured array over np.memmap, so nothing is parsed.
+match_id is interned: a record stores its line number in the "<log>.ids"
+file next to the log. That file only grows: a deleted match keeps its number,
+and saving it again reuses it. Each line is "match_id<TAB>me_name<TAB>opp_name";
+the names are per match, taken from the first save of that match_id (lines
+written before the names existed hold the id alone). The other text columns
+are stored as their index in VALUES. Anything else (blank or unknown) is
+stored as MISSING and reads back as NaN.
+
+get_model and match_summaries are built straight from the records
+(build_model, summaries). load_db only turns them into the REQUIRED_COLS
+frame (category enums, int16 kick_index, int8 is_goal, like the parquet
+backend) when a page needs rows.
+
+An append writes the new match_ids to the .ids file and then one record per
+kick. Deletes rewrite the log. Admin checks, row normalisation and locking
+stay in storage.py.
+
+One-shot conversion of data/penalties.csv:
+
+    python storage_kicklog.py
+"""
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from config import DB_PATH, DIRS, KICKLOG_PATH
+from model import STAGES, WHOS, NgramStageModel, _encode_codes
+from storage import REQUIRED_COLS, _read_csv
+from summary import _summarize_codes
+
+NO_MATCH = 0xFFFFFFFF
+MISSING = 255
+
+VALUES = {
+    "who_kicked": WHOS,
+    "kicker_dir": DIRS,
+    "keeper_dir": DIRS,
+    "order_mode": ["ME_FIRST", "OPP_FIRST"],
+    "phase": ["REG", "SD"],
+    "round_stage": STAGES,
+}
+
+# 13 bytes per kick, no padding
+RECORD = np.dtype(
+    [
+        ("match", "<u4"),        # line of the .ids file, NO_MATCH if blank
+        ("kick_index", "<i2"),
+        ("who_kicked", "u1"),    # this and the other text columns: index into VALUES
+        ("kicker_dir", "u1"),
+        ("keeper_dir", "u1"),
+        ("is_goal", "u1"),       # 0/1
+        ("order_mode", "u1"),
+        ("phase", "u1"),
+        ("round_stage", "u1"),
+    ]
+)
+
+
+def _ids_path(path=None):
+    path = path or KICKLOG_PATH
+    return path.with_name(path.name + ".ids")
+
+
+def open_log(path=None) -> np.ndarray:
+    """
+    The records as a read-only memmap. A torn trailing record (a crash mid-append)
+    is left out. Open the log before read_ids: ids are written first, so every
+    record seen then has its id.
+    """
+    path = path or KICKLOG_PATH
+    try:
+        n = os.path.getsize(path) // RECORD.itemsize
+    except FileNotFoundError:
+        n = 0
+    if n == 0:
+        return np.zeros(0, dtype=RECORD)
+    return np.memmap(path, dtype=RECORD, mode="r", shape=(n,))
+
+
+def read_matches(path=None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (match_ids, me_names, opp_names) of the interned matches as object arrays,
+    NaN for a blank name; records["match"] indexes into all three.
+    """
+    try:
+        with open(_ids_path(path), "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        data = b""
+    # a line without its newline was cut short by a crash, and no record uses it
+    lines = data[:data.rfind(b"\n") + 1].decode("utf-8").split("\n")[:-1]
+    fields = [(line.split("\t") + ["", ""])[:3] for line in lines]
+    cols = [np.array([f[i] for f in fields], dtype=object) for i in range(3)]
+    for names in cols[1:]:
+        names[names == ""] = np.nan
+    return cols[0], cols[1], cols[2]
+
+
+def read_ids(path=None) -> np.ndarray:
+    """
+    Interned match_ids as an object array; records["match"] indexes into it.
+    """
+    return read_matches(path)[0]
+
+
+def _name(value) -> str:
+    # names share a line with the id: no tabs or line breaks
+    if pd.isna(value):
+        return ""
+    return str(value).replace("\t", " ").replace("\r", " ").replace("\n", " ").strip()
+
+
+def _codes(rec: np.ndarray, col: str) -> np.ndarray:
+    # uint8 field -> int64 with -1 for MISSING, as pd.Categorical(...).codes
+    c = rec[col].astype(np.int64)
+    c[c == MISSING] = -1
+    return c
+
+
+def _match_codes(rec: np.ndarray) -> np.ndarray:
+    m = rec["match"].astype(np.int64)
+    m[m == NO_MATCH] = -1
+    return m
+
+
+def _decode(codes: np.ndarray, values) -> np.ndarray:
+    # object array, NaN where the code is -1
+    table = np.array([*values, np.nan], dtype=object)
+    return table[np.where(codes < 0, len(values), codes)]
+
+
+def _records(df: pd.DataFrame, index: dict) -> tuple[np.ndarray, list[str]]:
+    """
+    Pack df into RECORDs, interning match_ids through index (id -> number,
+    updated in place). Returns (records, .ids lines for the ids new to the
+    index, in number order).
+    """
+    rec = np.zeros(len(df), dtype=RECORD)
+
+    mid = df["match_id"]
+    ok = (mid.notna() & (mid.astype(str) != "")).to_numpy()
+    match = np.full(len(df), NO_MATCH, dtype=np.uint32)
+    new = []
+    if ok.any():
+        inv, uniq = pd.factorize(mid[ok].astype(str))
+        first = np.flatnonzero(ok)[np.unique(inv, return_index=True)[1]]
+        nums = np.empty(len(uniq), dtype=np.uint32)
+        for i, m in enumerate(uniq):
+            if m not in index:
+                if "\n" in m or "\r" in m or "\t" in m:
+                    raise ValueError(f"match_id {m!r} contains a tab or line break")
+                index[m] = len(index)
+                me, opp = df["me_name"].iloc[first[i]], df["opp_name"].iloc[first[i]]
+                new.append(f"{m}\t{_name(me)}\t{_name(opp)}")
+            nums[i] = index[m]
+        match[ok] = nums[inv]
+    rec["match"] = match
+
+    kick_index = pd.to_numeric(df["kick_index"], errors="coerce").fillna(0).to_numpy()
+    rec["kick_index"] = np.clip(kick_index, -(2 ** 15), 2 ** 15 - 1)
+    rec["is_goal"] = pd.to_numeric(df["is_goal"], errors="coerce").fillna(0).to_numpy() > 0
+    for col, values in VALUES.items():
+        c = pd.Categorical(df[col], categories=values).codes.astype(np.int64)
+        rec[col] = np.where(c < 0, MISSING, c)
+    return rec, new
+
+
+def _append(path, payload: bytes, unit: int | None):
+    """
+    Append payload to path as one unit. A torn tail from an earlier crash is
+    cut off first: a partial record (unit = record size) or an id line with
+    no newline (unit = None). A failed write is truncated back.
+    """
+    with open(path, "ab+") as f:
+        size = f.seek(0, os.SEEK_END)
+        if unit:
+            keep = size - size % unit
+        else:
+            start = max(0, size - 4096)
+            f.seek(start)
+            tail = f.read()
+            keep = size if tail.endswith(b"\n") or not tail else start + tail.rfind(b"\n") + 1
+        if keep != size:
+            f.truncate(keep)
+        try:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        except BaseException:
+            f.truncate(keep)
+            raise
+
+
+def _rewrite(rec: np.ndarray, path=None):
+    # temp file + rename, like storage._atomic_write_csv; rec must not be a view of the log
+    path = path or KICKLOG_PATH
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(rec.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_db(path=None) -> pd.DataFrame:
+    rec = open_log(path)
+    return _frame(rec, read_matches(path))
+
+
+def iter_chunks(chunk_rows: int, path=None):
+    # load_db one slice of the memmap at a time
+    rec = open_log(path)
+    matches = read_matches(path)
+    for start in range(0, len(rec), chunk_rows):
+        yield _frame(rec[start:start + chunk_rows], matches)
+
+
+def _per_match(match: np.ndarray, values: np.ndarray) -> pd.Categorical:
+    # a per-match column spread over the records, without building one string per row
+    codes, uniq = pd.factorize(values)
+    row_codes = np.where(match < 0, -1, codes[np.maximum(match, 0)]) if len(codes) else np.full(len(match), -1)
+    return pd.Categorical.from_codes(row_codes, categories=uniq)
+
+
+def _frame(rec: np.ndarray, matches: tuple) -> pd.DataFrame:
+    ids, me_names, opp_names = matches
+    match = _match_codes(rec)
+    df = pd.DataFrame(
+        {
+            "match_id": _decode(match, ids),
+            "kick_index": rec["kick_index"].astype(np.int16),
+            **{c: pd.Categorical.from_codes(_codes(rec, c), categories=v) for c, v in VALUES.items()},
+            "is_goal": rec["is_goal"].astype(np.int8),
+            "me_name": _per_match(match, me_names),
+            "opp_name": _per_match(match, opp_names),
+        }
+    )
+    return df[REQUIRED_COLS]
+
+
+def build_model(max_k: int, path=None) -> NgramStageModel:
+    """
+    NgramStageModel(load_db()).build(max_k) without the DataFrame: the record
+    fields go straight into model._encode_codes.
+    """
+    rec = open_log(path)
+    ids, _, opp_names = read_matches(path)
+    enc = _encode_codes(
+        _match_codes(rec),
+        ids,
+        rec["kick_index"],
+        _codes(rec, "who_kicked"),
+        _codes(rec, "round_stage"),
+        _codes(rec, "kicker_dir"),
+        _codes(rec, "keeper_dir"),
+        rec["is_goal"],
+        max_k,
+        with_keeper=True,
+    )
+    opponents = pd.Series(opp_names, index=ids).dropna()
+    return NgramStageModel.from_encoded(enc, max_k, opponents)
+
+
+def summaries(path=None) -> pd.DataFrame:
+    """
+    summary.summarize(load_db()) straight from the records.
+    """
+    rec = open_log(path)
+    ids, _, opp_names = read_matches(path)
+    match = _match_codes(rec)
+    ok = match >= 0
+    rec = rec[ok]
+
+    # renumber the interned ids in match_id order so the table comes out sorted
+    by_id = np.argsort(ids, kind="stable")
+    rank = np.empty(len(ids), dtype=np.int64)
+    rank[by_id] = np.arange(len(ids))
+    who = _codes(rec, "who_kicked")
+    return _summarize_codes(
+        rank[match[ok]],
+        ids[by_id],
+        who == WHOS.index("ME"),
+        who == WHOS.index("OPP"),
+        rec["is_goal"].astype(np.int64),
+        rec["kick_index"].astype(np.int64),
+        _decode(_codes(rec, "order_mode"), VALUES["order_mode"]),
+        opp_names[match[ok]],
+    )
+
+
+def _write_rows(df: pd.DataFrame, path=None):
+    # ids first: a record is never on disk before its match_id
+    path = path or KICKLOG_PATH
+    index = {m: i for i, m in enumerate(read_ids(path))}
+    rec, new = _records(df, index)
+    if new:
+        _append(_ids_path(path), "".join(line + "\n" for line in new).encode("utf-8"), None)
+    _append(path, rec.tobytes(), RECORD.itemsize)
+
+
+def append_rows(df_new: pd.DataFrame):
+    _write_rows(df_new)
+
+
+def clear_db():
+    KICKLOG_PATH.unlink(missing_ok=True)
+    _ids_path().unlink(missing_ok=True)
+
+
+def delete_match(match_id: str):
+    ids = read_ids().tolist()
+    if match_id not in ids:
+        return
+    rec = open_log()
+    _rewrite(rec[rec["match"] != ids.index(match_id)])
+
+
+def delete_last_n(n: int):
+    if n <= 0:
+        return
+    rec = open_log()
+    if len(rec) <= n:
+        clear_db()
+    else:
+        _rewrite(np.array(rec[:-n]))
+
+
+# ---- one-shot conversion ----
+def convert(csv_path=None, log_path=None) -> int:
+    """
+    Append the CSV rows to the log. Matches whose match_id is already in the
+    log are skipped, so re-running is harmless. Returns the number of rows written.
+    """
+    csv_path = csv_path or DB_PATH
+    log_path = log_path or KICKLOG_PATH
+
+    df = _read_csv(csv_path)
+    rec = open_log(log_path)
+    ids = read_ids(log_path)
+    seen = set(ids[np.unique(rec["match"][rec["match"] != NO_MATCH])].tolist())
+    df = df[~df["match_id"].astype(str).isin(seen)]
+    if len(df):
+        _write_rows(df, log_path)
+    return len(df)
+
+
+if __name__ == "__main__":
+    print(f"csv: {convert()} rows -> {KICKLOG_PATH}")
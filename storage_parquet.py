@@ -0,0 +1,222 @@
+# storage_parquet.py
+"""
+Parquet backend for storage.py (config.STORAGE_BACKEND = "parquet").
+
+PARQUET_PATH is a directory of Parquet files, read back with compact dtypes:
+the enum columns (who_kicked, kicker_dir, keeper_dir, order_mode, phase,
+round_stage) and the names (me_name, opp_name) as pandas `category`,
+kick_index as int16 and is_goal as int8. match_id stays a string.
+load_db(columns=...) reads only the listed columns. Files written before the
+name columns existed read back with them missing (NaN).
+
+Layout:
+  base-<seq>.parquet   every row up to and including part <seq>
+  part-<seq>.parquet   one append (one saved match)
+Appends write a new part, so a save never rewrites the archive. Deletes and
+compaction (more than MAX_PARTS parts) write a new base with a higher seq;
+files it supersedes are ignored on read and removed afterwards, so a crash
+between the two steps never shows a row twice.
+
+Same semantics as the CSV backend: rows keep their append order, so
+delete_last_n still means "last N kicks saved". Admin checks, row
+normalisation and locking stay in storage.py.
+
+One-shot conversion of data/penalties.csv:
+
+    python storage_parquet.py
+"""
+from __future__ import annotations
+
+import os
+import re
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from config import DB_PATH, PARQUET_PATH
+from storage import REQUIRED_COLS, _read_csv
+
+ENUM_COLS = ["who_kicked", "kicker_dir", "keeper_dir", "order_mode", "phase", "round_stage"]
+NAME_COLS = ["me_name", "opp_name"]
+# read back as category: few distinct values each
+_DICT_COLS = ENUM_COLS + NAME_COLS
+
+# on disk: plain strings (Parquet dictionary-encodes them per column chunk anyway)
+SCHEMA = pa.schema(
+    [
+        ("match_id", pa.string()),
+        ("kick_index", pa.int16()),
+        *[(c, pa.string()) for c in ENUM_COLS[:3]],
+        ("is_goal", pa.int8()),
+        *[(c, pa.string()) for c in ENUM_COLS[3:]],
+        *[(c, pa.string()) for c in NAME_COLS],
+    ]
+)
+assert SCHEMA.names == REQUIRED_COLS
+
+# a save adds one part; past this many, the next save folds them into a new base
+MAX_PARTS = 64
+
+_FILE_RE = re.compile(r"^(base|part)-(\d+)\.parquet$")
+
+
+def _files(path=None) -> tuple[list, list]:
+    """
+    Return (live, stale): live files in read order (newest base, then the
+    parts after it), and the superseded ones left over from a rewrite.
+    """
+    path = path or PARQUET_PATH
+    try:
+        names = os.listdir(path)
+    except FileNotFoundError:
+        return [], []
+
+    found = []
+    for name in names:
+        m = _FILE_RE.match(name)
+        if m:
+            found.append((int(m.group(2)), m.group(1), path / name))
+    found.sort()
+
+    bases = [f for f in found if f[1] == "base"]
+    top = bases[-1][0] if bases else -1
+    live = ([bases[-1]] if bases else []) + [f for f in found if f[1] == "part" and f[0] > top]
+    stale = [f for f in found if f not in live]
+    return [f[2] for f in live], [f[2] for f in stale]
+
+
+def _next_seq(path=None) -> int:
+    live, stale = _files(path)
+    seqs = [int(_FILE_RE.match(p.name).group(2)) for p in live + stale]
+    return max(seqs, default=0) + 1
+
+
+def stat_key(path=None) -> tuple | None:
+    """
+    (mtime_ns of the directory, total bytes of the live files), or None if
+    there is no data yet. Every write adds, renames or removes a file.
+    """
+    path = path or PARQUET_PATH
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, sum(os.stat(p).st_size for p in _files(path)[0])
+
+
+def _table(df: pd.DataFrame) -> pa.Table:
+    df = df[REQUIRED_COLS].copy()
+    for c in ["match_id", *_DICT_COLS]:
+        # missing stays missing; anything else (ints, pandas 2 objects) becomes text
+        df[c] = df[c].where(df[c].isna(), df[c].astype(str))
+    return pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False)
+
+
+def _write(df: pd.DataFrame, kind: str, path=None):
+    path = path or PARQUET_PATH
+    path.mkdir(parents=True, exist_ok=True)
+    dest = path / f"{kind}-{_next_seq(path):010d}.parquet"
+    tmp = path / f"{dest.name}.{os.getpid()}.tmp"
+    pq.write_table(_table(df), tmp)
+    with open(tmp, "rb+") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, dest)
+
+
+def _rewrite(df: pd.DataFrame, path=None):
+    # new base first, then drop what it supersedes
+    _write(df, "base", path)
+    for p in _files(path)[1]:
+        p.unlink(missing_ok=True)
+
+
+def _complete(table: pa.Table, columns: list[str]) -> pa.Table:
+    # columns an older file does not have come back all null, typed as if read
+    for c in columns:
+        if c not in table.column_names:
+            t = pa.dictionary(pa.int32(), pa.string()) if c in _DICT_COLS else SCHEMA.field(c).type
+            table = table.append_column(c, pa.nulls(len(table), t))
+    return table.select(columns)
+
+
+def load_db(columns: list[str] | None = None, path=None) -> pd.DataFrame:
+    """
+    Rows in append order with compact dtypes. `columns` limits the read to
+    those columns (in that order); the default is all of REQUIRED_COLS.
+    """
+    columns = list(columns or REQUIRED_COLS)
+    cats = [c for c in columns if c in _DICT_COLS]
+    live = _files(path)[0]
+    if not live:
+        empty = SCHEMA.empty_table().select(columns).to_pandas()
+        return empty.astype({c: "category" for c in cats})
+
+    tables = []
+    for p in live:
+        have = set(pq.read_schema(p).names)
+        t = pq.read_table(p, columns=[c for c in columns if c in have], read_dictionary=cats)
+        tables.append(_complete(t, columns))
+    # parts carry their own dictionaries; to_pandas unifies them into one category set
+    return pa.concat_tables(tables).to_pandas()[columns]
+
+
+def iter_chunks(chunk_rows: int):
+    """
+    load_db in record batches of at most chunk_rows rows. Every live file is
+    opened up front, so a concurrent rewrite cannot pull one away mid-read.
+    """
+    files = [pq.ParquetFile(p, read_dictionary=_DICT_COLS) for p in _files()[0]]
+    for pf in files:
+        for batch in pf.iter_batches(batch_size=chunk_rows):
+            yield _complete(pa.Table.from_batches([batch]), REQUIRED_COLS).to_pandas()
+
+
+def append_rows(df_new: pd.DataFrame):
+    if len(_files()[0]) >= MAX_PARTS:
+        _rewrite(pd.concat([load_db(), df_new], ignore_index=True))
+    else:
+        _write(df_new, "part")
+
+
+def clear_db():
+    live, stale = _files()
+    for p in live + stale:
+        p.unlink(missing_ok=True)
+
+
+def delete_match(match_id: str):
+    df = load_db()
+    _rewrite(df[df["match_id"] != match_id])
+
+
+def delete_last_n(n: int):
+    if n <= 0:
+        return
+    df = load_db()
+    if len(df) <= n:
+        clear_db()
+    else:
+        _rewrite(df.iloc[:-n])
+
+
+# ---- one-shot conversion ----
+def convert(csv_path=None, parquet_path=None) -> int:
+    """
+    Copy the CSV rows into PARQUET_PATH as one new part. Matches whose match_id
+    is already there are skipped, so re-running is harmless. Returns the
+    number of rows written.
+    """
+    csv_path = csv_path or DB_PATH
+    parquet_path = parquet_path or PARQUET_PATH
+
+    df = _read_csv(csv_path)
+    seen = set(load_db(["match_id"], parquet_path)["match_id"].dropna())
+    df = df[~df["match_id"].astype(str).isin(seen)]
+    if len(df):
+        _write(df, "part", parquet_path)
+    return len(df)
+
+
+if __name__ == "__main__":
+    print(f"csv: {convert()} rows -> {PARQUET_PATH}")
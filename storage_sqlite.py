@@ -0,0 +1,189 @@
+# storage_sqlite.py
+"""
+SQLite backend for storage.py (config.STORAGE_BACKEND = "sqlite").
+
+Same semantics as the CSV backend: rows keep their append order (the
+autoincrement id), so delete_last_n still means "last N kicks saved".
+Admin checks and row normalisation stay in storage.py.
+
+One-shot migration of data/penalties.csv and the old shootouts/kicks schema:
+
+    python storage_sqlite.py
+"""
+from __future__ import annotations
+
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+from config import DB_PATH, LEGACY_SQLITE_PATH, SQLITE_PATH
+from storage import REQUIRED_COLS, _blank_default_names, _read_csv
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS penalties (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    match_id TEXT NOT NULL,
+    kick_index INTEGER NOT NULL,
+    who_kicked TEXT NOT NULL,         -- 'ME' or 'OPP'
+    kicker_dir TEXT NOT NULL,         -- L/C/R
+    keeper_dir TEXT NOT NULL,         -- L/C/R
+    is_goal INTEGER NOT NULL,         -- 0/1
+    order_mode TEXT NOT NULL,         -- ME_FIRST / OPP_FIRST
+    phase TEXT NOT NULL,              -- REG / SD
+    round_stage TEXT NOT NULL,        -- EARLY / MID / LATE
+    me_name TEXT NOT NULL DEFAULT '',
+    opp_name TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_penalties_match ON penalties(match_id);
+"""
+
+# columns added after the first schema; older databases get them on connect
+_ADDED_COLS = {
+    "me_name": "TEXT NOT NULL DEFAULT ''",
+    "opp_name": "TEXT NOT NULL DEFAULT ''",
+}
+
+_COLS_SQL = ", ".join(REQUIRED_COLS)
+_INSERT_SQL = f"INSERT INTO penalties ({_COLS_SQL}) VALUES ({', '.join('?' * len(REQUIRED_COLS))})"
+_TEXT_COLS = [c for c in REQUIRED_COLS if c not in ("kick_index", "is_goal")]
+
+
+def _connect(path=None) -> sqlite3.Connection:
+    con = sqlite3.connect(path or SQLITE_PATH)
+    con.executescript(SCHEMA)
+    have = {r[1] for r in con.execute("PRAGMA table_info(penalties)")}
+    for col, decl in _ADDED_COLS.items():
+        if col not in have:
+            try:
+                with con:
+                    con.execute(f"ALTER TABLE penalties ADD COLUMN {col} {decl}")
+            except sqlite3.OperationalError as e:
+                # another connection added it first
+                if "duplicate column" not in str(e):
+                    raise
+    return con
+
+
+def _records(df: pd.DataFrame) -> list[tuple]:
+    df = df[REQUIRED_COLS].copy()
+    df[_TEXT_COLS] = df[_TEXT_COLS].fillna("").astype(str)
+    return [
+        (r[0], int(r[1]), *r[2:5], int(r[5]), *r[6:])
+        for r in df.itertuples(index=False, name=None)
+    ]
+
+
+def _frame(df: pd.DataFrame) -> pd.DataFrame:
+    df[_TEXT_COLS] = df[_TEXT_COLS].astype(str)
+    df["kick_index"] = df["kick_index"].astype(int)
+    df["is_goal"] = df["is_goal"].astype(int)
+    return df[REQUIRED_COLS]
+
+
+def load_db() -> pd.DataFrame:
+    with closing(_connect()) as con:
+        df = pd.read_sql_query(f"SELECT {_COLS_SQL} FROM penalties ORDER BY id", con)
+    return _frame(df)
+
+
+def iter_chunks(chunk_rows: int):
+    # load_db, chunk_rows rows at a time (the cursor streams; nothing else is held)
+    with closing(_connect()) as con:
+        for df in pd.read_sql_query(f"SELECT {_COLS_SQL} FROM penalties ORDER BY id", con, chunksize=chunk_rows):
+            yield _frame(df)
+
+
+def append_rows(df_new: pd.DataFrame):
+    with closing(_connect()) as con, con:
+        con.executemany(_INSERT_SQL, _records(df_new))
+
+
+def clear_db():
+    with closing(_connect()) as con, con:
+        con.execute("DELETE FROM penalties")
+
+
+def delete_match(match_id: str):
+    # served by idx_penalties_match
+    with closing(_connect()) as con, con:
+        con.execute("DELETE FROM penalties WHERE match_id = ?", (match_id,))
+
+
+def delete_last_n(n: int):
+    if n <= 0:
+        return
+    with closing(_connect()) as con, con:
+        con.execute(
+            "DELETE FROM penalties WHERE id IN (SELECT id FROM penalties ORDER BY id DESC LIMIT ?)",
+            (n,),
+        )
+
+
+# ---- one-shot migration ----
+def _legacy_rows(legacy_path) -> pd.DataFrame:
+    """
+    Old schema: shootouts(id, my_name, opp_name, mode, ...) + kicks(shootout_id, shooter, keeper, round_no, ...).
+    Each shootout becomes match_id 'legacy<id>'; my_name / opp_name become me_name / opp_name.
+    """
+    from kicks import round_stage_from_kick_index
+
+    with closing(sqlite3.connect(legacy_path)) as con:
+        tables = {r[0] for r in con.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if not {"shootouts", "kicks"} <= tables:
+            return pd.DataFrame(columns=REQUIRED_COLS)
+        df = pd.read_sql_query(
+            """
+            SELECT k.shootout_id, k.kick_index, k.shooter, k.kicker_dir, k.keeper_dir,
+                   k.is_goal, s.mode, k.phase, s.my_name, s.opp_name
+            FROM kicks k JOIN shootouts s ON s.id = k.shootout_id
+            ORDER BY k.shootout_id, k.kick_index, k.id
+            """,
+            con,
+        )
+
+    return _blank_default_names(pd.DataFrame(
+        {
+            "match_id": "legacy" + df["shootout_id"].astype(str),
+            "kick_index": df["kick_index"].astype(int),
+            "who_kicked": df["shooter"],
+            "kicker_dir": df["kicker_dir"],
+            "keeper_dir": df["keeper_dir"],
+            "is_goal": df["is_goal"].astype(int),
+            "order_mode": df["mode"],
+            "phase": df["phase"],
+            "round_stage": [round_stage_from_kick_index(int(i)) for i in df["kick_index"]],
+            "me_name": df["my_name"],
+            "opp_name": df["opp_name"],
+        },
+        columns=REQUIRED_COLS,
+    ))
+
+
+def migrate(csv_path=None, legacy_path=None, sqlite_path=None) -> dict:
+    """
+    Copy CSV rows and old shootouts/kicks rows into the penalties table.
+    Matches whose match_id is already present are skipped, so re-running is harmless.
+    Returns the number of rows imported per source.
+    """
+    csv_path = csv_path or DB_PATH
+    legacy_path = legacy_path or LEGACY_SQLITE_PATH
+
+    sources = {"csv": _read_csv(csv_path)}
+    if legacy_path.exists():
+        sources["legacy"] = _legacy_rows(legacy_path)
+
+    imported = {}
+    with closing(_connect(sqlite_path)) as con, con:
+        seen = {r[0] for r in con.execute("SELECT DISTINCT match_id FROM penalties")}
+        for name, df in sources.items():
+            df = df[~df["match_id"].astype(str).isin(seen)]
+            con.executemany(_INSERT_SQL, _records(df))
+            seen.update(df["match_id"].astype(str))
+            imported[name] = len(df)
+    return imported
+
+
+if __name__ == "__main__":
+    for src, n in migrate().items():
+        print(f"{src}: {n} rows -> {SQLITE_PATH}")
@@ -0,0 +1,107 @@
+# summary.py
+"""
+Per-match summary rows for the database page (score, kicks per side,
+order_mode, opponent, row count). storage.match_summaries keeps a table of these
+up to date across saves and deletes.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+SUMMARY_COLS = ["match_id", "score", "kicks", "order_mode", "opp_name", "rows"]
+
+
+def _text(value):
+    # a blank cell reads back as NaN from CSV but as '' from SQLite or from rows
+    # just saved; the summary always holds ''
+    return "" if pd.isna(value) else value
+
+
+def match_summary(df_match: pd.DataFrame) -> dict:
+    df_match = df_match.sort_values("kick_index")
+    me_goals = int(df_match.loc[df_match["who_kicked"] == "ME", "is_goal"].sum())
+    opp_goals = int(df_match.loc[df_match["who_kicked"] == "OPP", "is_goal"].sum())
+    me_k = int((df_match["who_kicked"] == "ME").sum())
+    opp_k = int((df_match["who_kicked"] == "OPP").sum())
+    order_mode = _text(df_match["order_mode"].iloc[0]) if len(df_match) else ""
+    opp_name = _text(df_match["opp_name"].iloc[0]) if len(df_match) else ""
+    return {
+        "match_id": df_match["match_id"].iloc[0] if len(df_match) else "",
+        "score": f"{me_goals}-{opp_goals}",
+        "kicks": f"{me_k}/{opp_k}",
+        "order_mode": order_mode,
+        "opp_name": opp_name,
+        "rows": len(df_match),
+    }
+
+
+def summarize(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    match_summary for every match in df, one row each, sorted by match_id,
+    in a single vectorized pass (factorize + bincount instead of one groupby
+    group at a time). Rows with no match_id are skipped, as groupby does.
+    """
+    d = df[df["match_id"].notna()]
+    if len(d) == 0:
+        return pd.DataFrame(columns=SUMMARY_COLS)
+
+    codes, match_ids = pd.factorize(d["match_id"], sort=True)
+    who = d["who_kicked"].to_numpy()
+    return _summarize_codes(
+        codes,
+        match_ids,
+        who == "ME",
+        who == "OPP",
+        d["is_goal"].to_numpy(dtype=np.int64),
+        d["kick_index"].to_numpy(),
+        d["order_mode"].to_numpy(),
+        d["opp_name"].to_numpy(),
+    )
+
+
+def _summarize_codes(codes, match_ids, is_me, is_opp, goal, kick_index, order_mode, opp_name) -> pd.DataFrame:
+    """
+    The body of summarize on per-row arrays: codes index match_ids (every row
+    has one). Codes without rows are left out; rows come out in code order, so
+    match_ids must already be sorted for a sorted table.
+    """
+    if len(codes) == 0:
+        return pd.DataFrame(columns=SUMMARY_COLS)
+    n = len(match_ids)
+    me_goals = np.bincount(codes, weights=goal * is_me, minlength=n).astype(np.int64)
+    opp_goals = np.bincount(codes, weights=goal * is_opp, minlength=n).astype(np.int64)
+    me_k = np.bincount(codes, weights=is_me, minlength=n).astype(np.int64)
+    opp_k = np.bincount(codes, weights=is_opp, minlength=n).astype(np.int64)
+    rows = np.bincount(codes, minlength=n)
+
+    # order_mode / opp_name of each match's lowest kick_index (match_summary sorts by kick_index first)
+    order = np.lexsort((kick_index, codes))
+    starts = np.r_[0, np.flatnonzero(np.diff(codes[order])) + 1]
+    first = np.zeros(n, dtype=np.int64)
+    first[codes[order[starts]]] = order[starts]
+    # a match saved twice can repeat its lowest kick_index; match_summary then takes
+    # whichever row sort_values' (unstable) quicksort puts first, so ask it the same way
+    lowest = kick_index[first]
+    n_lowest = np.bincount(codes, weights=kick_index == lowest[codes], minlength=n)
+    for c in np.flatnonzero(n_lowest > 1):
+        rows_c = np.flatnonzero(codes == c)
+        first[c] = rows_c[kick_index[rows_c].argsort(kind="quicksort")[0]]
+
+    def _s(a):
+        return pd.Series(a).astype(str)
+
+    table = pd.DataFrame(
+        {
+            "match_id": match_ids,
+            "score": _s(me_goals) + "-" + _s(opp_goals),
+            "kicks": _s(me_k) + "/" + _s(opp_k),
+            "order_mode": pd.Series(order_mode[first]).fillna(""),
+            "opp_name": pd.Series(opp_name[first]).fillna(""),
+            "rows": rows.astype(np.int64),
+        },
+        columns=SUMMARY_COLS,
+    )
+    if (rows == 0).any():
+        table = table[rows > 0].reset_index(drop=True)
+    return table
@@ -0,0 +1,132 @@
+# sweep.py
+"""
+Hyperparameter sweep over the sidebar's alpha, K and match_weight.
+
+Each candidate is scored walk-forward with backtest.py. The per-kick counts
+(backtest.collect_evidence) are computed once at MODEL_MAX_K and shared by
+every candidate, and p_hist/p_match are computed once per (K, alpha) and
+reused for every match_weight. The work is spread over a
+ProcessPoolExecutor, one (K, alpha) group per task.
+
+    python sweep.py                       # grid
+    python sweep.py --random 200          # random search on the slider steps
+    python sweep.py --write-config        # also write the best row to config.py
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import backtest
+from config import MODEL_MAX_K
+
+CONFIG_PATH = Path(__file__).parent / "config.py"
+
+# slider ranges/steps in app.main
+ALPHA_STEPS = np.round(np.arange(0.0, 5.0 + 1e-9, 0.1), 1)
+MW_STEPS = np.round(np.arange(0.0, 10.0 + 1e-9, 0.5), 1)
+
+GRID_ALPHAS = (0.25, 0.5, 1.0, 2.0, 3.0, 5.0)
+GRID_KS = tuple(range(MODEL_MAX_K + 1))
+GRID_MWS = (0.0, 0.5, 1.0, 2.0, 4.0, 8.0)
+
+_EV = None  # evidence, set once per worker process
+
+
+def _init_worker(ev: dict):
+    global _EV
+    _EV = ev
+
+
+def _evaluate_group(task: tuple) -> list[dict]:
+    k, alpha, mws = task
+    p_hist, p_match = backtest.components(_EV, k, alpha)
+    rows = []
+    for mw in mws:
+        probs = backtest.blend(p_hist, p_match, mw)
+        rows.append({"k": k, "alpha": alpha, "match_weight": mw, **backtest.summary(_EV, probs)})
+    return rows
+
+
+def grid_candidates(ks=GRID_KS, alphas=GRID_ALPHAS, mws=GRID_MWS) -> list[tuple]:
+    return [(int(k), float(a), float(w)) for k, a, w in itertools.product(ks, alphas, mws)]
+
+
+def random_candidates(n: int, seed: int = 0) -> list[tuple]:
+    # sampled on the slider steps so any winner can be set in the UI
+    rng = np.random.default_rng(seed)
+    seen = set()
+    for _ in range(n * 20):
+        if len(seen) >= n:
+            break
+        seen.add((int(rng.integers(0, MODEL_MAX_K + 1)), float(rng.choice(ALPHA_STEPS)), float(rng.choice(MW_STEPS))))
+    return sorted(seen)
+
+
+def sweep(df: pd.DataFrame, candidates: list[tuple], workers: int = 1, metric: str = "log_loss") -> pd.DataFrame:
+    """
+    Ranked table (best first) of (k, alpha, match_weight) with log_loss, brier and top1.
+    """
+    ev = backtest.collect_evidence(df, max_k=MODEL_MAX_K, workers=workers)
+
+    groups = {}
+    for k, a, w in candidates:
+        groups.setdefault((k, a), []).append(w)
+    tasks = [(k, a, sorted(set(ws))) for (k, a), ws in groups.items()]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(ev,)) as ex:
+            results = list(ex.map(_evaluate_group, tasks))
+    else:
+        _init_worker(ev)
+        results = [_evaluate_group(t) for t in tasks]
+
+    table = pd.DataFrame([row for rows in results for row in rows])
+    ascending = metric != "top1"
+    return table.sort_values(metric, ascending=ascending, kind="stable").reset_index(drop=True)
+
+
+def write_config_defaults(k: int, alpha: float, match_weight: float, path: Path = CONFIG_PATH):
+    """
+    Rewrite DEFAULT_K / DEFAULT_ALPHA / DEFAULT_MATCH_WEIGHT in config.py in place.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        text = f.read()
+    for name, value in (("DEFAULT_ALPHA", float(alpha)), ("DEFAULT_K", int(k)), ("DEFAULT_MATCH_WEIGHT", float(match_weight))):
+        text, n = re.subn(rf"^{name} = [^\r\n]*", f"{name} = {value!r}", text, flags=re.M)
+        if n != 1:
+            raise ValueError(f"{name} not found in {path}")
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Sweep alpha / K / match_weight with a walk-forward backtest.")
+    ap.add_argument("--random", type=int, default=0, help="random search with this many candidates instead of the grid")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--metric", choices=["log_loss", "brier", "top1"], default="log_loss")
+    ap.add_argument("--top", type=int, default=20)
+    ap.add_argument("--write-config", action="store_true", help="write the best candidate as the sidebar defaults")
+    args = ap.parse_args()
+
+    from storage import load_db
+
+    candidates = random_candidates(args.random, args.seed) if args.random else grid_candidates()
+    table = sweep(load_db(), candidates, workers=args.workers, metric=args.metric)
+    print(table.head(args.top).to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+
+    if args.write_config and len(table):
+        best = table.iloc[0]
+        write_config_defaults(int(best["k"]), float(best["alpha"]), float(best["match_weight"]))
+        print(f"config.py: DEFAULT_K={int(best['k'])} DEFAULT_ALPHA={best['alpha']} DEFAULT_MATCH_WEIGHT={best['match_weight']}")
+
+
+if __name__ == "__main__":
+    main()
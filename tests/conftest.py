@@ -0,0 +1,32 @@
+# tests/conftest.py
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+# the reference implementations the benches time against
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+import storage  # noqa: E402
+
+
+@pytest.fixture
+def csv_db(tmp_path, monkeypatch):
+    """
+    Point storage at an empty CSV database under tmp_path, with cold caches,
+    no shared model and no summary. Returns the CSV path.
+    """
+    path = tmp_path / "penalties.csv"
+    monkeypatch.setattr(storage, "DB_PATH", path)
+    monkeypatch.setattr(storage, "STORAGE_BACKEND", "csv")
+    for name in ("_cache", "_model", "_summary", "_match_index"):
+        monkeypatch.setattr(storage, name, {k: None for k in getattr(storage, name)})
+    monkeypatch.setattr(storage, "_exports", {})
+    yield path
+    timer = storage._snapshot["timer"]
+    if timer is not None:
+        timer.cancel()
+        storage._snapshot["timer"] = None
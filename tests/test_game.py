@@ -0,0 +1,27 @@
+# tests/test_game.py
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from bench_game import _noisy_kicks, fictitious_play
+from game import score_matrices, solve_games
+from model import NgramStageModel
+
+
+def _batches():
+    m = NgramStageModel(_noisy_kicks(3_000))
+    m.build(max_k=2)
+    rng = np.random.default_rng(1)
+    yield pytest.param(score_matrices(m, 2, 1.0).reshape(-1, 3, 3), id="model K=2")
+    yield pytest.param(rng.random((200, 3, 3)), id="random")
+    yield pytest.param(rng.integers(0, 2, (200, 3, 3)).astype(float), id="0/1")
+
+
+@pytest.mark.parametrize("S", list(_batches()))
+def test_exact_values_inside_fictitious_play_bounds(S):
+    exact = solve_games(S)
+    # any number of fictitious-play rounds brackets the value
+    lo, hi = fictitious_play(S, iters=2_000)
+    assert (exact["gap"] < 1e-9).all()
+    assert ((lo - 1e-9 <= exact["value"]) & (exact["value"] <= hi + 1e-9)).all()
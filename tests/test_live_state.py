@@ -0,0 +1,47 @@
+# tests/test_live_state.py
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from bench_live_state import _kick, _score_and_counts, _shootout_result
+from config import MODEL_MAX_K
+from live_state import LiveMatchState
+from model import STAGES, match_only_probs
+from service import _recent_dirs
+
+ALPHAS = (0.0, 0.5, 1.0)
+
+
+def _check(state: LiveMatchState, seq: list):
+    assert state.kicks == seq
+    assert state.score_and_counts() == _score_and_counts(seq)
+    assert state.result() == _shootout_result(seq)
+    for who in ("ME", "OPP"):
+        assert state.recent_dirs(who) == _recent_dirs(seq, who)
+        for rstage in STAGES:
+            for k in range(MODEL_MAX_K + 2):  # one past max_k takes the rescan fallback
+                for a in ALPHAS:
+                    assert state.match_only_probs(who, rstage, k, a) == match_only_probs(seq, who, rstage, k, a)
+
+
+@pytest.mark.parametrize("odd", [False, True], ids=["clean", "odd kicks"])
+def test_confirm_undo_matches_rescans(odd):
+    # random matches with random undos, compared after every step; odd kicks
+    # have a missing or unknown direction
+    rng = random.Random(int(odd))
+    for _ in range(20):
+        order_mode = rng.choice(["ME_FIRST", "OPP_FIRST"])
+        state, seq = LiveMatchState(), []
+        for _ in range(rng.randint(1, 40)):
+            if seq and rng.random() < 0.25:
+                assert state.undo() == seq.pop()
+            else:
+                kick = _kick(rng, order_mode, len(seq) + 1, odd)
+                seq.append(kick)
+                state.confirm(kick)
+            _check(state, seq)
+        assert LiveMatchState.from_kicks(seq).counts == state.counts
+    state.reset()
+    _check(state, [])
@@ -0,0 +1,70 @@
+# tests/test_model.py
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bench_append import _synthetic_kicks
+from bench_build import build_loop
+from model import NgramStageModel
+
+
+def _messy(df, seed=7):
+    # shuffled rows, bad labels and missing match_ids, as a hand-edited CSV might have
+    rng = np.random.default_rng(seed)
+    df = df.sample(frac=1.0, random_state=seed).reset_index(drop=True)
+    n = len(df)
+    df.loc[rng.random(n) < 0.05, "who_kicked"] = "??"
+    df.loc[rng.random(n) < 0.05, "kicker_dir"] = "X"
+    df.loc[rng.random(n) < 0.05, "round_stage"] = ""
+    df.loc[rng.random(n) < 0.03, "match_id"] = None
+    return df
+
+
+@pytest.mark.parametrize("max_k", range(5))
+def test_build_matches_loop(max_k):
+    df = _messy(_synthetic_kicks(600, seed=3))
+    m = NgramStageModel(df)
+    m.build(max_k=max_k)
+    assert m.counts_dict() == dict(build_loop(df, max_k))
+
+
+def test_update_then_remove_matches_build():
+    df = _synthetic_kicks(400, seed=1)
+    extra = _synthetic_kicks(100, seed=2)
+    extra["match_id"] = "x" + extra["match_id"]
+
+    m = NgramStageModel(df)
+    m.build(max_k=3)
+    m.update(extra)
+    both = NgramStageModel(pd.concat([df, extra], ignore_index=True))
+    both.build(max_k=3)
+    assert np.array_equal(m._counts, both._counts)
+    assert np.array_equal(m._pair_counts, both._pair_counts)
+
+    m.remove(extra)
+    alone = NgramStageModel(df)
+    alone.build(max_k=3)
+    assert np.array_equal(m._counts, alone._counts)
+    assert m.match_ids == alone.match_ids
+
+
+def test_predict_matches_smoothed_counts_after_update():
+    from bench_predict import _queries, predict_dict
+
+    df = _synthetic_kicks(400, seed=1)
+    m = NgramStageModel(df)
+    m.build(max_k=3)
+    counts = m.counts_dict()
+    for alpha in (0.5, 1.0):
+        for who, stage, recent in _queries(200):
+            assert m.predict_next_dir(who, stage, recent, 3, alpha) == predict_dict(counts, who, stage, recent, 3, alpha)
+
+    # the smoothed rows cached for alpha follow the counts
+    extra = _synthetic_kicks(200, seed=5)
+    extra["match_id"] = "x" + extra["match_id"]
+    m.update(extra)
+    counts = m.counts_dict()
+    for who, stage, recent in _queries(200, seed=1):
+        assert m.predict_next_dir(who, stage, recent, 3, 1.0) == predict_dict(counts, who, stage, recent, 3, 1.0)
@@ -0,0 +1,41 @@
+# tests/test_service.py
+from __future__ import annotations
+
+import json
+import threading
+import urllib.error
+
+import pytest
+
+import service
+
+
+@pytest.fixture
+def url(csv_db):
+    server = service.make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _error(url, body):
+    with pytest.raises(urllib.error.HTTPError) as e:
+        service._post(url, "/predict", body, timeout=10)
+    return e.value.code, json.loads(e.value.read().decode("utf-8"))
+
+
+def test_malformed_seq_is_a_400(url):
+    code, payload = _error(url, {"seq": [1], "order_mode": "ME_FIRST", "k": 2, "alpha": 1.0, "match_weight": 1.0})
+    assert code == 400
+    assert "seq" in payload["error"]
+
+
+def test_unexpected_error_is_a_json_500(url, monkeypatch):
+    def boom(**kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(service, "live_prediction", boom)
+    code, payload = _error(url, {"seq": []})
+    assert code == 500
+    assert payload["error"] == "RuntimeError: boom"
@@ -0,0 +1,40 @@
+# tests/test_snapshot.py
+from __future__ import annotations
+
+import numpy as np
+
+import storage
+import storage_sqlite
+from bench_append import _synthetic_kicks
+from model import NgramStageModel
+
+
+def _fresh_counts(df):
+    m = NgramStageModel(df)
+    m.build(max_k=storage.MODEL_MAX_K)
+    return m._counts
+
+
+def test_backends_with_one_stem_keep_separate_snapshots(csv_db, monkeypatch):
+    csv_rows = _synthetic_kicks(200, seed=1)
+    csv_rows.to_csv(csv_db, index=False, encoding="utf-8-sig")
+    storage.get_model()
+    csv_snap = csv_db.with_name("penalties.csv.model.npz")
+    assert csv_snap.exists()
+
+    # same stem, other backend, other data
+    monkeypatch.setattr(storage, "STORAGE_BACKEND", "sqlite")
+    monkeypatch.setattr(storage_sqlite, "SQLITE_PATH", csv_db.with_name("penalties.sqlite3"))
+    storage_sqlite.append_rows(_synthetic_kicks(100, seed=2))
+    storage._model["model"] = None
+    m = storage.get_model()
+    assert csv_db.with_name("penalties.sqlite3.model.npz").exists()
+    assert np.array_equal(m._counts, _fresh_counts(storage.load_db()))
+
+    # the csv snapshot is untouched and does not load for the sqlite data
+    key = storage._data_key()
+    assert NgramStageModel.load(csv_snap, storage._fingerprint(key)) is None
+    monkeypatch.setattr(storage, "STORAGE_BACKEND", "csv")
+    storage._model["model"] = None
+    storage._invalidate_cache()
+    assert np.array_equal(storage.get_model()._counts, _fresh_counts(storage.load_db()))
@@ -0,0 +1,67 @@
+# tests/test_storage_csv.py
+from __future__ import annotations
+
+import pandas as pd
+
+import storage
+from storage import REQUIRED_COLS
+
+
+def _kicks(match_id: str, n: int = 2, opp_name: str = "team1") -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "match_id": match_id,
+            "kick_index": range(1, n + 1),
+            "who_kicked": ["ME" if i % 2 else "OPP" for i in range(1, n + 1)],
+            "kicker_dir": "L",
+            "keeper_dir": "R",
+            "is_goal": 1,
+            "order_mode": "ME_FIRST",
+            "phase": "REG",
+            "round_stage": "EARLY",
+            "me_name": "us",
+            "opp_name": opp_name,
+        }
+    )
+
+
+def _write(path, text: str):
+    path.write_bytes(("\ufeff" + ",".join(REQUIRED_COLS) + "\n" + text).encode("utf-8"))
+
+
+def test_read_csv_keeps_last_row_with_blank_cells(csv_db):
+    # a complete last row whose opp_name is blank is a real row, not a torn one
+    _write(csv_db, "a,1,ME,L,R,1,ME_FIRST,REG,EARLY,us,team1\na,2,OPP,L,R,1,ME_FIRST,REG,EARLY,us,\n")
+    df = storage._read_csv(csv_db)
+    assert len(df) == 2
+    assert pd.isna(df["opp_name"].iloc[-1])
+
+
+def test_read_csv_drops_torn_last_line(csv_db):
+    # cut mid-name: every cell is filled, but the line has no newline
+    _write(csv_db, "a,1,ME,L,R,1,ME_FIRST,REG,EARLY,us,team1\na,2,OPP,L,R,1,ME_FIRST,REG,EARLY,us,tea")
+    assert storage._read_csv(csv_db)["opp_name"].tolist() == ["team1"]
+    assert [len(c) for c in storage._iter_csv(csv_db, 1)] == [1, 0]
+
+    # cut with its last cells missing
+    _write(csv_db, "a,1,ME,L,R,1,ME_FIRST,REG,EARLY,us,team1\na,2,OPP,L,R")
+    assert len(storage._read_csv(csv_db)) == 1
+
+
+def test_append_after_blank_last_cell_keeps_every_row(csv_db):
+    storage.append_rows(_kicks("a", opp_name=""))
+    storage.append_rows(_kicks("b", opp_name=""))
+    assert csv_db.read_bytes().endswith(b"\n")
+    df = storage.load_db()
+    assert df["match_id"].tolist() == ["a", "a", "b", "b"]
+
+
+def test_append_repairs_torn_tail(csv_db):
+    storage.append_rows(_kicks("a"))
+    with open(csv_db, "ab") as f:
+        f.write(b"a,3,ME,L,R,1,ME_FIRST,REG,EA")
+    storage._invalidate_cache()
+    storage.append_rows(_kicks("b"))
+    df = storage.load_db()
+    assert df["match_id"].tolist() == ["a", "a", "b", "b"]
+    assert csv_db.read_bytes().endswith(b"\n")
@@ -0,0 +1,26 @@
+# tests/test_summary.py
+from __future__ import annotations
+
+import storage
+from bench_summary import _odd_rows, per_match
+from summary import summarize
+from test_storage_csv import _kicks
+
+
+def test_summarize_matches_per_match_loop(csv_db):
+    # through load_db, so dtypes and missing values are what db_page sees
+    _odd_rows(2_000).to_csv(csv_db, index=False, encoding="utf-8-sig")
+    df = storage.load_db()
+    assert summarize(df).equals(per_match(df))
+    assert summarize(df.iloc[:0]).equals(per_match(df.iloc[:0]))
+
+
+def test_incremental_summary_matches_fresh_with_blank_names(csv_db):
+    storage.append_rows(_kicks("a"))
+    storage.match_summaries()  # built from disk; the appends below are spliced in
+    storage.append_rows(_kicks("b", opp_name=""))
+    storage.append_rows(_kicks("c", opp_name="OPP").assign(order_mode=""))
+    incremental = storage.match_summaries()
+    fresh = summarize(storage.load_db())
+    assert incremental.equals(fresh)
+    assert incremental["opp_name"].tolist() == ["team1", "", ""]
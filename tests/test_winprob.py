@@ -0,0 +1,90 @@
+# tests/test_winprob.py
+from __future__ import annotations
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import winprob
+from bench_append import _synthetic_kicks
+from bench_winprob import ALPHA, K, _kick, _states, brute_force, reference
+from model import NgramStageModel
+from winprob import exact_win_prob, simulate_win_prob, win_table
+
+REF_ROLLOUTS = 800
+
+
+@pytest.fixture(scope="module")
+def model():
+    m = NgramStageModel(_synthetic_kicks(3_000))
+    m.build(max_k=K)
+    return m
+
+
+def _within(p, ref):
+    # 4 standard errors of the reference estimate
+    return abs(p - ref) < 4 * (0.25 / REF_ROLLOUTS) ** 0.5 + 1e-9
+
+
+@pytest.mark.parametrize("keepers", [("model", "model"), ("model", "uniform"), ("mirror", "model"), ("uniform", "mirror")])
+def test_exact_matches_brute_force(model, keepers):
+    for name, seq in _states():
+        exact = exact_win_prob(model, seq, "ME_FIRST", K, ALPHA, *keepers)
+        brute = brute_force(model, seq, "ME_FIRST", 4, *keepers)
+        assert exact == pytest.approx(brute, abs=1e-9), name
+
+
+def test_exact_after_order_switch_matches_reference(model):
+    # one ME goal under ME_FIRST, then the sidebar switched to OPP_FIRST
+    seq = _kick([], "ME_FIRST", "L", "R")
+    exact = exact_win_prob(model, seq, "OPP_FIRST", K, ALPHA)
+    assert _within(exact, reference(model, seq, "OPP_FIRST", REF_ROLLOUTS))
+
+
+def test_simulation_matches_reference(model):
+    for name, seq in _states():
+        p = simulate_win_prob(model, seq, "ME_FIRST", K, ALPHA, n=20_000, seed=0)
+        assert _within(p, reference(model, seq, "ME_FIRST", REF_ROLLOUTS)), name
+
+
+def test_save_during_solve_is_not_cached(monkeypatch):
+    # force the interleaving: a save (model.update) runs inside _solve, after it
+    # read the counts; the result must be returned but not cached
+    model = NgramStageModel(_synthetic_kicks(2_000))
+    model.build(max_k=K)
+    extra = _synthetic_kicks(500, seed=3)
+    extra["match_id"] = "late" + extra["match_id"]
+    solve = winprob._solve
+
+    def solve_then_save(*args):
+        out = solve(*args)
+        model.update(extra)
+        return out
+
+    monkeypatch.setattr(winprob, "_solve", solve_then_save)
+    stale = win_table(model, "ME_FIRST", K, ALPHA)
+    monkeypatch.setattr(winprob, "_solve", solve)
+    cached = win_table(model, "ME_FIRST", K, ALPHA)
+    fresh = solve(model, "ME_FIRST", K, ALPHA, "model", "model")
+    assert max(float(abs(stale[s] - fresh[s]).max()) for s in fresh) > 0, "the save did not change the table"
+    assert all(np.array_equal(cached[s], fresh[s]) for s in fresh)
+
+
+def test_concurrent_derived_computes_once(model):
+    calls = []
+
+    def make():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    out = []
+    threads = [threading.Thread(target=lambda: out.append(model.derived(("test", 1), make))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert all(v is out[0] for v in out)
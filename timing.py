@@ -0,0 +1,127 @@
+# timing.py
+"""
+Wall-time counters for the rerun hot paths, switched on by config.TIMING.
+
+    @timed("load_db")
+    def load_db(): ...
+
+    with section("view.live"):
+        live_page(...)
+
+With TIMING off, timed() hands the function back unchanged and section()
+returns one shared no-op context, so nothing is measured or stored. With it
+on, every call appends (section, milliseconds) to a process-wide rolling
+window (WINDOW calls per section, for stats()) and to a trace of the last
+TRACE_LEN calls (trace_jsonl(), one JSON object per line).
+"""
+from __future__ import annotations
+
+import contextlib
+import functools
+import json
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from config import TIMING
+
+WINDOW = 500
+TRACE_LEN = 20_000
+
+_lock = threading.Lock()
+_windows: Dict[str, deque] = {}
+_calls: Dict[str, int] = {}
+_trace: deque = deque(maxlen=TRACE_LEN)
+_off = contextlib.nullcontext()
+
+
+def record(name: str, ms: float, start: float):
+    with _lock:
+        if name not in _windows:
+            _windows[name] = deque(maxlen=WINDOW)
+            _calls[name] = 0
+        _windows[name].append(ms)
+        _calls[name] += 1
+        _trace.append((start, name, ms, threading.current_thread().name))
+
+
+@contextlib.contextmanager
+def _section(name: str):
+    start = time.time()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, (time.perf_counter() - t0) * 1000, start)
+
+
+def section(name: str):
+    """
+    Context manager timing its body under `name`.
+    """
+    return _section(name) if TIMING else _off
+
+
+def timed(name: str) -> Callable:
+    """
+    Decorator timing every call under `name`; the identity when TIMING is off.
+    """
+    def wrap(fn):
+        if not TIMING:
+            return fn
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            start = time.time()
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, (time.perf_counter() - t0) * 1000, start)
+        return inner
+    return wrap
+
+
+def stats() -> List[dict]:
+    """
+    One row per section, by name: total calls, and p50 / p95 / max in ms over
+    the last WINDOW calls.
+    """
+    with _lock:
+        snap = {name: (list(w), _calls[name]) for name, w in _windows.items()}
+    rows = []
+    for name in sorted(snap):
+        ms, calls = snap[name]
+        a = np.asarray(ms)
+        rows.append(
+            {
+                "section": name,
+                "calls": calls,
+                "p50_ms": float(np.percentile(a, 50)),
+                "p95_ms": float(np.percentile(a, 95)),
+                "max_ms": float(a.max()),
+            }
+        )
+    return rows
+
+
+def trace_jsonl() -> bytes:
+    """
+    The trace as JSON lines: {"t": unix start time, "section", "ms", "thread"}.
+    """
+    with _lock:
+        events = list(_trace)
+    return "".join(
+        json.dumps({"t": round(t, 6), "section": name, "ms": round(ms, 4), "thread": thread}) + "\n"
+        for t, name, ms, thread in events
+    ).encode("utf-8")
+
+
+def reset():
+    with _lock:
+        _windows.clear()
+        _calls.clear()
+        _trace.clear()
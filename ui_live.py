@@ -1,12 +1,13 @@
 # ui_live.py
 from __future__ import annotations
 
-from collections import Counter
 import pandas as pd
 import streamlit as st
 
-from storage import load_db, append_rows
-from model import NgramStageModel, blend_probs
+from config import PREDICT_SERVICE_URL
+from live_state import LiveMatchState
+from storage import append_rows
+from service import live_prediction, request_append, request_prediction
 from utils import (
     safe_rerun,
     dir_pick_3buttons,
@@ -19,79 +20,62 @@ from utils import (
 DIRS = ["L", "C", "R"]
 
 
-def _recent_dirs(seq, who: str):
-    return [x["kicker_dir"] for x in seq if x.get("who_kicked") == who and x.get("kicker_dir") in DIRS]
-
-
-def _score_and_counts(seq):
-    score_me = 0
-    score_opp = 0
-    kicks_me = 0
-    kicks_opp = 0
-
-    for x in seq:
-        who = x.get("who_kicked")
-        ig = int(x.get("is_goal", 0))
-        if who == "ME":
-            kicks_me += 1
-            score_me += ig
-        elif who == "OPP":
-            kicks_opp += 1
-            score_opp += ig
-
-    return score_me, score_opp, kicks_me, kicks_opp
-
-
-def _shootout_result(seq):
-    """
-    Return: (is_over, winner)  winner in {'ME','OPP',None}
-    Standard rule:
-      - First 5 kicks each (max 10 total), can end early if trailing team cannot catch up
-      - Sudden death after both have taken 5: after each pair (same number of kicks taken),
-        if scores differ => match ends
-    """
-    score_me, score_opp, kicks_me, kicks_opp = _score_and_counts(seq)
-
-    # early termination in first 5 each
-    if kicks_me <= 5 and kicks_opp <= 5:
-        rem_me = 5 - kicks_me
-        rem_opp = 5 - kicks_opp
-        if score_me > score_opp + rem_opp:
-            return True, "ME"
-        if score_opp > score_me + rem_me:
-            return True, "OPP"
-
-        # exactly finished 5 each
-        if kicks_me == 5 and kicks_opp == 5 and (score_me != score_opp):
-            return True, "ME" if score_me > score_opp else "OPP"
-
-    # sudden death: only decide after both have taken same number and > 5
-    if kicks_me == kicks_opp and kicks_me > 5 and score_me != score_opp:
-        return True, "ME" if score_me > score_opp else "OPP"
-
-    return False, None
+def _prediction(state: LiveMatchState, order_mode: str, k: int, alpha: float, match_weight: float, opp_name: str) -> dict:
+    # 配了预测服务就问服务（模型常驻在那边），连不上再本进程计算
+    kwargs = dict(
+        seq=state.kicks,
+        opp_name=opp_name,
+        order_mode=order_mode,
+        k=int(k),
+        alpha=float(alpha),
+        match_weight=float(match_weight),
+        kick_index=state.next_kick_index,
+    )
+    if PREDICT_SERVICE_URL:
+        try:
+            return request_prediction(PREDICT_SERVICE_URL, **kwargs)
+        except OSError as e:
+            st.caption(f"预测服务不可用（{e}），改为本地计算。")
+    return live_prediction(**kwargs, state=state)
+
+
+def _save_rows(df_new: pd.DataFrame):
+    if PREDICT_SERVICE_URL:
+        try:
+            request_append(PREDICT_SERVICE_URL, df_new)
+            return
+        except OSError as e:
+            # 只有确定没连上才本地写；超时等情况服务端可能已写入，避免重复
+            if not isinstance(getattr(e, "reason", None), ConnectionRefusedError):
+                raise
+    append_rows(df_new)
 
 
 def live_page(me_name: str, opp_name: str, alpha: float, k: int, match_weight: float, order_mode: str):
     st.subheader("实时模式（自动轮次推进 + 大箭头点选 + 自动计分/判定结束）")
 
-    if "live_seq" not in st.session_state:
-        st.session_state.live_seq = []
-    if "live_kick_index" not in st.session_state:
-        st.session_state.live_kick_index = 1
+    if "live_state" not in st.session_state:
+        # 本场已确认的射门 + 比分/方向/本场计数，确认与撤销时增量更新
+        st.session_state.live_state = LiveMatchState()
     if "live_match_id" not in st.session_state:
         st.session_state.live_match_id = ""
 
-    seq = st.session_state.live_seq
+    state = st.session_state.live_state
+    seq = state.kicks
 
     # scoreboard + end check
-    score_me, score_opp, kicks_me, kicks_opp = _score_and_counts(seq)
-    is_over, winner = _shootout_result(seq)
+    score_me, score_opp, kicks_me, kicks_opp = state.score_and_counts()
+    is_over, winner = state.result()
 
-    sb1, sb2, sb3, sb4 = st.columns([1.2, 1.2, 1.2, 2.4])
+    kick_index = state.next_kick_index
+    pred = None if is_over else _prediction(state, order_mode, k, alpha, match_weight, opp_name)
+
+    sb1, sb2, sb3, sb5, sb4 = st.columns([1.2, 1.2, 1.2, 1.2, 2.4])
     sb1.metric(f"{me_name} 进球", score_me)
     sb2.metric(f"{opp_name} 进球", score_opp)
     sb3.metric("已踢(我/对手)", f"{kicks_me}/{kicks_opp}")
+    if pred is not None:
+        sb5.metric(f"{me_name} 胜率", f"{pred['win_prob']*100:.1f}%")
     if is_over:
         if winner == "ME":
             sb4.success(f"比赛结束：{me_name} 胜 ✅")
@@ -103,11 +87,15 @@ def live_page(me_name: str, opp_name: str, alpha: float, k: int, match_weight: f
         sb4.info("比赛进行中…")
 
     # controls
-    c_reset, c_save, c_id = st.columns([1, 1, 3])
+    c_undo, c_reset, c_save, c_id = st.columns([1, 1, 1, 3])
+    with c_undo:
+        if st.button("撤销上一脚", key="live_undo", disabled=(len(seq) == 0)):
+            state.undo()
+            safe_rerun()
+
     with c_reset:
         if st.button("重置本场", key="live_reset"):
-            st.session_state.live_seq = []
-            st.session_state.live_kick_index = 1
+            state.reset()
             st.session_state["live_shot__val"] = None
             st.session_state["live_dive__val"] = None
             safe_rerun()
@@ -120,7 +108,9 @@ def live_page(me_name: str, opp_name: str, alpha: float, k: int, match_weight: f
 
             df_new = pd.DataFrame(seq).copy()
             df_new["match_id"] = match_id
-            append_rows(df_new[[
+            df_new["me_name"] = me_name.strip()
+            df_new["opp_name"] = opp_name.strip()
+            _save_rows(df_new[[
                 "match_id",
                 "kick_index",
                 "who_kicked",
@@ -130,6 +120,8 @@ def live_page(me_name: str, opp_name: str, alpha: float, k: int, match_weight: f
                 "order_mode",
                 "phase",
                 "round_stage",
+                "me_name",
+                "opp_name",
             ]])
             st.success(f"已保存：match_id={match_id}（{len(seq)} 脚）")
 
@@ -141,11 +133,10 @@ def live_page(me_name: str, opp_name: str, alpha: float, k: int, match_weight: f
     # if over: only show log + allow reset/save
     if is_over:
         st.write("本场记录：")
-        st.dataframe(pd.DataFrame(seq), use_container_width=True)
+        st.dataframe(pd.DataFrame(seq), width="stretch")
         return
 
     # current kick info
-    kick_index = int(st.session_state.live_kick_index)
     round_no = round_number_from_kick_index(kick_index)
     phase = stage_from_kick_index(kick_index)          # REG/SD
     rstage = round_stage_from_kick_index(kick_index)   # EARLY/MID/LATE
@@ -158,43 +149,34 @@ def live_page(me_name: str, opp_name: str, alpha: float, k: int, match_weight: f
     st.caption(f"当前第 {kick_index} 脚 | 阶段：{phase} | 轮次阶段：{rstage}")
     st.markdown(f"**本脚射门：{kicker_name}** 　|　 **守门：{keeper_name}**")
 
-    # model
-    df = load_db()
-    model = NgramStageModel(df)
-    model.build(max_k=max(0, int(k)))
-
-    recent = _recent_dirs(seq, who)
-    p_hist = model.predict_next_dir(
-        who=who, stage=rstage, recent_dirs_for_who=recent, k=int(k), alpha=float(alpha)
-    )
-
-    # match-only (same stage + same ctx) count
-    kk = max(0, int(k))
-    ctx = tuple(recent[-kk:]) if kk > 0 else tuple()
-    live_counts = Counter()
-
-    hist_tmp = {"ME": [], "OPP": []}
-    for idx, shot in enumerate(seq, start=1):
-        s_rstage = round_stage_from_kick_index(idx)
-        w = shot["who_kicked"]
-        cur_ctx = tuple(hist_tmp[w][-kk:]) if kk > 0 else tuple()
-        if w == who and s_rstage == rstage and cur_ctx == ctx:
-            nd = shot.get("kicker_dir")
-            if nd in DIRS:
-                live_counts[nd] += 1
-        hist_tmp[w].append(shot.get("kicker_dir"))
-
-    total = sum(live_counts.get(d, 0) + float(alpha) for d in DIRS)
-    p_match = {d: (live_counts.get(d, 0) + float(alpha)) / total for d in DIRS} if total > 0 else {d: 1 / 3 for d in DIRS}
-
-    p = blend_probs(p_hist, p_match, match_weight=float(match_weight))
-    rec = max(p, key=lambda x: p[x])
+    p = pred["probs"]
+    rec = pred["recommend"]
 
     cols = st.columns(3)
     cols[0].metric("L", f"{p['L']*100:.1f}%")
     cols[1].metric("C", f"{p['C']*100:.1f}%")
     cols[2].metric("R", f"{p['R']*100:.1f}%")
     st.info(f"推荐（概率最大）：**{rec}**")
+    if pred.get("opp_kicks"):
+        st.caption(f"历史部分使用 {opp_name} 的对手档案（{pred['opp_kicks']} 脚），不足处回退到全库。")
+
+    # 博弈均衡：按历史得分矩阵，我方射门/扑救的最优混合策略
+    eq = pred["equilibrium"]
+    mix = eq["kick"] if who == "ME" else eq["dive"]
+    st.caption(
+        f"博弈均衡（{'我方射门' if who == 'ME' else '我方扑救'}混合策略）："
+        + " / ".join(f"{d} {mix[d]*100:.0f}%" for d in DIRS)
+        + f"　|　均衡进球率 {eq['value']*100:.1f}%"
+    )
+
+    with st.expander("参数对比（历史模型在不同 K / alpha 下的预测）", expanded=False):
+        st.dataframe(
+            pd.DataFrame(
+                [{"K": g["K"], "alpha": g["alpha"], **{d: f"{g[d]*100:.1f}%" for d in DIRS}} for g in pred["grid"]]
+            ),
+            width="stretch",
+            hide_index=True,
+        )
 
     st.divider()
 
@@ -211,7 +193,7 @@ def live_page(me_name: str, opp_name: str, alpha: float, k: int, match_weight: f
             st.error("请先选择射门方向和扑救方向。")
         else:
             ig = 1 if shot != dive else 0
-            st.session_state.live_seq.append(
+            state.confirm(
                 {
                     "kick_index": kick_index,
                     "who_kicked": who,
@@ -223,7 +205,6 @@ def live_page(me_name: str, opp_name: str, alpha: float, k: int, match_weight: f
                     "round_stage": rstage,
                 }
             )
-            st.session_state.live_kick_index = kick_index + 1
             st.session_state["live_shot__val"] = None
             st.session_state["live_dive__val"] = None
             safe_rerun()
@@ -233,4 +214,4 @@ def live_page(me_name: str, opp_name: str, alpha: float, k: int, match_weight: f
     if len(seq) == 0:
         st.info("本场还没开始。")
     else:
-        st.dataframe(pd.DataFrame(seq), use_container_width=True)
+        st.dataframe(pd.DataFrame(seq), width="stretch")
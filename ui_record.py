@@ -4,6 +4,7 @@ import uuid
 import pandas as pd
 import streamlit as st
 
+from live_state import LiveMatchState
 from storage import append_rows
 from utils import (
     safe_rerun,
@@ -17,63 +18,14 @@ from utils import (
 DIRS = ["L", "C", "R"]
 
 
-def _score_and_counts(seq):
-    score_me = 0
-    score_opp = 0
-    kicks_me = 0
-    kicks_opp = 0
-    for x in seq:
-        who = x.get("who_kicked")
-        ig = int(x.get("is_goal", 0))
-        if who == "ME":
-            kicks_me += 1
-            score_me += ig
-        elif who == "OPP":
-            kicks_opp += 1
-            score_opp += ig
-    return score_me, score_opp, kicks_me, kicks_opp
-
-
-def _shootout_result(seq):
-    """
-    Return: (is_over, winner) winner in {'ME','OPP',None}
-    Rules:
-      - First 5 kicks each: can end early if trailing team cannot catch up
-      - After both have taken 5: if scores differ => end
-      - Sudden death: after each pair (same kicks taken) if scores differ => end
-    """
-    score_me, score_opp, kicks_me, kicks_opp = _score_and_counts(seq)
-
-    # early termination during first 5 each
-    if kicks_me <= 5 and kicks_opp <= 5:
-        rem_me = 5 - kicks_me
-        rem_opp = 5 - kicks_opp
-        if score_me > score_opp + rem_opp:
-            return True, "ME"
-        if score_opp > score_me + rem_me:
-            return True, "OPP"
-
-        # finished 5 each
-        if kicks_me == 5 and kicks_opp == 5 and score_me != score_opp:
-            return True, "ME" if score_me > score_opp else "OPP"
-
-    # sudden death: decide only after both have taken same number (>5)
-    if kicks_me == kicks_opp and kicks_me > 5 and score_me != score_opp:
-        return True, "ME" if score_me > score_opp else "OPP"
-
-    return False, None
-
-
 def record_page(me_name: str, opp_name: str):
     st.subheader("录入数据（按一整场，自动轮次推进 + 计分/判定结束）")
     st.caption("每脚用大箭头录入射门/扑救方向；系统自动计分，并在满足点球大战规则时判定比赛结束。")
 
     if "rec_order_mode" not in st.session_state:
         st.session_state.rec_order_mode = "ME_FIRST"
-    if "rec_match_rows" not in st.session_state:
-        st.session_state.rec_match_rows = []
-    if "rec_kick_index" not in st.session_state:
-        st.session_state.rec_kick_index = 1
+    if "rec_state" not in st.session_state:
+        st.session_state.rec_state = LiveMatchState()
 
     order_mode = st.radio(
         "主罚顺序",
@@ -84,9 +36,10 @@ def record_page(me_name: str, opp_name: str):
     )
 
     # scoreboard + end check
-    seq = st.session_state.rec_match_rows
-    score_me, score_opp, kicks_me, kicks_opp = _score_and_counts(seq)
-    is_over, winner = _shootout_result(seq)
+    state = st.session_state.rec_state
+    seq = state.kicks
+    score_me, score_opp, kicks_me, kicks_opp = state.score_and_counts()
+    is_over, winner = state.result()
 
     sb1, sb2, sb3, sb4 = st.columns([1.2, 1.2, 1.2, 2.4])
     sb1.metric(f"{me_name} 进球", score_me)
@@ -106,14 +59,11 @@ def record_page(me_name: str, opp_name: str):
     c1, c2, c3 = st.columns([1, 1, 3])
     with c1:
         if st.button("撤销上一脚", key="rec_undo"):
-            if st.session_state.rec_match_rows:
-                st.session_state.rec_match_rows.pop()
-                st.session_state.rec_kick_index = max(1, int(st.session_state.rec_kick_index) - 1)
+            if state.undo() is not None:
                 safe_rerun()
     with c2:
         if st.button("重置本场", key="rec_reset"):
-            st.session_state.rec_match_rows = []
-            st.session_state.rec_kick_index = 1
+            state.reset()
             st.session_state["rec_shot__val"] = None
             st.session_state["rec_dive__val"] = None
             safe_rerun()
@@ -126,7 +76,7 @@ def record_page(me_name: str, opp_name: str):
     if is_over:
         st.write("本场已录入（比赛已结束）：")
         if len(seq):
-            st.dataframe(pd.DataFrame(seq), use_container_width=True)
+            st.dataframe(pd.DataFrame(seq), width="stretch")
         else:
             st.info("本场为空。")
 
@@ -135,6 +85,8 @@ def record_page(me_name: str, opp_name: str):
             match_id = str(uuid.uuid4())[:8]
             df_new = pd.DataFrame(seq).copy()
             df_new["match_id"] = match_id
+            df_new["me_name"] = me_name.strip()
+            df_new["opp_name"] = opp_name.strip()
             append_rows(df_new[[
                 "match_id",
                 "kick_index",
@@ -145,12 +97,14 @@ def record_page(me_name: str, opp_name: str):
                 "order_mode",
                 "phase",
                 "round_stage",
+                "me_name",
+                "opp_name",
             ]])
             st.success(f"已保存 match_id={match_id}，共 {len(seq)} 脚。")
         return
 
     # current kick info
-    kick_index = int(st.session_state.rec_kick_index)
+    kick_index = state.next_kick_index
     round_no = round_number_from_kick_index(kick_index)
     phase = stage_from_kick_index(kick_index)
     rstage = round_stage_from_kick_index(kick_index)
@@ -178,7 +132,7 @@ def record_page(me_name: str, opp_name: str):
             st.error("请先选择射门方向和扑救方向。")
         else:
             ig = 1 if shot != dive else 0
-            st.session_state.rec_match_rows.append(
+            state.confirm(
                 {
                     "kick_index": kick_index,
                     "who_kicked": who,
@@ -190,7 +144,6 @@ def record_page(me_name: str, opp_name: str):
                     "round_stage": rstage,
                 }
             )
-            st.session_state.rec_kick_index = kick_index + 1
             st.session_state["rec_shot__val"] = None
             st.session_state["rec_dive__val"] = None
             safe_rerun()
@@ -200,13 +153,15 @@ def record_page(me_name: str, opp_name: str):
     if len(seq) == 0:
         st.info("本场还没开始。")
     else:
-        st.dataframe(pd.DataFrame(seq), use_container_width=True)
+        st.dataframe(pd.DataFrame(seq), width="stretch")
 
     st.divider()
     if st.button("保存本场到数据库", type="primary", key="rec_save_any", disabled=(len(seq) == 0)):
         match_id = str(uuid.uuid4())[:8]
         df_new = pd.DataFrame(seq).copy()
         df_new["match_id"] = match_id
+        df_new["me_name"] = me_name.strip()
+        df_new["opp_name"] = opp_name.strip()
         append_rows(df_new[[
             "match_id",
             "kick_index",
@@ -217,5 +172,7 @@ def record_page(me_name: str, opp_name: str):
             "order_mode",
             "phase",
             "round_stage",
+            "me_name",
+            "opp_name",
         ]])
         st.success(f"已保存 match_id={match_id}，共 {len(seq)} 脚。")
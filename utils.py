@@ -2,6 +2,13 @@
 from __future__ import annotations
 import streamlit as st
 
+from kicks import (  # noqa: F401  re-exported for the UI modules
+    kicker_for_kick_index,
+    round_number_from_kick_index,
+    round_stage_from_kick_index,
+    stage_from_kick_index,
+)
+
 DIRS = ["L", "C", "R"]
 
 def safe_rerun():
@@ -13,31 +20,6 @@ def safe_rerun():
         except Exception:
             pass
 
-def stage_from_kick_index(kick_index: int) -> str:
-    # 1-10 脚（前5轮*2）视为 REG，之后 SD
-    return "REG" if kick_index <= 10 else "SD"
-
-def round_stage_from_kick_index(kick_index: int) -> str:
-    # 压缩为 EARLY/MID/LATE（给模型用）
-    # EARLY: 前2轮(1-4脚) MID: 3-4轮(5-8脚) LATE: 第5轮及以后(9+)
-    if kick_index <= 4:
-        return "EARLY"
-    if kick_index <= 8:
-        return "MID"
-    return "LATE"
-
-def kicker_for_kick_index(order_mode: str, kick_index: int) -> str:
-    # order_mode: ME_FIRST / OPP_FIRST
-    # kick_index 从 1 开始
-    if order_mode == "ME_FIRST":
-        return "ME" if kick_index % 2 == 1 else "OPP"
-    else:
-        return "OPP" if kick_index % 2 == 1 else "ME"
-
-def round_number_from_kick_index(kick_index: int) -> int:
-    # 1-2脚为第1轮，3-4脚为第2轮...
-    return (kick_index + 1) // 2
-
 def _inject_dir_button_css():
     st.markdown(
         """
@@ -0,0 +1,314 @@
+# winprob.py
+"""
+Monte Carlo win probability for a live shootout.
+
+The rest of the shootout is simulated from the current live_seq: kicker
+directions are sampled from the history model (NgramStageModel, same k -> 0
+backoff as predict_next_dir), keeper dives from a fixed strategy, and each
+rollout stops under the same rules as live_state.shootout_result. The match-only
+blend of live_page is not simulated; it depends on the rollout's own kicks.
+
+simulate_win_prob: all rollouts advance together one kick at a time with
+NumPy batch sampling; decided rollouts are dropped from the batch as they
+finish.
+
+exact_win_prob: the same process solved exactly. The future of a shootout
+only depends on the number of kicks taken, the goal difference and both
+kickers' last-k-direction contexts, so the win probability of every such
+state is computed once by backward induction (win_table) and cached on the
+model until its counts change (the most recent few argument sets only, see
+NgramStageModel.derived); a live lookup is then a dict + array index.
+Sudden-death rounds are all alike, so they are solved once by value
+iteration to convergence instead of the simulator's MAX_KICKS cutoff.
+"""
+from __future__ import annotations
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from config import DIRS
+from model import STAGES, WHOS, NgramStageModel, _ctx_codes_for
+from kicks import kicker_for_kick_index, round_stage_from_kick_index
+
+KEEPER_STRATEGIES = ("uniform", "model", "mirror")
+
+# rollouts still level after this many kicks count as half a win
+MAX_KICKS = 60
+
+# regulation is 5 kicks each; the exact solver iterates sudden-death rounds
+# until the round-start values move by less than SD_TOL
+REG_KICKS = 10
+SD_MAX_ROUNDS = 1000
+SD_TOL = 1e-12
+
+
+def _decided(score_me, score_opp, kicks_me, kicks_opp):
+    """
+    Vectorized live_state.shootout_result: (is_over, me_won) boolean arrays.
+    """
+    regulation = (kicks_me <= 5) & (kicks_opp <= 5)
+    me_clinched = regulation & (score_me > score_opp + (5 - kicks_opp))
+    opp_clinched = regulation & ~me_clinched & (score_opp > score_me + (5 - kicks_me))
+    level_kicks = (kicks_me == kicks_opp) & (score_me != score_opp)
+    # 5 each inside regulation, or any equal count > 5 in sudden death
+    settled = level_kicks & (kicks_me >= 5) & ~me_clinched & ~opp_clinched
+    is_over = me_clinched | opp_clinched | settled
+    me_won = me_clinched | (settled & (score_me > score_opp))
+    return is_over, me_won
+
+
+def _sample(lo: np.ndarray, hi: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    # inverse CDF over L/C/R; lo = P(L), hi = P(L) + P(C)
+    u = rng.random(len(lo))
+    return (u >= lo).astype(np.int64) + (u >= hi)
+
+
+def _dives(strategy: str, lo: np.ndarray, hi: np.ndarray, top: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    if strategy == "uniform":
+        return rng.integers(0, len(DIRS), size=len(lo))
+    if strategy == "model":
+        # dive where the model expects the shot (the page's recommendation)
+        return top
+    if strategy == "mirror":
+        return _sample(lo, hi, rng)
+    raise ValueError(f"unknown keeper strategy: {strategy!r}")
+
+
+def _state(seq: list, k: int) -> tuple[dict, dict, dict]:
+    # goals, kicks and level-k context code per side
+    score = {w: 0 for w in WHOS}
+    kicks = {w: 0 for w in WHOS}
+    recent = {w: [] for w in WHOS}
+    for x in seq:
+        w = x.get("who_kicked")
+        if w not in score:
+            continue
+        kicks[w] += 1
+        score[w] += int(x.get("is_goal", 0))
+        if x.get("kicker_dir") in DIRS:
+            recent[w].append(x["kicker_dir"])
+    ctx = {w: max(_ctx_codes_for(recent[w], k)[k], 0) for w in WHOS}
+    return score, kicks, ctx
+
+
+def _check_keepers(*strategies: str):
+    for s in strategies:
+        if s not in KEEPER_STRATEGIES:
+            raise ValueError(f"unknown keeper strategy: {s!r}")
+
+
+def simulate_win_prob(
+    model: NgramStageModel,
+    seq: list,
+    order_mode: str,
+    k: int,
+    alpha: float,
+    n: int = 100_000,
+    me_keeper: str = "model",
+    opp_keeper: str = "model",
+    seed: Optional[int] = None,
+) -> float:
+    """
+    P(ME wins) from the live_seq state, estimated over n rollouts.
+
+    me_keeper is our keeper's strategy on OPP kicks, opp_keeper theirs on ME kicks:
+    "uniform", "model" (dive to the model's most likely direction) or "mirror"
+    (dive at random with the model's probabilities).
+    """
+    _check_keepers(me_keeper, opp_keeper)
+
+    table = model.prob_table(k, float(alpha))
+    k = min(max(0, int(k)), model.max_k)
+    n_ctx = table.shape[2]
+    # per-context lookups, so each kick is a few 1-D gathers
+    lo = table[..., 0]
+    hi = table[..., 0] + table[..., 1]
+    top = table.argmax(axis=-1)
+
+    score, kicks, ctx0 = _state(seq, k)
+    start = [np.array([v]) for v in (score["ME"], score["OPP"], kicks["ME"], kicks["OPP"])]
+    is_over, me_won = _decided(*start)
+    if is_over[0]:
+        return float(me_won[0])
+
+    rng = np.random.default_rng(seed)
+    score_me = np.full(n, score["ME"], dtype=np.int64)
+    score_opp = np.full(n, score["OPP"], dtype=np.int64)
+    kicks_me = np.full(n, kicks["ME"], dtype=np.int64)
+    kicks_opp = np.full(n, kicks["OPP"], dtype=np.int64)
+    ctx = {w: np.full(n, ctx0[w], dtype=np.int64) for w in WHOS}
+
+    wins = 0.0
+    kick_index = len(seq) + 1
+    while len(score_me) and kick_index <= MAX_KICKS:
+        who = kicker_for_kick_index(order_mode, kick_index)
+        w = WHOS.index(who)
+        s_ = STAGES.index(round_stage_from_kick_index(kick_index))
+
+        c = ctx[who]
+        lo_c, hi_c = lo[w, s_][c], hi[w, s_][c]
+        shot = _sample(lo_c, hi_c, rng)
+        dive = _dives(me_keeper if who == "OPP" else opp_keeper, lo_c, hi_c, top[w, s_][c], rng)
+        goal = (shot != dive).astype(np.int64)
+        ctx[who] = (ctx[who] * 4 + shot) % n_ctx
+
+        if who == "ME":
+            score_me += goal
+            kicks_me += 1
+        else:
+            score_opp += goal
+            kicks_opp += 1
+
+        is_over, me_won = _decided(score_me, score_opp, kicks_me, kicks_opp)
+        wins += int(np.count_nonzero(me_won))
+        keep = ~is_over
+        score_me, score_opp, kicks_me, kicks_opp = score_me[keep], score_opp[keep], kicks_me[keep], kicks_opp[keep]
+        ctx = {x: c[keep] for x, c in ctx.items()}
+        kick_index += 1
+
+    wins += 0.5 * len(score_me)
+    return wins / n
+
+
+def _dive_table(strategy: str, table: np.ndarray) -> np.ndarray:
+    # P(dive = d) per context, same shape as the kicker table
+    if strategy == "uniform":
+        return np.full_like(table, 1 / len(DIRS))
+    if strategy == "model":
+        return np.eye(len(DIRS))[table.argmax(axis=-1)]
+    if strategy == "mirror":
+        return table
+    raise ValueError(f"unknown keeper strategy: {strategy!r}")
+
+
+def _kicks_after(order_mode: str, n: int) -> tuple[int, int]:
+    # (kicks_me, kicks_opp) once n kicks have been taken (utils.kicker_for_kick_index)
+    kicks_me = (n + 1) // 2 if order_mode == "ME_FIRST" else n // 2
+    return kicks_me, n - kicks_me
+
+
+def _terminal(order_mode: str, n: int, diff: int) -> Optional[float]:
+    # P(ME wins) if the state needs no more kicks, else None
+    kicks_me, kicks_opp = _kicks_after(order_mode, n)
+    score_me, score_opp = max(diff, 0), max(-diff, 0)
+    is_over, me_won = _decided(*(np.int64(v) for v in (score_me, score_opp, kicks_me, kicks_opp)))
+    return float(me_won) if is_over else None
+
+
+def _table_n(n: int) -> int:
+    # sudden-death rounds all look alike: keep only the first round's two positions
+    return n if n < REG_KICKS else REG_KICKS + (n - REG_KICKS) % 2
+
+
+def win_table(
+    model: NgramStageModel,
+    order_mode: str,
+    k: int,
+    alpha: float,
+    me_keeper: str = "model",
+    opp_keeper: str = "model",
+) -> Dict[Tuple[int, int], np.ndarray]:
+    """
+    {(kicks taken, ME goals - OPP goals): V} for every open state reachable from
+    the start, V[ctx_me, ctx_opp] = P(ME wins). Sudden-death states are stored
+    once at kicks taken 10 / 11. Cached on the model per argument set, for the
+    last few sets used.
+    """
+    _check_keepers(me_keeper, opp_keeper)
+    if not model._built:
+        model.build(max_k=max(0, int(k)))
+    key = ("win_table", order_mode, min(max(0, int(k)), model.max_k), float(alpha), me_keeper, opp_keeper)
+    return model.derived(key, lambda: _solve(model, *key[1:]))
+
+
+def _solve(model, order_mode, k, alpha, me_keeper, opp_keeper):
+    table = model.prob_table(k, alpha)
+    n_ctx = table.shape[2]
+    dive = {"ME": _dive_table(opp_keeper, table), "OPP": _dive_table(me_keeper, table)}
+    # next_ctx[c, d]: context after shooting d from c
+    next_ctx = (np.arange(n_ctx)[:, None] * 4 + np.arange(len(DIRS))) % n_ctx
+
+    values = {}
+
+    def value(n, diff):
+        t = _terminal(order_mode, n, diff)
+        return t if t is not None else values[(_table_n(n), diff)]
+
+    def backup(n, diff):
+        # expectation over kick n + 1 from state (n, diff)
+        who = kicker_for_kick_index(order_mode, n + 1)
+        w = WHOS.index(who)
+        s_ = STAGES.index(round_stage_from_kick_index(n + 1))
+        p = table[w, s_]
+        p_goal = p * (1 - dive[who][w, s_])  # (n_ctx, 3): P(shoot d and score)
+        p_save = p - p_goal
+        step = 1 if who == "ME" else -1
+
+        v = np.zeros((n_ctx, n_ctx))
+        for d in range(len(DIRS)):
+            nxt = next_ctx[:, d]
+            for weight, nd in ((p_goal[:, d], diff + step), (p_save[:, d], diff)):
+                after = value(n + 1, nd)
+                if not isinstance(after, np.ndarray):
+                    v += (weight[:, None] if who == "ME" else weight[None, :]) * after
+                elif who == "ME":
+                    # the kicker's context moves, the other side's stays
+                    v += weight[:, None] * after[nxt, :]
+                else:
+                    v += weight[None, :] * after[:, nxt]
+        return v
+
+    # sudden death: value iteration on the round-start state from "undecided = 0.5";
+    # each sweep is one more round, so stopping early is a truncation like MAX_KICKS
+    values[(REG_KICKS, 0)] = np.full((n_ctx, n_ctx), 0.5)
+    for _ in range(SD_MAX_ROUNDS):
+        for diff in (-1, 0, 1):
+            values[(REG_KICKS + 1, diff)] = backup(REG_KICKS + 1, diff)
+        start = backup(REG_KICKS, 0)
+        converged = np.abs(start - values[(REG_KICKS, 0)]).max() <= SD_TOL
+        values[(REG_KICKS, 0)] = start
+        if converged:
+            break
+    for diff in (-1, 0, 1):
+        values[(REG_KICKS + 1, diff)] = backup(REG_KICKS + 1, diff)
+
+    # regulation: open states reachable from 0-0, solved backwards
+    reach = [{0}]
+    for n in range(REG_KICKS - 1):
+        step = 1 if kicker_for_kick_index(order_mode, n + 1) == "ME" else -1
+        reach.append({nd for diff in reach[n] for nd in (diff, diff + step) if _terminal(order_mode, n + 1, nd) is None})
+    for n in range(REG_KICKS - 1, -1, -1):
+        for diff in sorted(reach[n]):
+            values[(n, diff)] = backup(n, diff)
+    return values
+
+
+def exact_win_prob(
+    model: NgramStageModel,
+    seq: list,
+    order_mode: str,
+    k: int,
+    alpha: float,
+    me_keeper: str = "model",
+    opp_keeper: str = "model",
+) -> float:
+    """
+    P(ME wins) from the live_seq state, read from win_table (no sampling).
+    Same arguments and keeper strategies as simulate_win_prob.
+
+    The table only holds states reachable under order_mode. If seq's kicks were
+    taken in another order (order_mode switched mid-match), the state is
+    estimated with simulate_win_prob instead, seeded by len(seq).
+    """
+    values = win_table(model, order_mode, k, alpha, me_keeper, opp_keeper)
+    k = min(max(0, int(k)), model.max_k)
+    score, kicks, ctx = _state(seq, k)
+    is_over, me_won = _decided(*(np.int64(v) for v in (score["ME"], score["OPP"], kicks["ME"], kicks["OPP"])))
+    if is_over:
+        return float(me_won)
+    n = kicks["ME"] + kicks["OPP"]
+    key = (_table_n(n), score["ME"] - score["OPP"])
+    if (kicks["ME"], kicks["OPP"]) != _kicks_after(order_mode, n) or key not in values:
+        return simulate_win_prob(model, seq, order_mode, k, alpha, me_keeper=me_keeper, opp_keeper=opp_keeper, seed=len(seq))
+    return float(values[key][ctx["ME"], ctx["OPP"]])